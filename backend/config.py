@@ -12,8 +12,60 @@ class Settings(BaseSettings):
     MODEL_CODING: str = "qwen2.5-coder:1.5b"
     OLLAMA_HOST: str = "http://127.0.0.1:11434"
     MAX_AGENT_STEPS: int = 10
+    HISTORY_MAX_MESSAGES: int = 200     # latest conversation messages loaded into the agent's context
+    PLAN_MAX_PARALLEL: int = 3          # plan steps run concurrently as sub-agents
+    SANDBOX_TEST_TIMEOUT: float = 120   # seconds per verification test run
+    TEST_WORKERS: int = 4               # impacted test modules run in parallel
+    TEST_TIMEOUT: float = 60            # seconds per impacted test module
+    CONTEXT_TOKEN_BUDGET: int = 3000    # generate_code context from context_files
+    AUTO_COMMIT_LLM_MESSAGE: bool = True  # reword background auto-commits with MODEL_FAST
     
+    SCHEDULER_JOBSTORE_URL: str = ""          # defaults to DATABASE_URL
+    SCHEDULER_MAX_CONCURRENT_RUNS: int = 1    # scheduled agent runs at once
+    SCHEDULER_MISFIRE_GRACE: int = 300        # seconds a missed fire may still run late
+    
+    MEMORY_WARMUP_WAIT: float = 5.0
+    VECTOR_BACKEND: str = "chroma"      # "chroma" or "numpy"
+    VECTOR_DTYPE: str = "float16"       # numpy backend: "float16" or "int8"
+    VECTOR_INDEX: str = "flat"          # numpy backend: "flat" or "ivf"
+    VECTOR_IVF_LISTS: int = 64
+    VECTOR_IVF_PROBES: int = 8
+    
+    # Per-namespace memory quotas (0 disables the limit)
+    MEMORY_CODE_MAX_ITEMS: int = 50000
+    MEMORY_CODE_TTL_DAYS: int = 0
+    MEMORY_DOCS_MAX_ITEMS: int = 20000
+    MEMORY_DOCS_TTL_DAYS: int = 90
+    MEMORY_CONVERSATION_MAX_ITEMS: int = 5000
+    MEMORY_CONVERSATION_TTL_DAYS: int = 30
+    
+    WEB_MAX_BYTES: int = 5_000_000
+    HTML_EXTRACT_WORKERS: int = 2
+    CRAWL_DELAY: float = 0.5
+    
+    BROWSER_MAX_PAGES: int = 4
+    BROWSER_IDLE_TIMEOUT: float = 300
+    BROWSER_BLOCK_RESOURCES: bool = True
+    
+    BOT_MAX_CONCURRENT_CHATS: int = 4   # Telegram chats processed at once
+    BOT_EDIT_INTERVAL: float = 1.5      # seconds between edits of a streamed reply
+    
+    NOTIFY_BATCH_DELAY: float = 2.0     # alerts arriving within this become one digest
+    NOTIFY_DEDUPE_WINDOW: float = 300   # identical alerts within this are only counted
+    NOTIFY_RATE_PER_MINUTE: float = 20
+    NOTIFY_BURST: int = 3
+    NOTIFY_MAX_RETRIES: int = 4
+    
+    # sqlite:// or postgresql://; the async engine uses aiosqlite / asyncpg, the sync one sqlite3 / psycopg2.
     DATABASE_URL: str = "sqlite:///./services/database/agente.db"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800         # seconds; server databases only
+    DB_BUSY_TIMEOUT_MS: int = 5000      # SQLite: wait this long for a lock instead of failing
+    DB_MMAP_SIZE: int = 268435456       # SQLite: bytes of the file memory-mapped for reads
+    BLOB_THRESHOLD: int = 4096          # log texts of this many bytes or more go to the blob store
+    BLOB_PREVIEW_CHARS: int = 500       # kept inline in the log row
     
     SUDO_PASSWORD: str = ""
     
@@ -6,3 +6,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with database.AsyncSessionLocal() as db:
+        yield db
@@ -7,21 +7,34 @@ from fastapi.responses import FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from services.database import database, models
 from backend import scheduler
-from backend.routers import system, conversations
+from backend.routers import system, conversations, memory as memory_router
 from backend.config import settings
 from backend.logger import logger
+from services.memory.memory_manager import memory
+from services.tools import web_fetch, html_extract, git_repo
+from services.tools.browser_pool import browser_manager
+from services.notifications.notifier import notifier
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 models.Base.metadata.create_all(bind=database.engine)
+database.ensure_columns()
+database.ensure_indexes()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting scheduler...")
     scheduler.start_scheduler()
+    logger.info("Warming up memory in background...")
+    memory.start_warmup()
     yield
     logger.info("Stopping scheduler...")
     scheduler.stop_scheduler()
+    await git_repo.auto_committer.drain()
+    await web_fetch.close_session()
+    html_extract.shutdown_pool()
+    await browser_manager.close()
+    await notifier.close()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -47,6 +60,7 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 app.include_router(system.router)
 app.include_router(conversations.router)
+app.include_router(memory_router.router)
 
 frontend_dist = os.path.join(os.path.dirname(__file__), "../frontend/dist")
 
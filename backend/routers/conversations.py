@@ -1,33 +1,79 @@
 import json
 import asyncio
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
-from services.database import models
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from sqlalchemy.ext.asyncio import AsyncSession
+from services.database import database, models, pagination, blob_store
 from services.agent import orchestrator
-from backend.dependencies import get_db
+from backend.dependencies import get_async_db
 from backend.logger import logger
 
 router = APIRouter()
 
+def _conversation_item(r):
+    return {"id": r.id, "title": r.title, "created_at": r.created_at, "last_activity": r.last_activity or r.created_at}
+
+def _log_item(log):
+    # Large messages carry a preview; the full text is at /api/blobs/{blob_hash}.
+    return {"id": log.id, "role": log.role, "content": log.content, "blob_hash": log.blob_hash, "timestamp": log.timestamp}
+
+async def _page_response(fetch_page, to_item, limit, before, after, newest_first):
+    """
+    With any of limit/before/after: one page as {"items", "before", "after"}.
+    Without them: the unpaginated bare list these endpoints always returned,
+    read page by page along the same index.
+    """
+    try:
+        if limit is not None or before or after:
+            page = await fetch_page(limit or 50, before, after)
+            return {"items": [to_item(row) for row in page.items], "before": page.before, "after": page.after}
+        pages, cursor = [], None
+        while True:
+            page = await fetch_page(pagination.MAX_PAGE_SIZE, cursor, None)
+            pages.append([to_item(row) for row in page.items])
+            cursor = page.before
+            if not cursor:
+                break
+        # Each page is older than the one before it.
+        if not newest_first:
+            pages.reverse()
+        return [item for chunk in pages for item in chunk]
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/api/conversations")
-async def get_conversations(db: Session = Depends(get_db)):
-    return db.query(models.Conversation).order_by(models.Conversation.created_at.desc()).all()
+async def get_conversations(limit: int = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE), before: str = None, after: str = None, db: AsyncSession = Depends(get_async_db)):
+    return await _page_response(
+        lambda n, b, a: pagination.conversation_page(db, n, b, a), _conversation_item, limit, before, after, newest_first=True
+    )
 
 @router.get("/api/conversations/{conversation_id}")
-async def get_conversation(conversation_id: int, db: Session = Depends(get_db)):
-    logs = db.query(models.ChatLog).filter(models.ChatLog.conversation_id == conversation_id).order_by(models.ChatLog.timestamp).all()
-    return [{"role": log.role, "content": log.content} for log in logs]
+async def get_conversation(conversation_id: int, limit: int = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE), before: str = None, after: str = None, db: AsyncSession = Depends(get_async_db)):
+    return await _page_response(
+        lambda n, b, a: pagination.chat_log_page(db, conversation_id, n, b, a), _log_item, limit, before, after, newest_first=False
+    )
+
+@router.get("/api/blobs/{blob_hash}")
+async def get_blob(blob_hash: str, db: AsyncSession = Depends(get_async_db)):
+    content = await blob_store.load(db, blob_hash)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    return {"hash": blob_hash, "content": content}
 
 @router.post("/api/conversations")
-async def create_conversation(db: Session = Depends(get_db)):
+async def create_conversation(db: AsyncSession = Depends(get_async_db)):
     new_chat = models.Conversation(title="New Chat")
     db.add(new_chat)
-    db.commit()
-    db.refresh(new_chat)
+    await db.commit()
     return {"id": new_chat.id, "title": new_chat.title}
 
+async def _run_agent(goal, websocket, conversation_id):
+    # Each run gets its own session: an AsyncSession must not be shared
+    # between the run and the receive loop.
+    async with database.AsyncSessionLocal() as db:
+        return await orchestrator.run_agent_loop(goal, db, websocket, conversation_id)
+
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)):
+async def websocket_endpoint(websocket: WebSocket, db: AsyncSession = Depends(get_async_db)):
     await websocket.accept()
     agent_task = None
     
@@ -52,13 +98,13 @@ async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)
             if not conversation_id:
                 new_chat = models.Conversation(title=goal[:30] + "..." if len(goal) > 30 else goal)
                 db.add(new_chat)
-                db.commit()
-                db.refresh(new_chat)
+                await db.commit()
                 conversation_id = new_chat.id
                 await websocket.send_text(json.dumps({"type": "conversation_created", "id": conversation_id, "title": new_chat.title}))
             
-            db.add(models.ChatLog(role="user", content=goal, conversation_id=conversation_id))
-            db.commit()
+            content, blob_hash = await blob_store.externalize(db, goal)
+            db.add(models.ChatLog(role="user", content=content, blob_hash=blob_hash, conversation_id=conversation_id))
+            await db.commit()
             
             if agent_task and not agent_task.done():
                 agent_task.cancel()
@@ -67,7 +113,7 @@ async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)
                 except asyncio.CancelledError:
                     pass
             
-            agent_task = asyncio.create_task(orchestrator.run_agent_loop(goal, db, websocket, conversation_id))
+            agent_task = asyncio.create_task(_run_agent(goal, websocket, conversation_id))
             
     except WebSocketDisconnect:
         if agent_task and not agent_task.done():
@@ -0,0 +1,41 @@
+import asyncio
+from fastapi import APIRouter, HTTPException
+from services.memory.index_jobs import index_jobs
+from services.memory.memory_manager import memory, NAMESPACES
+
+router = APIRouter()
+
+@router.get("/api/memory/jobs")
+async def list_index_jobs():
+    return [job.to_dict() for job in index_jobs.list()]
+
+@router.get("/api/memory/jobs/{job_id}")
+async def get_index_job(job_id: str):
+    job = index_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.post("/api/memory/jobs/{job_id}/cancel")
+async def cancel_index_job(job_id: str):
+    job = index_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"id": job_id, "cancelled": index_jobs.cancel(job_id)}
+
+@router.get("/api/memory/namespaces")
+async def get_memory_namespaces():
+    status = memory.status()
+    if not memory.ready:
+        return {"memory": status, "namespaces": []}
+    report = await asyncio.to_thread(memory.namespace_report)
+    return {"memory": status, "namespaces": report}
+
+@router.post("/api/memory/namespaces/{namespace}/evict")
+async def evict_memory_namespace(namespace: str):
+    if namespace not in NAMESPACES:
+        raise HTTPException(status_code=404, detail="Namespace not found")
+    if not memory.ready:
+        raise HTTPException(status_code=503, detail="Memory is still warming up")
+    evicted = await asyncio.to_thread(memory.enforce_quota, namespace)
+    return {"namespace": namespace, "evicted": evicted}
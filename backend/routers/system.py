@@ -1,10 +1,12 @@
 import socket
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from services.database import models
 from backend import scheduler
-from backend.dependencies import get_db
+from backend.dependencies import get_async_db
 from backend.config import settings
+from services.memory.memory_manager import memory
 
 router = APIRouter()
 
@@ -16,13 +18,14 @@ async def get_system_info():
             "planner": settings.MODEL_REASONING,
             "coder": settings.MODEL_CODING
         },
-        "hostname": socket.gethostname()
+        "hostname": socket.gethostname(),
+        "memory": memory.status()
     }
 
 @router.get("/api/changelog")
-async def get_changelog(db: Session = Depends(get_db)):
-    logs = db.query(models.SystemLog).order_by(models.SystemLog.timestamp.desc()).limit(20).all()
-    return logs
+async def get_changelog(db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(models.SystemLog).order_by(models.SystemLog.timestamp.desc()).limit(20))
+    return result.scalars().all()
 
 @router.get("/api/tasks/active")
 async def get_active_tasks():
@@ -30,3 +33,7 @@ async def get_active_tasks():
         return []
     jobs = scheduler.scheduler.get_jobs()
     return [{"id": job.id, "name": job.name, "next_run": str(job.next_run_time)} for job in jobs]
+
+@router.get("/api/tasks")
+async def get_task_stats():
+    return scheduler.stats()
@@ -1,24 +1,127 @@
 try:
     from apscheduler.schedulers.asyncio import AsyncIOScheduler
-    from apscheduler.jobstores.memory import MemoryJobStore
+    from apscheduler.executors.asyncio import AsyncIOExecutor
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
     SCHEDULER_AVAILABLE = True
 except ImportError:
     SCHEDULER_AVAILABLE = False
     AsyncIOScheduler = None
-    MemoryJobStore = None
+    SQLAlchemyJobStore = None
 
+import asyncio
 import logging
+import time
+import uuid
+from collections import deque
+
+from backend.config import settings
+from services.database import database
 
 # Configure logging
 logging.basicConfig()
 logging.getLogger('apscheduler').setLevel(logging.DEBUG)
 
+# Jobs are stored by reference, so they survive restarts.
+RUN_SCHEDULED_AGENT = "backend.scheduler:run_scheduled_agent"
+RECENT_RUNS = 50
+
+JOB_DEFAULTS = {
+    "coalesce": True,           # a backlog of missed fires runs once, not once per fire
+    "max_instances": 1,         # a job never overlaps itself
+    "misfire_grace_time": settings.SCHEDULER_MISFIRE_GRACE,
+}
+
 # Global scheduler instance
 if SCHEDULER_AVAILABLE:
-    scheduler = AsyncIOScheduler(jobstores={'default': MemoryJobStore()})
+    scheduler = AsyncIOScheduler(
+        jobstores={'default': (
+            SQLAlchemyJobStore(url=settings.SCHEDULER_JOBSTORE_URL) if settings.SCHEDULER_JOBSTORE_URL
+            else SQLAlchemyJobStore(engine=database.engine)
+        )},
+        executors={'default': AsyncIOExecutor()},
+        job_defaults=JOB_DEFAULTS
+    )
 else:
     scheduler = None
 
+# Scheduled agent runs share Ollama and the DB with interactive traffic, so
+# only SCHEDULER_MAX_CONCURRENT_RUNS of them run at once; the rest wait here.
+_run_semaphore = None
+_queued = {}        # job_id -> {"goal", "queued_at"}
+_running = {}       # job_id -> {"goal", "started_at"}
+_recent = deque(maxlen=RECENT_RUNS)
+
+
+def _semaphore() -> asyncio.Semaphore:
+    global _run_semaphore
+    if _run_semaphore is None:
+        _run_semaphore = asyncio.Semaphore(settings.SCHEDULER_MAX_CONCURRENT_RUNS)
+    return _run_semaphore
+
+
+async def run_scheduled_agent(goal: str, job_id: str = None):
+    # Imported lazily: the agent imports the tools, and a tool imports this module.
+    from services.agent import orchestrator
+
+    key = job_id or f"adhoc-{uuid.uuid4().hex[:8]}"
+    _queued[key] = {"goal": goal, "queued_at": time.time()}
+    try:
+        async with _semaphore():
+            queued_at = _queued.pop(key)["queued_at"]
+            started = time.time()
+            _running[key] = {"goal": goal, "started_at": started}
+            status = "error"
+            try:
+                async with database.AsyncSessionLocal() as db:
+                    # We pass None for websocket to run in headless mode
+                    outcome = await orchestrator.run_agent_loop(goal, db_session=db, websocket=None)
+                status = outcome.get("status", "completed")
+            finally:
+                _running.pop(key, None)
+                _recent.append({
+                    "job_id": job_id,
+                    "goal": goal[:100],
+                    "status": status,
+                    "waited": round(started - queued_at, 2),
+                    "duration": round(time.time() - started, 2),
+                    "finished_at": time.time(),
+                })
+    finally:
+        _queued.pop(key, None)
+
+
+def add_agent_job(goal: str, trigger, job_id: str, name: str = None):
+    return scheduler.add_job(
+        RUN_SCHEDULED_AGENT,
+        trigger=trigger,
+        args=[goal],
+        kwargs={"job_id": job_id},
+        id=job_id,
+        name=name or goal[:50]
+    )
+
+
+def stats() -> dict:
+    """Jobs, queue state and recent run durations for /api/tasks."""
+    jobs = scheduler.get_jobs() if scheduler else []
+    durations = [r["duration"] for r in _recent]
+    now = time.time()
+    return {
+        "available": scheduler is not None,
+        "scheduler_running": bool(scheduler and scheduler.running),
+        "max_concurrent_runs": settings.SCHEDULER_MAX_CONCURRENT_RUNS,
+        "jobs": [
+            {"id": job.id, "name": job.name, "trigger": str(job.trigger), "next_run": str(job.next_run_time),
+             "max_instances": job.max_instances, "coalesce": job.coalesce}
+            for job in jobs
+        ],
+        "running": [{"job_id": k, "goal": v["goal"][:100], "elapsed": round(now - v["started_at"], 2)} for k, v in _running.items()],
+        "queued": [{"job_id": k, "goal": v["goal"][:100], "waiting": round(now - v["queued_at"], 2)} for k, v in _queued.items()],
+        "recent_runs": list(reversed(_recent)),
+        "avg_duration": round(sum(durations) / len(durations), 2) if durations else None,
+    }
+
+
 def start_scheduler():
     if scheduler and not scheduler.running:
         scheduler.start()
@@ -2,13 +2,18 @@ import ollama
 import json
 import inspect
 import asyncio
+import contextlib
+import contextvars
 import traceback
+import time
 import os
 from ..tools import registry
-from ..tools.custom.planner import manage_plan
-from ..tools.custom import git_ops
+from ..tools import plan_store
+from ..tools import git_repo
+from ..database import database, pagination, blob_store
 from ..database.models import ChatLog, SystemLog
-from sqlalchemy.orm import Session
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 from backend.config import settings
 from backend.logger import logger
 
@@ -16,6 +21,7 @@ ROUTER_SYSTEM_PROMPT = """You are the Skynet Interface.
 You do NOT write complex code or plans yourself. 
 You route tasks to your expert tools. 
 - If the user asks for a feature or complex goal, call 'manage_plan' with action='create'.
+- Once a plan exists, call 'manage_plan' with action='execute' to run its steps (independent steps run in parallel).
 - If they ask for a fix or code change, call 'run_safe_edit' (which uses the Coding Expert).
 - IMPORTANT: Before applying any critical code change, you SHOULD call 'review_code_changes'.
 - If they ask for simple info that requires internet access, use 'browser_use'.
@@ -26,6 +32,49 @@ Respond in exact JSON: {"thought": "reasoning", "action": {"name": "tool_name",
 Ensure you provide ALL required parameters for the tools as defined in the Tools list.
 """
 
+# Tools that change the workspace, mapped to the parameter naming the path they
+# touch. None means the tool changes the repository as a whole.
+WORKSPACE_MUTATING_TOOLS = {
+    "file_manager": "path",
+    "run_safe_edit": "target_file",
+    "attempt_fix": "file_path",
+    "analyze_error_and_fix": "file_path",
+    "run_test_and_apply": "target_path",
+    "git_commit": None,
+    "git_branch": None,
+}
+READ_ONLY_FILE_ACTIONS = ("read", "list")
+_workspace_locks = {}
+
+_current_websocket = contextvars.ContextVar("current_websocket", default=None)
+_in_sub_agent = contextvars.ContextVar("in_sub_agent", default=False)
+
+def _workspace_lock(tool_name, params):
+    """Serializes agents running in parallel that mutate the same file (or the repository)."""
+    if tool_name not in WORKSPACE_MUTATING_TOOLS:
+        return contextlib.nullcontext()
+    if tool_name == "file_manager" and params.get("action") in READ_ONLY_FILE_ACTIONS:
+        return contextlib.nullcontext()
+    param = WORKSPACE_MUTATING_TOOLS[tool_name]
+    target = params.get(param) if param else None
+    key = os.path.abspath(os.path.expanduser(str(target))) if target else "<repository>"
+    if key not in _workspace_locks:
+        _workspace_locks[key] = asyncio.Lock()
+    return _workspace_locks[key]
+
+class _StepSocket:
+    """Forwards a sub-agent's messages to the parent websocket, tagged with its plan step."""
+    def __init__(self, websocket, step_number):
+        self.websocket = websocket
+        self.step_number = step_number
+
+    async def send_text(self, text):
+        data = json.loads(text)
+        if data.get("role") == "system":
+            return
+        data["content"] = f"[Step {self.step_number}] {data.get('content', '')}"
+        await self.websocket.send_text(json.dumps(data))
+
 async def _get_llm_response(client, history, websocket):
     try:
         if websocket:
@@ -60,15 +109,19 @@ async def _execute_tool(action, tool_map, recent_signatures):
     if tool_name not in tool_map:
         return f"Tool '{tool_name}' not found. Available tools: {list(tool_map.keys())}"
 
+    if not isinstance(params, dict):
+        return f"Error calling tool '{tool_name}': parameters must be a JSON object."
+
     if signature in recent_signatures[-2:]:
         return "Loop detected: you just attempted the same action. Change strategy or gather missing resources before retrying."
     
     func = tool_map[tool_name]
     try:
-        if inspect.iscoroutinefunction(func):
-            observation = await func(**params)
-        else:
-            observation = func(**params)
+        async with _workspace_lock(tool_name, params):
+            if inspect.iscoroutinefunction(func):
+                observation = await func(**params)
+            else:
+                observation = func(**params)
     except TypeError as e:
         observation = f"Error calling tool '{tool_name}': {str(e)}. Check your parameters. Ensure you are providing all required arguments."
     except Exception as e:
@@ -80,30 +133,60 @@ async def _execute_tool(action, tool_map, recent_signatures):
         
     return observation
 
-async def _handle_auto_commit(goal, client, websocket, is_chitchat):
-    commit_hash = None
-    if not is_chitchat:
-        try:
-            repo = git_ops.get_repo()
-            if repo.is_dirty(untracked_files=True):
-                commit_prompt = f"Generate a concise git commit message (max 50 chars) for the following task: {goal}. Output ONLY the message."
-                commit_resp = await client.chat(model=settings.MODEL_FAST, messages=[{"role": "user", "content": commit_prompt}])
-                commit_msg = commit_resp['message']['content'].strip().replace('"', '')
-                
-                result = git_ops.git_commit(commit_msg)
-                if "Committed successfully" in result:
-                    import re
-                    match = re.search(r'\[(.*?)\]', result)
-                    if match:
-                        commit_hash = match.group(1)
-                    
-                    if websocket:
-                        await websocket.send_text(json.dumps({"role": "agent-action", "content": f"Auto-Commit: {result}"}))
-        except Exception as e:
-            logger.error(f"Auto-commit failed: {e}")
-    return commit_hash
+async def _set_log_commit_hash(log_id: int, commit_hash: str):
+    async with database.AsyncSessionLocal() as db:
+        await db.execute(update(SystemLog).where(SystemLog.id == log_id).values(commit_hash=commit_hash))
+        await db.commit()
+
+def _handle_auto_commit(goal, websocket, is_chitchat, log_id):
+    """
+    Queues the auto-commit in the background; the task finishes without
+    waiting on git. The SystemLog gets its commit hash once the commit exists.
+    """
+    if is_chitchat:
+        return
+
+    async def on_commit(commit_hash, message):
+        await _set_log_commit_hash(log_id, commit_hash)
+        if websocket:
+            try:
+                await websocket.send_text(json.dumps({"role": "agent-action", "content": f"Auto-Commit: Committed successfully: [{commit_hash}] {message.splitlines()[0]}"}))
+            except Exception:
+                pass  # the client may be gone by now
+
+    git_repo.auto_committer.schedule(goal, on_commit)
+
+async def run_agent_loop(goal: str, db_session: AsyncSession, websocket=None, conversation_id: int = None, sub_agent: bool = False):
+    """
+    Runs the agent on goal. Returns {"status": "completed" | "incomplete" | "error",
+    "summary": final thought or last observation}, which plan execution uses
+    to join sub-agent results.
+    """
+    # Plans are scoped to this run's conversation (or to the run itself if it has none).
+    plan_key = conversation_id or plan_store.ephemeral_key()
+    plan_token = plan_store.current_plan_key.set(plan_key)
+    websocket_token = _current_websocket.set(websocket)
+    outcome = {"status": "incomplete", "summary": ""}
+
+    async def broadcast_plan(plan):
+        await websocket.send_text(json.dumps({
+            "role": "system",
+            "type": "plan_update",
+            "content": plan_store.render_markdown(plan)
+        }))
+
+    if websocket:
+        plan_store.plans.subscribe(plan_key, broadcast_plan)
+
+    async def log_message(role, text):
+        # Sub-agents have no conversation of their own; the parent's execute_plan
+        # observation carries their results, so their steps aren't persisted.
+        if sub_agent:
+            return
+        content, blob_hash = await blob_store.externalize(db_session, text)
+        db_session.add(ChatLog(role=role, content=content, blob_hash=blob_hash, conversation_id=conversation_id))
+        await db_session.commit()
 
-async def run_agent_loop(goal: str, db_session: Session, websocket=None, conversation_id: int = None):
     try:
         if websocket:
             await websocket.send_text(json.dumps({"role": "system", "content": "Agent starting..."}))
@@ -118,23 +201,28 @@ async def run_agent_loop(goal: str, db_session: Session, websocket=None, convers
             logger.error(error_msg)
             if websocket:
                 await websocket.send_text(json.dumps({"role": "agent-action", "content": error_msg}))
-            return
+            outcome = {"status": "error", "summary": error_msg}
+            return outcome
         
         SYSTEM_PROMPT = ROUTER_SYSTEM_PROMPT + "\n\n" + TOOLS_PROMPT
         
         history = [{"role": "system", "content": SYSTEM_PROMPT}]
         
         if conversation_id:
-            logs = db_session.query(ChatLog).filter(ChatLog.conversation_id == conversation_id).order_by(ChatLog.timestamp).all()
+            # The latest messages, through the same keyset path as the conversation API.
+            logs = (await pagination.chat_log_page(db_session, conversation_id, settings.HISTORY_MAX_MESSAGES)).items
+            # Large messages are stored as previews; the model gets their full text.
+            full_texts = await blob_store.load_many(db_session, [log.blob_hash for log in logs if log.blob_hash])
             for log in logs:
+                text = full_texts.get(log.blob_hash, log.content)
                 role = "user" if log.role == "user" else "assistant"
                 if log.role == "agent-thought":
-                    content = json.dumps({"thought": log.content, "action": {}})
+                    content = json.dumps({"thought": text, "action": {}})
                     history.append({"role": "assistant", "content": content})
                 elif log.role == "agent-action":
-                    history.append({"role": "user", "content": log.content})
+                    history.append({"role": "user", "content": text})
                 else:
-                    history.append({"role": role, "content": log.content})
+                    history.append({"role": role, "content": text})
         else:
             history.append({"role": "user", "content": goal})
 
@@ -143,9 +231,9 @@ async def run_agent_loop(goal: str, db_session: Session, websocket=None, convers
         is_chitchat = len(goal.split()) < 5 and not any(x in goal.lower() for x in ['fix', 'create', 'run', 'check', 'test', 'deploy'])
         
         for step in range(settings.MAX_AGENT_STEPS):
-            if not is_chitchat:
+            if not is_chitchat and not sub_agent:
                 try:
-                    plan_status = await manage_plan("read")
+                    plan_status = plan_store.render_status(await plan_store.plans.get(plan_key))
                 except Exception as e:
                     plan_status = f"Error reading plan: {e}"
 
@@ -166,8 +254,9 @@ async def run_agent_loop(goal: str, db_session: Session, websocket=None, convers
             
             try:
                 response = await _get_llm_response(client, current_history, websocket)
-            except Exception:
-                return
+            except Exception as e:
+                outcome = {"status": "error", "summary": str(e)}
+                return outcome
 
             try:
                 thought_action = json.loads(response['message']['content'])
@@ -175,7 +264,8 @@ async def run_agent_loop(goal: str, db_session: Session, websocket=None, convers
                 error_msg = "Error: Invalid JSON response from LLM"
                 if websocket:
                     await websocket.send_text(json.dumps({"role": "agent-action", "content": error_msg}))
-                return
+                outcome = {"status": "error", "summary": error_msg}
+                return outcome
                 
             thought = thought_action.get('thought', '')
             action = thought_action.get('action', {})
@@ -188,55 +278,29 @@ async def run_agent_loop(goal: str, db_session: Session, websocket=None, convers
 
             if websocket:
                 await websocket.send_text(json.dumps({"role": "agent-thought", "content": thought}))
-            db_session.add(ChatLog(role="agent-thought", content=thought, conversation_id=conversation_id))
-            db_session.commit()
+            await log_message("agent-thought", thought)
             
             if isinstance(action, dict) and action.get('name') == 'task_complete':
-                commit_hash = await _handle_auto_commit(goal, client, websocket, is_chitchat)
-
-                db_session.add(SystemLog(
+                outcome = {"status": "completed", "summary": thought}
+                if sub_agent:
+                    # The parent run commits once all plan steps have joined.
+                    break
+                log = SystemLog(
                     type="SUCCESS",
                     title="Task Completed",
-                    description=f"Goal: {goal[:50]}... completed.",
-                    commit_hash=commit_hash
-                ))
-                db_session.commit()
+                    description=f"Goal: {goal[:50]}... completed."
+                )
+                db_session.add(log)
+                await db_session.commit()
+                _handle_auto_commit(goal, websocket, is_chitchat, log.id)
                 break
                 
             observation = await _execute_tool(action, TOOL_MAP, recent_signatures)
+            outcome["summary"] = str(observation)
                 
             if websocket:
                 await websocket.send_text(json.dumps({"role": "agent-action", "content": observation}))
-            db_session.add(ChatLog(role="agent-action", content=observation, conversation_id=conversation_id))
-            db_session.commit()
-
-            # Broadcast Plan Update if manage_plan was called
-            if isinstance(action, dict) and action.get('name') == 'manage_plan' and websocket:
-                try:
-                    # Calculate path to plan.json (root/plan.json)
-                    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                    plan_file = os.path.join(root_dir, "plan.json")
-                    if os.path.exists(plan_file):
-                        with open(plan_file, 'r') as f:
-                            plan_data = json.load(f)
-                            tasks = plan_data.get("tasks", [])
-                            idx = plan_data.get("current_step_index", 0)
-                            plan_md = ""
-                            for i, task in enumerate(tasks):
-                                status = "[ ]"
-                                if task["status"] == "completed":
-                                    status = "[x]"
-                                elif i == idx:
-                                    status = "[ ]" 
-                                plan_md += f"- {status} {task['description']}\n"
-                            
-                            await websocket.send_text(json.dumps({
-                                "role": "system",
-                                "type": "plan_update",
-                                "content": plan_md
-                            }))
-                except Exception as e:
-                    logger.error(f"Failed to broadcast plan update: {e}")
+            await log_message("agent-action", observation)
 
             history.extend([{"role": "assistant", "content": json.dumps(thought_action)}, {"role": "user", "content": observation}])
             
@@ -246,4 +310,104 @@ async def run_agent_loop(goal: str, db_session: Session, websocket=None, convers
         error_trace = traceback.format_exc()
         logger.error(f"FATAL AGENT ERROR: {error_trace}")
         if websocket:
-            await websocket.send_text(json.dumps({"role": "agent-action", "content": f"FATAL AGENT ERROR: {str(e)}"}))
\ No newline at end of file
+            await websocket.send_text(json.dumps({"role": "agent-action", "content": f"FATAL AGENT ERROR: {str(e)}"}))
+        outcome = {"status": "error", "summary": str(e)}
+    finally:
+        if websocket:
+            plan_store.plans.unsubscribe(plan_key, broadcast_plan)
+        if not conversation_id:
+            plan_store.plans.discard(plan_key)
+        plan_store.current_plan_key.reset(plan_token)
+        _current_websocket.reset(websocket_token)
+    return outcome
+
+async def _run_plan_step(index, tasks, results, websocket):
+    """Runs one plan step as a sub-agent, with the results of its prerequisites as context."""
+    _in_sub_agent.set(True)
+    task = tasks[index]
+    goal = (
+        f"{task['description']}\n\n"
+        f"You are executing step {index + 1} of a larger plan. Do only this step and "
+        f"call task_complete with a short summary of the result when it is done."
+    )
+    context = [
+        f"Step {dep}: {tasks[dep - 1]['description']}\nResult: {results[dep - 1]['summary'][:1500]}"
+        for dep in task.get("depends_on", []) if dep - 1 in results
+    ]
+    if context:
+        goal += "\n\nResults of the steps this one depends on:\n" + "\n\n".join(context)
+
+    async with database.AsyncSessionLocal() as db:
+        step_socket = _StepSocket(websocket, index + 1) if websocket else None
+        return await run_agent_loop(goal, db, step_socket, sub_agent=True)
+
+async def execute_plan() -> str:
+    """
+    Runs the remaining steps of the current plan. Steps whose dependencies
+    have completed run concurrently as sub-agent loops, at most
+    PLAN_MAX_PARALLEL at a time; dependent steps start once their
+    prerequisites have joined and receive their results as context.
+    """
+    if _in_sub_agent.get():
+        return "Error: Sub-agents cannot execute plans. Finish your own step and call task_complete."
+    plan_key = plan_store.current_plan_key.get()
+    plans = plan_store.plans
+    if not await plans.get(plan_key):
+        return "Error: No active plan to execute. Use manage_plan with action='create' first."
+
+    websocket = _current_websocket.get()
+    results = {}
+    running = {}
+    timings = {}
+    started = time.monotonic()
+
+    async def set_status(indices, status):
+        async with plans.lock(plan_key):
+            plan = await plans.get(plan_key)
+            tasks = [dict(t) for t in plan["tasks"]]
+            for i in indices:
+                tasks[i]["status"] = status
+            await plans.save(plan_key, {"tasks": tasks, "current_step_index": plan_store.first_open_step(tasks)})
+            return tasks
+
+    try:
+        while True:
+            plan = await plans.get(plan_key)
+            ready = [i for i in plan_store.ready_steps(plan) if i not in running]
+            launch = ready[:max(settings.PLAN_MAX_PARALLEL - len(running), 0)]
+            if launch:
+                tasks = await set_status(launch, "running")
+                for i in launch:
+                    timings[i] = time.monotonic()
+                    running[i] = asyncio.create_task(_run_plan_step(i, tasks, results, websocket))
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running.values(), return_when=asyncio.FIRST_COMPLETED)
+            finished = [i for i, t in running.items() if t in done]
+            for i in finished:
+                try:
+                    results[i] = running.pop(i).result()
+                except Exception as e:
+                    results[i] = {"status": "error", "summary": str(e)}
+                timings[i] = time.monotonic() - timings[i]
+            completed = [i for i in finished if results[i]["status"] == "completed"]
+            failed = [i for i in finished if results[i]["status"] != "completed"]
+            if completed:
+                await set_status(completed, "completed")
+            if failed:
+                await set_status(failed, "failed")
+    finally:
+        if running:
+            # Cancelled mid-way: stop the sub-agents and put their steps back to pending.
+            for t in running.values():
+                t.cancel()
+            await asyncio.gather(*running.values(), return_exceptions=True)
+            await set_status(list(running), "pending")
+
+    lines = [f"Executed {len(results)} step(s) in {time.monotonic() - started:.1f}s."]
+    for i in sorted(results):
+        lines.append(f"Step {i + 1} {results[i]['status']} ({timings[i]:.1f}s): {results[i]['summary'][:300]}")
+    lines.append("")
+    lines.append(plan_store.render_status(await plans.get(plan_key)))
+    return "\n".join(lines)
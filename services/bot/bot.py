@@ -1,38 +1,215 @@
 import asyncio
 import json
 import os
+import time
+from datetime import timedelta
 from dotenv import load_dotenv
 from telegram import Update
+from telegram.error import BadRequest, RetryAfter, TelegramError
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from ..agent import orchestrator
-from ..database import database
-from sqlalchemy.orm import Session
+from ..database import database, models, blob_store
+from backend.config import settings
+from backend.logger import logger
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '../../backend/.env'))
 
 TOKEN = os.getenv('TELEGRAM_TOKEN')
 
-class DummyWS:
-    def __init__(self):
-        self.messages = []
+MAX_MESSAGE_CHARS = 4096    # Telegram's limit for one message
+ENTRY_CHARS = 600           # each streamed entry is cut to this
+WORKER_IDLE_TIMEOUT = 300   # seconds before an idle chat's worker exits
+ROLE_ICONS = {"agent-thought": "💭", "agent-action": "⚙️", "system": "ℹ️"}
+
+
+class StreamingReply:
+    """
+    Stands in for the websocket: the agent's messages are collected and
+    rendered into one Telegram message that is edited in place, at most
+    every BOT_EDIT_INTERVAL seconds (Telegram rate-limits edits per chat).
+    """
+
+    def __init__(self, message, interval: float = None):
+        self.message = message
+        self.interval = interval or settings.BOT_EDIT_INTERVAL
+        self.entries = []
+        self.status = "⏳ Working..."
+        self._last_edit = 0.0
+        self._last_text = ""
+        self._flush_task = None
 
     async def send_text(self, text):
         data = json.loads(text)
-        self.messages.append(data)
+        if data.get("type") == "plan_update":
+            self.entries.append(("📋", data.get("content", "")))
+        elif data.get("type") == "conversation_created" or not data.get("content"):
+            return
+        else:
+            self.entries.append((ROLE_ICONS.get(data.get("role"), "•"), str(data["content"])))
+        self._schedule_flush()
+
+    def render(self) -> str:
+        lines = []
+        size = len(self.status) + 2
+        # Newest entries win when everything doesn't fit.
+        for icon, content in reversed(self.entries):
+            if len(content) > ENTRY_CHARS:
+                content = content[:ENTRY_CHARS] + "…"
+            line = f"{icon} {content}"
+            if size + len(line) + 1 > MAX_MESSAGE_CHARS:
+                lines.append("…")
+                break
+            lines.append(line)
+            size += len(line) + 1
+        return "\n".join([self.status, ""] + list(reversed(lines)))
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        delay = self._last_edit + self.interval - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._edit()
+
+    async def _edit(self):
+        text = self.render()
+        if text == self._last_text:
+            return
+        try:
+            await self.message.edit_text(text)
+            self._last_text = text
+        except RetryAfter as e:
+            retry = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else e.retry_after
+            # Pushes the next edit (the next flush or finish()) past the wait.
+            self._last_edit = time.monotonic() + retry
+            return
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                logger.warning(f"Telegram edit failed: {e}")
+        except TelegramError as e:
+            logger.warning(f"Telegram edit failed: {e}")
+        self._last_edit = time.monotonic()
+
+    async def finish(self, status: str):
+        self.status = status
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        delay = self._last_edit + self.interval - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._edit()
+
+
+async def _conversation_for_chat(db, chat_id: int, title: str, new: bool = False) -> int:
+    """The conversation this chat writes to, created on first use (or on /new)."""
+    mapping = await db.get(models.TelegramChat, chat_id)
+    if mapping and not new:
+        return mapping.conversation_id
+    conversation = models.Conversation(title=title[:30] + "..." if len(title) > 30 else title)
+    db.add(conversation)
+    await db.flush()
+    if mapping:
+        mapping.conversation_id = conversation.id
+    else:
+        db.add(models.TelegramChat(chat_id=chat_id, conversation_id=conversation.id))
+    await db.commit()
+    return conversation.id
+
+
+class ChatQueues:
+    """
+    One ordered work queue per chat. Messages of a chat run one after
+    another; different chats run concurrently, up to BOT_MAX_CONCURRENT_CHATS.
+    """
+
+    def __init__(self, limit: int = None):
+        self.limit = limit or settings.BOT_MAX_CONCURRENT_CHATS
+        self._semaphore = None
+        self._queues = {}
+        self._workers = {}
+        self._busy = set()
+
+    def submit(self, chat_id: int, job) -> int:
+        """Queues job (a coroutine function) for chat_id. Returns how many jobs are ahead of it."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        queue = self._queues.setdefault(chat_id, asyncio.Queue())
+        ahead = queue.qsize() + (1 if chat_id in self._busy else 0)
+        queue.put_nowait(job)
+        worker = self._workers.get(chat_id)
+        if worker is None or worker.done():
+            self._workers[chat_id] = asyncio.create_task(self._worker(chat_id, queue))
+        return ahead
+
+    async def _worker(self, chat_id: int, queue: asyncio.Queue):
+        while True:
+            try:
+                job = await asyncio.wait_for(queue.get(), timeout=WORKER_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    self._queues.pop(chat_id, None)
+                    self._workers.pop(chat_id, None)
+                    return
+                continue
+            self._busy.add(chat_id)
+            try:
+                async with self._semaphore:
+                    await job()
+            except Exception as e:
+                logger.error(f"Telegram job for chat {chat_id} failed: {e}")
+            finally:
+                self._busy.discard(chat_id)
+                queue.task_done()
+
+
+chat_queues = ChatQueues()
+
+
+async def _run_goal(chat_id: int, goal: str, reply):
+    stream = StreamingReply(reply)
+    try:
+        async with database.AsyncSessionLocal() as db:
+            conversation_id = await _conversation_for_chat(db, chat_id, goal)
+            content, blob_hash = await blob_store.externalize(db, goal)
+            db.add(models.ChatLog(role="user", content=content, blob_hash=blob_hash, conversation_id=conversation_id))
+            await db.commit()
+            outcome = await orchestrator.run_agent_loop(goal, db, websocket=stream, conversation_id=conversation_id)
+        status = {"completed": "✅ Done", "error": "❌ Failed"}.get(outcome["status"], "⚠️ Stopped before finishing")
+        await stream.finish(status)
+    except Exception as e:
+        logger.error(f"Telegram agent run failed: {e}")
+        await stream.finish(f"❌ Failed: {e}")
+
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_message = update.message.text
-    db = database.SessionLocal()
-    ws = DummyWS()
-    await orchestrator.run_agent_loop(user_message, ws, db)
-    response = "\n".join([f"{m['role'].replace('agent-', '')}: {m['content']}" for m in ws.messages[-5:]])
-    await update.message.reply_text(response)
-    db.close()
+    chat_id = update.effective_chat.id
+    reply = await update.message.reply_text("⏳ Queued...")
+
+    async def job():
+        await _run_goal(chat_id, user_message, reply)
+
+    ahead = chat_queues.submit(chat_id, job)
+    if ahead:
+        await reply.edit_text(f"⏳ Queued behind {ahead} earlier message(s) in this chat...")
+
+
+async def new_conversation(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    async with database.AsyncSessionLocal() as db:
+        await _conversation_for_chat(db, update.effective_chat.id, "Telegram chat", new=True)
+    await update.message.reply_text("Started a new conversation.")
+
 
 def main():
+    models.Base.metadata.create_all(bind=database.engine)
+    database.ensure_columns()
+    database.ensure_indexes()
     application = Application.builder().token(TOKEN).build()
+    application.add_handler(CommandHandler("new", new_conversation))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     application.run_polling()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,191 @@
+"""
+Content-addressed store for large log payloads.
+
+Texts above BLOB_THRESHOLD bytes are compressed and stored once in the
+`blobs` table under their sha256; the log row keeps a short preview and the
+hash. Readers get the preview unless they ask for the full text.
+
+    python -m services.database.blob_store gc      # delete unreferenced blobs
+    python -m services.database.blob_store pack    # move existing large rows into blobs
+"""
+import asyncio
+import hashlib
+import sys
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from backend.config import settings
+from . import database
+from .models import Blob, ChatLog, SystemLog
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+    zstandard = None
+
+# Rows whose text column may be moved into blobs.
+BLOB_COLUMNS = ((ChatLog, "content"), (SystemLog, "description"))
+COMPRESS_IN_THREAD_BYTES = 256 * 1024
+# Blobs younger than this are kept even when unreferenced: their row may not be committed yet.
+GC_MIN_AGE = timedelta(hours=1)
+
+
+def compress(data: bytes):
+    """Returns (codec, compressed bytes) with zstd when installed, zlib otherwise."""
+    if ZSTD_AVAILABLE:
+        return "zstd", zstandard.ZstdCompressor(level=3).compress(data)
+    return "zlib", zlib.compress(data, 6)
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Blob is zstd-compressed but the 'zstandard' module is not installed.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def preview(text: str, blob_hash: str) -> str:
+    return f"{text[:settings.BLOB_PREVIEW_CHARS]}\n… [{len(text)} chars, full content in blob {blob_hash}]"
+
+
+def needs_blob(text: str) -> bool:
+    return text is not None and len(text.encode("utf-8")) >= settings.BLOB_THRESHOLD
+
+
+def _insert_blob(dialect_name: str, values: dict):
+    # Identical payloads are stored once; a concurrent writer may get there first.
+    if dialect_name == "sqlite":
+        return sqlite_insert(Blob).values(**values).on_conflict_do_nothing(index_elements=["hash"])
+    if dialect_name == "postgresql":
+        return pg_insert(Blob).values(**values).on_conflict_do_nothing(index_elements=["hash"])
+    return None
+
+
+def _blob_values(text: str, blob_hash: str) -> dict:
+    raw = text.encode("utf-8")
+    codec, data = compress(raw)
+    return {"hash": blob_hash, "codec": codec, "size": len(raw), "data": data}
+
+
+async def externalize(db, text: str):
+    """
+    Returns (stored_text, blob_hash) for a row about to be written with db (an
+    AsyncSession): text itself and None when it is small, otherwise a preview
+    and the hash of the blob now holding it. The caller commits.
+    """
+    if not needs_blob(text):
+        return text, None
+    blob_hash = content_hash(text)
+    exists = await db.scalar(select(Blob.hash).where(Blob.hash == blob_hash))
+    if not exists:
+        if len(text) > COMPRESS_IN_THREAD_BYTES:
+            values = await asyncio.to_thread(_blob_values, text, blob_hash)
+        else:
+            values = _blob_values(text, blob_hash)
+        statement = _insert_blob(db.bind.dialect.name, values)
+        if statement is not None:
+            await db.execute(statement)
+        else:
+            db.add(Blob(**values))
+    return preview(text, blob_hash), blob_hash
+
+
+async def load(db, blob_hash: str):
+    """The full text of a blob, or None if it doesn't exist."""
+    row = (await db.execute(select(Blob.codec, Blob.data).where(Blob.hash == blob_hash))).first()
+    if row is None:
+        return None
+    return (await asyncio.to_thread(decompress, row.codec, row.data)).decode("utf-8")
+
+
+async def load_many(db, hashes) -> dict:
+    """{hash: full text} for the blobs that exist, fetched in one query."""
+    hashes = list(set(hashes))
+    if not hashes:
+        return {}
+    rows = (await db.execute(select(Blob.hash, Blob.codec, Blob.data).where(Blob.hash.in_(hashes)))).all()
+
+    def _decompress_all():
+        return {row.hash: decompress(row.codec, row.data).decode("utf-8") for row in rows}
+
+    return await asyncio.to_thread(_decompress_all)
+
+
+# --- maintenance (sync engine, run from the command line) -------------------
+
+def collect_garbage(engine=None) -> dict:
+    """Deletes blobs no log row references. Returns counts and bytes freed."""
+    engine = engine or database.engine
+    referenced = select(ChatLog.blob_hash).where(ChatLog.blob_hash.isnot(None)).union(
+        select(SystemLog.blob_hash).where(SystemLog.blob_hash.isnot(None))
+    )
+    with engine.begin() as conn:
+        orphans = conn.execute(
+            select(Blob.hash, Blob.data).where(Blob.hash.notin_(referenced), Blob.created_at < datetime.utcnow() - GC_MIN_AGE)
+        ).all()
+        freed = sum(len(row.data or b"") for row in orphans)
+        hashes = [row.hash for row in orphans]
+        for i in range(0, len(hashes), 500):
+            conn.execute(delete(Blob).where(Blob.hash.in_(hashes[i:i + 500])))
+    return {"deleted": len(hashes), "bytes_freed": freed}
+
+
+def pack_existing(engine=None, batch: int = 500) -> dict:
+    """Moves large texts already stored inline into blobs. Returns how many rows changed."""
+    engine = engine or database.engine
+    moved = 0
+    for model, column_name in BLOB_COLUMNS:
+        column = getattr(model, column_name)
+        last_id = 0
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(
+                    select(model.id, column).where(model.id > last_id, model.blob_hash.is_(None))
+                    .order_by(model.id).limit(batch)
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                for row_id, text in rows:
+                    if not needs_blob(text):
+                        continue
+                    blob_hash = content_hash(text)
+                    if conn.scalar(select(Blob.hash).where(Blob.hash == blob_hash)) is None:
+                        conn.execute(Blob.__table__.insert().values(**_blob_values(text, blob_hash)))
+                    conn.execute(
+                        update(model).where(model.id == row_id).values({column_name: preview(text, blob_hash), "blob_hash": blob_hash})
+                    )
+                    moved += 1
+    return {"moved": moved}
+
+
+def main(argv: list) -> int:
+    command = argv[0] if argv else ""
+    if command not in ("gc", "pack"):
+        print("Usage: python -m services.database.blob_store gc|pack [--vacuum]")
+        return 2
+    database.Base.metadata.create_all(bind=database.engine)
+    database.ensure_columns()
+    result = pack_existing() if command == "pack" else collect_garbage()
+    print(result)
+    if "--vacuum" in argv and database.engine.dialect.name == "sqlite":
+        # Freed pages only shrink the file after a VACUUM.
+        with database.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+        print("Vacuumed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
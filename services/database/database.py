@@ -1,13 +1,110 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from backend.config import settings
 
+# Driver used for each backend by the sync and the async engine. DATABASE_URL
+# may name either; both engines are derived from it.
+SYNC_DRIVERS = {"sqlite": "sqlite", "postgresql": "postgresql+psycopg2"}
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def _with_driver(url: str, drivers: dict):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "postgres":
+        backend = "postgresql"
+    if backend in drivers:
+        url = url.set(drivername=drivers[backend])
+    return url
+
+
+def sync_url(url: str):
+    return _with_driver(url, SYNC_DRIVERS)
+
+
+def async_url(url: str):
+    return _with_driver(url, ASYNC_DRIVERS)
+
+
+def _is_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite"
+
+
+def _is_memory(url) -> bool:
+    return _is_sqlite(url) and url.database in (None, "", ":memory:")
+
+
+def _engine_options(url) -> dict:
+    if _is_memory(url):
+        return {}
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+    if not _is_sqlite(url):
+        options.update(pool_pre_ping=True, pool_recycle=settings.DB_POOL_RECYCLE)
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside the single writer; NORMAL sync is safe
+    # with WAL (only the last transactions can be lost on power failure).
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.DB_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.DB_MMAP_SIZE)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+_sync_url = sync_url(settings.DATABASE_URL)
 engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False},
+    _sync_url,
+    connect_args={"check_same_thread": False} if _is_sqlite(_sync_url) else {},
+    **_engine_options(_sync_url)
+)
+
+_async_url = async_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    _async_url,
+    connect_args={"check_same_thread": False} if _is_sqlite(_async_url) else {},
+    **_engine_options(_async_url)
 )
 
+if _is_sqlite(_sync_url) and not _is_memory(_sync_url):
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+Base = declarative_base()
+
+
+def ensure_columns():
+    """
+    Adds nullable columns that models gained after their table was created
+    (create_all() never alters existing tables).
+    """
+    existing = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not existing.has_table(table.name):
+                continue
+            present = {c["name"] for c in existing.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present and column.nullable:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
 
-Base = declarative_base()
\ No newline at end of file
+def ensure_indexes():
+    """create_all() skips indexes on tables that already exist; add any missing ones."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
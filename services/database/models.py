@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from .database import Base
 from datetime import datetime
@@ -11,6 +11,9 @@ class Conversation(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     logs = relationship("ChatLog", back_populates="conversation")
+    plan = relationship("Plan", back_populates="conversation", uselist=False)
+
+    __table_args__ = (Index("ix_conversations_created_at_id", "created_at", "id"),)
 
 class ChatLog(Base):
     __tablename__ = "chat_logs"
@@ -19,10 +22,14 @@ class ChatLog(Base):
     conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
     role = Column(String)
-    content = Column(String)
+    content = Column(String)  # a preview when the full text lives in blobs
+    blob_hash = Column(String, nullable=True, index=True)  # blobs.hash
     
     conversation = relationship("Conversation", back_populates="logs")
 
+    # Keyset pagination and history loads walk a conversation by (timestamp, id).
+    __table_args__ = (Index("ix_chat_logs_conversation_timestamp_id", "conversation_id", "timestamp", "id"),)
+
 class SystemLog(Base):
     __tablename__ = "system_logs"
 
@@ -31,4 +38,33 @@ class SystemLog(Base):
     type = Column(String)
     title = Column(String)
     description = Column(String)
-    commit_hash = Column(String, nullable=True)
\ No newline at end of file
+    commit_hash = Column(String, nullable=True)
+    blob_hash = Column(String, nullable=True, index=True)  # blobs.hash
+
+class Plan(Base):
+    __tablename__ = "plans"
+
+    id = Column(Integer, primary_key=True, index=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), unique=True, index=True)
+    data = Column(Text)  # JSON: {"tasks": [...], "current_step_index": n}
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    conversation = relationship("Conversation", back_populates="plan")
+
+class TelegramChat(Base):
+    __tablename__ = "telegram_chats"
+
+    chat_id = Column(BigInteger, primary_key=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    conversation = relationship("Conversation")
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    hash = Column(String, primary_key=True)  # sha256 of the uncompressed text
+    codec = Column(String)                   # "zstd" or "zlib"
+    size = Column(Integer)                   # uncompressed bytes
+    data = Column(LargeBinary)
+    created_at = Column(DateTime, default=datetime.utcnow)
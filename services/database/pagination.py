@@ -0,0 +1,107 @@
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import func, literal, select, tuple_
+
+from .models import ChatLog, Conversation
+
+MAX_PAGE_SIZE = 200     # largest page the API serves
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Returns (timestamp, id) from an opaque cursor, or raises InvalidCursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def _cursor_key(key_columns, cursor: str):
+    # Typed binds, so the timestamp is compared in the column's storage format.
+    return tuple_(*[literal(value, type_=column.type) for column, value in zip(key_columns, decode_cursor(cursor))])
+
+
+@dataclass
+class Page:
+    items: list
+    before: str = None      # cursor for the older neighbouring page, if there is one
+    after: str = None       # cursor for the newer neighbouring page, if there is one
+
+
+async def _keyset_page(db, query, key_columns, key_of, limit: int, before: str = None, after: str = None, newest_first: bool = False) -> Page:
+    """
+    Runs query one page at a time along key_columns (timestamp, id), using
+    the composite index instead of OFFSET. before/after are cursors of the
+    rows bounding the page; key_of(row) gives a row's key values. Rows come
+    back oldest first unless newest_first.
+    """
+    limit = max(limit, 1)
+    key = tuple_(*key_columns)
+    if before and after:
+        raise InvalidCursor("Use either 'before' or 'after', not both.")
+    if after:
+        query = query.where(key > _cursor_key(key_columns, after)).order_by(*[c.asc() for c in key_columns])
+    else:
+        if before:
+            query = query.where(key < _cursor_key(key_columns, before))
+        query = query.order_by(*[c.desc() for c in key_columns])
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return Page([])
+    # Fetched newest first unless reading forward from an `after` cursor.
+    newest, oldest = (rows[0], rows[-1]) if not after else (rows[-1], rows[0])
+    more_older = has_more if not after else True
+    more_newer = has_more if after else bool(before)
+    if (not after) != newest_first:
+        rows.reverse()
+    return Page(
+        rows,
+        before=encode_cursor(*key_of(oldest)) if more_older else None,
+        after=encode_cursor(*key_of(newest)) if more_newer else None,
+    )
+
+
+async def chat_log_page(db, conversation_id: int, limit: int = 50, before: str = None, after: str = None) -> Page:
+    """
+    A page of a conversation's ChatLogs, oldest first. Without a cursor it is
+    the latest `limit` messages; `before` reads back in time, `after` forward.
+    """
+    query = select(ChatLog).where(ChatLog.conversation_id == conversation_id)
+    page = await _keyset_page(
+        db, query, (ChatLog.timestamp, ChatLog.id), lambda row: (row[0].timestamp, row[0].id), limit, before, after
+    )
+    page.items = [row[0] for row in page.items]
+    return page
+
+
+async def conversation_page(db, limit: int = 50, before: str = None, after: str = None) -> Page:
+    """
+    A page of conversations, newest first, as lightweight rows of
+    (id, title, created_at, last_activity).
+    """
+    # Correlated per row, answered from the (conversation_id, timestamp, id) index.
+    last_activity = (
+        select(func.max(ChatLog.timestamp))
+        .where(ChatLog.conversation_id == Conversation.id)
+        .correlate(Conversation)
+        .scalar_subquery()
+    )
+    query = select(Conversation.id, Conversation.title, Conversation.created_at, last_activity.label("last_activity"))
+    return await _keyset_page(
+        db, query, (Conversation.created_at, Conversation.id), lambda row: (row.created_at, row.id),
+        limit, before, after, newest_first=True
+    )
@@ -0,0 +1,149 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class IndexJobCancelled(Exception):
+    pass
+
+
+class IndexJob:
+    """
+    A single indexing run executed on the memory worker thread.
+    Progress is reported by the indexing code through report(), which also
+    acts as the cancellation checkpoint.
+    """
+
+    def __init__(self, kind: str, description: str):
+        self.id = uuid.uuid4().hex[:8]
+        self.kind = kind
+        self.description = description
+        self.status = "queued"
+        self.files_total = 0
+        self.files_done = 0
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def cancel(self):
+        self._cancel_event.set()
+        if self.status == "queued":
+            self.status = "cancelled"
+            self.finished_at = time.time()
+
+    def report(self, files_done=None, files_total=None, chunks_done=None, chunks_total=None):
+        if files_done is not None:
+            self.files_done = files_done
+        if files_total is not None:
+            self.files_total = files_total
+        if chunks_done is not None:
+            self.chunks_done = chunks_done
+        if chunks_total is not None:
+            self.chunks_total = chunks_total
+        if self.cancelled:
+            raise IndexJobCancelled()
+
+    def to_dict(self) -> dict:
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "description": self.description,
+            "status": self.status,
+            "files_done": self.files_done,
+            "files_total": self.files_total,
+            "chunks_done": self.chunks_done,
+            "chunks_total": self.chunks_total,
+            "result": self.result,
+            "error": self.error,
+            "elapsed": round(end - self.started_at, 2) if self.started_at else 0.0,
+        }
+
+    def summary(self) -> str:
+        line = f"[{self.id}] {self.kind} '{self.description}': {self.status}"
+        if self.files_total:
+            line += f" - files {self.files_done}/{self.files_total}"
+        if self.chunks_total:
+            line += f", chunks {self.chunks_done}/{self.chunks_total}"
+        if self.result:
+            line += f" - {self.result}"
+        if self.error:
+            line += f" - error: {self.error}"
+        return line
+
+
+class IndexJobManager:
+    """
+    Runs indexing jobs one at a time on a dedicated worker thread so embedding
+    and vector store writes never block the event loop. Queries keep hitting
+    the store from other threads while a job is running.
+    """
+
+    def __init__(self, max_history: int = 50):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-index")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_history = max_history
+
+    def submit(self, kind: str, description: str, fn, *args, **kwargs) -> IndexJob:
+        """Queues fn(*args, job=job, **kwargs) and returns the job immediately."""
+        job = IndexJob(kind, description)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: IndexJob, fn, args, kwargs):
+        if job.cancelled:
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = fn(*args, job=job, **kwargs)
+            job.status = "completed"
+        except IndexJobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            print(f"Indexing job {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        while len(self._jobs) > self.max_history and finished:
+            del self._jobs[finished.pop(0)]
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if not job or job.finished:
+            return False
+        job.cancel()
+        return True
+
+
+index_jobs = IndexJobManager()
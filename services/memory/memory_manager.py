@@ -1,35 +1,87 @@
 import os
-try:
-    import chromadb
-    from chromadb.utils import embedding_functions
-    CHROMA_AVAILABLE = True
-except ImportError:
-    CHROMA_AVAILABLE = False
-    chromadb = None
-
 import glob
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+# Vector backends (chromadb, numpy, the embedding model) are imported lazily
+# by create_vector_store, which only runs when MemoryManager is built on warmup.
+from .vector_store import create_vector_store
+from .namespace_stats import NamespaceStats
+from backend.config import settings
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Each namespace lives in its own collection with its own quota, so scraped
+# docs and conversation notes can't grow the codebase index without bound.
+NAMESPACES = {
+    "code": "codebase_knowledge",
+    "docs": "external_docs",
+    "conversation": "conversation_memory",
+}
+
+NAMESPACE_TYPES = {
+    "code": "code",
+    "docs": "external_knowledge",
+    "conversation": "conversation",
+}
+
 class MemoryManager:
-    def __init__(self, persist_path=None):
-        self.collection = None
-        if not CHROMA_AVAILABLE:
-            print("Warning: ChromaDB not installed. Memory features disabled.")
+    def __init__(self, persist_path=None, cache_size=256, enabled=True, backend=None):
+        self.stores = {}
+        self.stats = None
+        self.embedding_fn = None
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        if not enabled:
             return
 
+        backend = backend or settings.VECTOR_BACKEND
         if persist_path is None:
-            persist_path = os.path.join(BASE_DIR, "agente_data", "chroma")
+            persist_path = os.path.join(BASE_DIR, "agente_data", "chroma" if backend == "chroma" else "vectors")
             
         os.makedirs(persist_path, exist_ok=True)
         
-        self.client = chromadb.PersistentClient(path=persist_path)
-        self.embedding_fn = embedding_functions.DefaultEmbeddingFunction()
-        self.collection = self.client.get_or_create_collection(
-            name="codebase_knowledge",
-            embedding_function=self.embedding_fn
-        )
-        print("💾 Memory Manager cargado (Modo Ligero).")
+        options = {}
+        if backend == "numpy":
+            options = {
+                "dtype": settings.VECTOR_DTYPE,
+                "index": settings.VECTOR_INDEX,
+                "ivf_lists": settings.VECTOR_IVF_LISTS,
+                "ivf_probes": settings.VECTOR_IVF_PROBES,
+            }
+
+        # The first store loads the embedding model; the others share it.
+        for namespace, collection in NAMESPACES.items():
+            store = create_vector_store(backend, persist_path, collection, self.embedding_fn, **options)
+            if store is None:
+                self.stores = {}
+                return
+            self.embedding_fn = store.embedding_fn
+            self.stores[namespace] = store
+
+        self.stats = NamespaceStats(os.path.join(persist_path, "namespace_stats.sqlite"))
+
+        # Older installs kept scraped docs in the code collection; drop them
+        # (once) so they are re-learned into the docs namespace.
+        if not self.stats.migration_applied("docs_out_of_code"):
+            self.stores["code"].delete(where={"type": "external_knowledge"})
+            self.stats.record_migration("docs_out_of_code")
+
+        print(f"💾 Memory Manager cargado (Modo Ligero, backend: {backend}).")
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.stores)
+
+    def namespace_limits(self, namespace: str) -> dict:
+        prefix = f"MEMORY_{namespace.upper()}"
+        return {
+            "max_items": getattr(settings, f"{prefix}_MAX_ITEMS"),
+            "ttl_days": getattr(settings, f"{prefix}_TTL_DAYS"),
+        }
 
     def chunk_content(self, content, file_path):
         chunks = []
@@ -65,54 +117,54 @@ class MemoryManager:
                 
         return [c for c in chunks if c.strip()]
 
-    def index_codebase(self):
-        if not self.collection:
-            return "Memory disabled (ChromaDB missing)."
+    def index_codebase(self, job=None):
+        """
+        Re-indexes backend/ and services/. When run as an IndexJob, progress is
+        reported per file and per upsert batch, and cancellation is honoured
+        between them.
+        """
+        if not self.enabled:
+            return "Memory disabled (vector backend unavailable)."
             
         root_dirs = [os.path.join(BASE_DIR, "backend"), os.path.join(BASE_DIR, "services")]
+        files = []
+        for root_dir in root_dirs:
+            files.extend(glob.glob(os.path.join(root_dir, "**", "*.py"), recursive=True))
+            files.extend(glob.glob(os.path.join(root_dir, "**", "*.txt"), recursive=True))
+            files.extend(glob.glob(os.path.join(root_dir, "**", "*.md"), recursive=True))
+        files = [f for f in files if not any(x in f for x in ["venv", "__pycache__", ".git", ".db", "node_modules"])]
+
         documents = []
         metadatas = []
         ids = []
         
-        for root_dir in root_dirs:
-            files = glob.glob(os.path.join(root_dir, "**", "*.py"), recursive=True)
-            files.extend(glob.glob(os.path.join(root_dir, "**", "*.txt"), recursive=True))
-            files.extend(glob.glob(os.path.join(root_dir, "**", "*.md"), recursive=True))
-            
-            for file_path in files:
-                if any(x in file_path for x in ["venv", "__pycache__", ".git", ".db", "node_modules"]):
-                    continue
+        if job:
+            job.report(files_done=0, files_total=len(files))
+
+        for n, file_path in enumerate(files, 1):
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    content = f.read()
+                if content.strip():
+                    file_chunks = self.chunk_content(content, file_path)
+                    rel_path = os.path.relpath(file_path, BASE_DIR)
                     
-                try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                        if not content.strip():
-                            continue
-                            
-                        file_chunks = self.chunk_content(content, file_path)
-                        rel_path = os.path.relpath(file_path, BASE_DIR)
-                        
-                        for i, chunk in enumerate(file_chunks):
-                            documents.append(chunk)
-                            metadatas.append({"source": rel_path, "chunk_id": i})
-                            ids.append(f"{rel_path}_{i}")
-                except Exception as e:
-                    print(f"Skipping {file_path}: {e}")
-
-        if documents:
-            batch_size = 100
-            for i in range(0, len(documents), batch_size):
-                end = min(i + batch_size, len(documents))
-                self.collection.upsert(
-                    documents=documents[i:end],
-                    metadatas=metadatas[i:end],
-                    ids=ids[i:end]
-                )
-        return f"Indexed {len(documents)} chunks from codebase."
+                    for i, chunk in enumerate(file_chunks):
+                        documents.append(chunk)
+                        metadatas.append({"source": rel_path, "chunk_id": i, "type": "code"})
+                        ids.append(f"{rel_path}_{i}")
+            except Exception as e:
+                print(f"Skipping {file_path}: {e}")
+            if job:
+                job.report(files_done=n)
+
+        self._upsert_batches("code", documents, metadatas, ids, job)
+        evicted = self.enforce_quota("code")
+        return f"Indexed {len(documents)} chunks from codebase." + (f" Evicted {evicted} stale chunks." if evicted else "")
 
-    def index_text(self, source: str, text: str):
-        """Indexes arbitrary text content (e.g., from documentation)."""
-        if not self.collection:
+    def index_text(self, source: str, text: str, job=None, namespace: str = "docs"):
+        """Indexes arbitrary text content (e.g., from documentation) into a namespace."""
+        if not self.enabled:
             return "Memory disabled."
 
         chunks = self.chunk_content(text, source)
@@ -125,25 +177,245 @@ class MemoryManager:
         
         for i, chunk in enumerate(chunks):
             documents.append(chunk)
-            metadatas.append({"source": source, "chunk_id": i, "type": "external_knowledge"})
+            metadatas.append({"source": source, "chunk_id": i, "type": NAMESPACE_TYPES[namespace]})
             ids.append(f"ext_{safe_source}_{i}")
             
-        if documents:
-            self.collection.upsert(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
-            )
+        if job:
+            job.report(files_done=1, files_total=1)
+        self._upsert_batches(namespace, documents, metadatas, ids, job)
+        self.enforce_quota(namespace)
         return f"Indexed {len(documents)} chunks from {source}."
 
-    def query(self, query_text, n_results=3):
-        if not self.collection:
+    def remember(self, note: str):
+        """Stores a short fact in the conversation namespace."""
+        source = "note_" + hashlib.sha1(note.encode("utf-8")).hexdigest()[:16]
+        return self.index_text(source, note, namespace="conversation")
+
+    def _upsert_batches(self, namespace, documents, metadatas, ids, job=None, batch_size=100):
+        store = self.stores[namespace]
+        if job:
+            job.report(chunks_done=0, chunks_total=len(documents))
+        for i in range(0, len(documents), batch_size):
+            end = min(i + batch_size, len(documents))
+            store.upsert(
+                ids=ids[i:end],
+                documents=documents[i:end],
+                metadatas=metadatas[i:end]
+            )
+            self.stats.record_upserts(namespace, ids[i:end], [m["source"] for m in metadatas[i:end]])
+            self._invalidate_cache()
+            if job:
+                job.report(chunks_done=end)
+
+    def delete(self, namespace, ids=None, where=None):
+        if not self.enabled:
+            return
+        self.stores[namespace].delete(ids=ids, where=where)
+        if ids:
+            self.stats.remove(namespace, ids)
+        self._invalidate_cache()
+
+    def enforce_quota(self, namespace: str) -> int:
+        """
+        Evicts chunks that were neither written nor hit within the TTL, then
+        the least recently hit ones until the namespace fits its size cap.
+        Returns the number of evicted chunks.
+        """
+        if not self.enabled:
+            return 0
+        store = self.stores[namespace]
+        limits = self.namespace_limits(namespace)
+        if (limits["ttl_days"] or limits["max_items"]) and self.stats.tracked(namespace) < store.count():
+            # Chunks without a stats row would never be picked for eviction.
+            self.stats.backfill(namespace, store.list_sources())
+
+        evict = []
+        if limits["ttl_days"]:
+            evict.extend(self.stats.expired(namespace, limits["ttl_days"] * 86400))
+        if limits["max_items"]:
+            excess = store.count() - len(evict) - limits["max_items"]
+            if excess > 0:
+                expired = set(evict)
+                candidates = self.stats.least_recently_used(namespace, excess + len(expired))
+                evict.extend([item_id for item_id in candidates if item_id not in expired][:excess])
+
+        for i in range(0, len(evict), 500):
+            batch = evict[i:i + 500]
+            store.delete(ids=batch)
+            self.stats.remove(namespace, batch)
+        if evict:
+            self._invalidate_cache()
+            print(f"Memory: evicted {len(evict)} chunks from '{namespace}'.")
+        return len(evict)
+
+    def has_source(self, source: str, namespace: str = "docs") -> bool:
+        """Whether chunks of source are still in memory; eviction may have removed them."""
+        if not self.enabled:
+            return False
+        return self.stats.has_source(namespace, source)
+
+    def namespace_report(self) -> list:
+        report = []
+        for namespace, store in self.stores.items():
+            entry = {"namespace": namespace, "collection": NAMESPACES[namespace], "items": store.count()}
+            entry.update(self.namespace_limits(namespace))
+            entry.update(self.stats.summary(namespace))
+            report.append(entry)
+        return report
+
+    def _invalidate_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+    def query(self, query_text, n_results=3, namespace="code"):
+        if not self.enabled:
             return {"documents": [], "metadatas": []}
             
-        results = self.collection.query(
+        results = self.stores[namespace].query(
             query_texts=[query_text],
             n_results=n_results
         )
+        self.stats.record_hits((namespace, item_id) for item_id in results["ids"][0])
         return results
 
-memory = MemoryManager()
+    def query_many(self, queries, n_results=3, namespace=None, source_type=None, path_prefix=None, max_chars=1000):
+        """
+        Batched search. All uncached queries are embedded once and searched in
+        a single call per namespace (all namespaces when namespace is None),
+        with hits merged by distance. Returns one list of hits per query, each
+        hit being {"source", "document", "distance"} with document cut to
+        max_chars.
+
+        source_type filters on the chunk "type" metadata; path_prefix keeps
+        only sources starting with it. Results are LRU-cached until the next
+        upsert/delete. Every returned chunk counts as a hit for eviction.
+        """
+        if not self.enabled or not queries:
+            return [[] for _ in queries]
+
+        namespaces = [namespace] if namespace else list(self.stores)
+        keys = [(q, n_results, tuple(namespaces), source_type, path_prefix, max_chars) for q in queries]
+        results = {}
+        with self._cache_lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    results[key] = self._cache[key]
+
+        missing = list(dict.fromkeys(key for key in keys if key not in results))
+        if missing:
+            embeddings = self.embedding_fn([key[0] for key in missing])
+            # Chroma has no prefix operator, so over-fetch and filter afterwards.
+            fetch_n = n_results * 4 if path_prefix else n_results
+            merged = [[] for _ in missing]
+            for ns in namespaces:
+                raw = self.stores[ns].query(
+                    query_embeddings=embeddings,
+                    n_results=fetch_n,
+                    where={"type": source_type} if source_type else None
+                )
+                for row in range(len(missing)):
+                    for item_id, doc, meta, dist in zip(raw["ids"][row], raw["documents"][row], raw["metadatas"][row], raw["distances"][row]):
+                        source = (meta or {}).get("source", "")
+                        if path_prefix and not source.startswith(path_prefix):
+                            continue
+                        merged[row].append((dist, ns, item_id, source, doc))
+
+            for row, key in enumerate(missing):
+                hits = []
+                for dist, ns, item_id, source, doc in sorted(merged[row], key=lambda h: h[0])[:n_results]:
+                    hits.append(((ns, item_id), {
+                        "source": source,
+                        "document": doc[:max_chars] if max_chars else doc,
+                        "distance": dist
+                    }))
+                results[key] = hits
+
+            with self._cache_lock:
+                for key in missing:
+                    self._cache[key] = results[key]
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+        self.stats.record_hits(ref for key in keys for ref, _ in results[key])
+        return [[hit for _, hit in results[key]] for key in keys]
+
+class LazyMemoryManager:
+    """
+    Proxy that defers MemoryManager construction (Chroma client + embedding
+    model) until first use or until start_warmup() is called, typically from
+    the API lifespan. Attribute access blocks until the manager is ready;
+    callers that must not block should check wait_ready(timeout) first.
+    """
+
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._instance = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+        self._error = None
+        self._started_at = None
+        self._ready_at = None
+
+    def start_warmup(self):
+        with self._lock:
+            if self._thread is None and not self._ready.is_set():
+                self._started_at = time.time()
+                self._thread = threading.Thread(target=self._initialize, name="memory-warmup", daemon=True)
+                self._thread.start()
+
+    def _initialize(self):
+        with self._lock:
+            if self._ready.is_set():
+                return
+            if self._started_at is None:
+                self._started_at = time.time()
+            try:
+                instance = MemoryManager(**self._kwargs)
+                if instance.enabled:
+                    # Force the embedding model to load now rather than on the first query.
+                    instance.embedding_fn(["warmup"])
+                self._instance = instance
+            except Exception as e:
+                self._error = str(e)
+                print(f"Memory warmup failed: {e}")
+                self._instance = MemoryManager(enabled=False)
+            self._ready_at = time.time()
+            self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout=None) -> bool:
+        """Starts warmup if needed and waits up to timeout seconds for it."""
+        self.start_warmup()
+        return self._ready.wait(timeout)
+
+    def status(self) -> dict:
+        if self._ready.is_set():
+            if self._error:
+                state = "failed"
+            elif not self._instance.enabled:
+                state = "disabled"
+            else:
+                state = "ready"
+        elif self._thread is not None:
+            state = "warming"
+        else:
+            state = "cold"
+        warmup_seconds = None
+        if self._started_at and self._ready_at:
+            warmup_seconds = round(self._ready_at - self._started_at, 2)
+        return {"state": state, "error": self._error, "warmup_seconds": warmup_seconds}
+
+    def __getattr__(self, name):
+        if not self._ready.is_set():
+            if self._thread is not None:
+                self._ready.wait()
+            else:
+                self._initialize()
+        return getattr(self._instance, name)
+
+memory = LazyMemoryManager()
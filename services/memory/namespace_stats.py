@@ -0,0 +1,125 @@
+import sqlite3
+import threading
+import time
+
+
+class NamespaceStats:
+    """
+    Bookkeeping for memory eviction, kept in SQLite beside the vector data:
+    per (namespace, id) it records when the chunk was last written, how often
+    query results returned it, and when that last happened.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "namespace TEXT NOT NULL, id TEXT NOT NULL, source TEXT, "
+            "updated_at REAL NOT NULL, last_hit REAL, hits INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (namespace, id))"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS ix_entries_recency "
+            "ON entries (namespace, COALESCE(last_hit, updated_at))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_entries_source ON entries (namespace, source)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY, applied_at REAL NOT NULL)")
+        self._db.commit()
+
+    def migration_applied(self, name: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM migrations WHERE name = ?", (name,)).fetchone() is not None
+
+    def record_migration(self, name: str):
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO migrations (name, applied_at) VALUES (?, ?)", (name, time.time()))
+            self._db.commit()
+
+    def record_upserts(self, namespace: str, ids, sources):
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO entries (namespace, id, source, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(namespace, id) DO UPDATE SET source = excluded.source, updated_at = excluded.updated_at",
+                [(namespace, item_id, source, now) for item_id, source in zip(ids, sources)]
+            )
+            self._db.commit()
+
+    def tracked(self, namespace: str) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+    def backfill(self, namespace: str, items):
+        """
+        Adds rows for (id, source) items written without one (e.g. before
+        stats existed), dated just before the oldest tracked row so they are
+        the first eviction candidates. Returns how many were added.
+        """
+        with self._lock:
+            oldest = self._db.execute(
+                "SELECT MIN(updated_at) FROM entries WHERE namespace = ?", (namespace,)
+            ).fetchone()[0]
+            cursor = self._db.executemany(
+                "INSERT OR IGNORE INTO entries (namespace, id, source, updated_at) VALUES (?, ?, ?, ?)",
+                [(namespace, item_id, source, (oldest or time.time()) - 1) for item_id, source in items]
+            )
+            self._db.commit()
+        return cursor.rowcount
+
+    def record_hits(self, pairs):
+        """pairs: iterable of (namespace, id) returned by a query."""
+        pairs = list(pairs)
+        if not pairs:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "UPDATE entries SET hits = hits + 1, last_hit = ? WHERE namespace = ? AND id = ?",
+                [(now, namespace, item_id) for namespace, item_id in pairs]
+            )
+            self._db.commit()
+
+    def remove(self, namespace: str, ids):
+        with self._lock:
+            self._db.executemany(
+                "DELETE FROM entries WHERE namespace = ? AND id = ?",
+                [(namespace, item_id) for item_id in ids]
+            )
+            self._db.commit()
+
+    def expired(self, namespace: str, ttl_seconds: float):
+        """Ids neither written nor hit within the last ttl_seconds."""
+        cutoff = time.time() - ttl_seconds
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM entries WHERE namespace = ? AND MAX(updated_at, COALESCE(last_hit, 0)) < ?",
+                (namespace, cutoff)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def least_recently_used(self, namespace: str, limit: int):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM entries WHERE namespace = ? ORDER BY COALESCE(last_hit, updated_at) ASC LIMIT ?",
+                (namespace, limit)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def has_source(self, namespace: str, source: str) -> bool:
+        """Whether any chunk of source is still stored (i.e. not all evicted)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM entries WHERE namespace = ? AND source = ? LIMIT 1",
+                (namespace, source)
+            ).fetchone()
+        return row is not None
+
+    def summary(self, namespace: str) -> dict:
+        with self._lock:
+            tracked, hits, oldest, last_hit = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0), MIN(updated_at), MAX(last_hit) FROM entries WHERE namespace = ?",
+                (namespace,)
+            ).fetchone()
+        return {"tracked": tracked, "hits": hits, "oldest_write": oldest, "last_hit": last_hit}
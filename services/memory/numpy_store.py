@@ -0,0 +1,318 @@
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from .vector_store import VectorStore
+
+EMPTY = -2       # row slot is free
+UNASSIGNED = -1  # row holds a vector not yet assigned to an IVF list
+
+BLOCK_ROWS = 32768
+MIN_CAPACITY = 1024
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Compact vector store for small deployments.
+
+    Normalized embeddings live in a raw memory-mapped file (float16 or int8),
+    so only the pages touched by a search are read from disk. Ids, documents,
+    metadata and row assignments live in SQLite next to it. Search is a
+    brute-force dot product over the matrix in blocks ("flat"), or over the
+    nearest inverted lists only once enough vectors exist to train k-means
+    centroids ("ivf").
+    """
+
+    def __init__(self, persist_path: str, name: str, embedding_fn, dtype: str = "float16",
+                 index: str = "flat", ivf_lists: int = 64, ivf_probes: int = 8):
+        if dtype not in ("float16", "int8"):
+            raise ValueError("dtype must be 'float16' or 'int8'.")
+        if index not in ("flat", "ivf"):
+            raise ValueError("index must be 'flat' or 'ivf'.")
+
+        self.embedding_fn = embedding_fn
+        self.index = index
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+
+        self.dir = os.path.join(persist_path, name)
+        os.makedirs(self.dir, exist_ok=True)
+        self.vectors_path = os.path.join(self.dir, "vectors.bin")
+        self.centroids_path = os.path.join(self.dir, "centroids.npy")
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(self.dir, "items.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "id TEXT PRIMARY KEY, row INTEGER UNIQUE, document TEXT, metadata TEXT, list_id INTEGER)"
+        )
+        self._db.commit()
+
+        # Values already on disk win over the constructor arguments.
+        self.dtype = self._meta("dtype", dtype)
+        self.dim = int(self._meta("dim", 0))
+        self.capacity = int(self._meta("capacity", 0))
+        self._scale = 1.0 / 127 if self.dtype == "int8" else 1.0
+
+        self._matrix = None
+        self._open_matrix()
+
+        self._row_list = np.full(self.capacity, EMPTY, dtype=np.int32)
+        for row, list_id in self._db.execute("SELECT row, list_id FROM items"):
+            self._row_list[row] = list_id
+
+        self._centroids = np.load(self.centroids_path) if os.path.exists(self.centroids_path) else None
+
+    # --- storage helpers -------------------------------------------------
+
+    def _meta(self, key, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            return row[0]
+        if default is not None:
+            self._set_meta(key, default)
+        return default
+
+    def _set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+        self._db.commit()
+
+    def _open_matrix(self):
+        if self.capacity and self.dim:
+            self._matrix = np.memmap(self.vectors_path, dtype=self.dtype, mode="r+", shape=(self.capacity, self.dim))
+
+    def _grow(self, needed: int):
+        new_capacity = max(self.capacity, MIN_CAPACITY)
+        while new_capacity < needed:
+            new_capacity *= 2
+        if new_capacity == self.capacity:
+            return
+
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(new_capacity * self.dim * np.dtype(self.dtype).itemsize)
+
+        self._row_list = np.concatenate([
+            self._row_list,
+            np.full(new_capacity - self.capacity, EMPTY, dtype=np.int32)
+        ])
+        self.capacity = new_capacity
+        self._set_meta("capacity", new_capacity)
+        self._open_matrix()
+
+    def _encode(self, vectors):
+        if self.dtype == "int8":
+            return np.clip(np.round(vectors * 127), -127, 127).astype(np.int8)
+        return vectors.astype(np.float16)
+
+    def _embed_normalized(self, texts):
+        return self._normalize(self.embedding_fn(list(texts)))
+
+    def _normalize(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _rows_where(self, where):
+        """Rows matching a flat equality filter such as {"type": "code"}."""
+        clauses = []
+        params = []
+        for key, value in where.items():
+            if isinstance(value, dict):
+                if list(value.keys()) != ["$eq"]:
+                    raise ValueError(f"Unsupported filter operator for '{key}': only equality is supported.")
+                value = value["$eq"]
+            clauses.append("json_extract(metadata, ?) = ?")
+            params.extend([f"$.{key}", value])
+        sql = "SELECT row FROM items WHERE " + " AND ".join(clauses)
+        return np.array(sorted(r[0] for r in self._db.execute(sql, params)), dtype=np.int64)
+
+    # --- VectorStore API -------------------------------------------------
+
+    def upsert(self, ids, documents, metadatas):
+        if not ids:
+            return
+        vectors = self._embed_normalized(documents)
+
+        with self._lock:
+            if not self.dim:
+                self.dim = vectors.shape[1]
+                self._set_meta("dim", self.dim)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match store dimension {self.dim}.")
+
+            placeholders = ",".join("?" * len(ids))
+            existing = dict(self._db.execute(f"SELECT id, row FROM items WHERE id IN ({placeholders})", ids))
+
+            new_count = len(set(ids) - set(existing))
+            free = np.flatnonzero(self._row_list == EMPTY)
+            if len(free) < new_count:
+                self._grow(self.capacity - len(free) + new_count)
+                free = np.flatnonzero(self._row_list == EMPTY)
+
+            rows = []
+            next_free = 0
+            for item_id in ids:
+                if item_id not in existing:
+                    existing[item_id] = int(free[next_free])
+                    next_free += 1
+                rows.append(existing[item_id])
+            rows = np.array(rows, dtype=np.int64)
+
+            self._matrix[rows] = self._encode(vectors)
+            self._matrix.flush()
+
+            if self._centroids is not None:
+                list_ids = np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+            else:
+                list_ids = np.full(len(rows), UNASSIGNED, dtype=np.int32)
+
+            self._db.executemany(
+                "INSERT OR REPLACE INTO items (id, row, document, metadata, list_id) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (item_id, int(row), doc, json.dumps(meta or {}), int(list_id))
+                    for item_id, row, doc, meta, list_id in zip(ids, rows, documents, metadatas, list_ids)
+                ]
+            )
+            self._db.commit()
+            self._row_list[rows] = list_ids
+
+            self._maybe_train()
+
+    def query(self, query_texts=None, n_results=3, where=None, query_embeddings=None):
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if query_embeddings is not None:
+            queries = self._normalize(query_embeddings)
+        elif query_texts:
+            queries = self._embed_normalized(query_texts)
+        else:
+            return result
+
+        with self._lock:
+            if self._matrix is None:
+                candidates = np.empty(0, dtype=np.int64)
+            elif where:
+                candidates = self._rows_where(where)
+            else:
+                candidates = np.flatnonzero(self._row_list != EMPTY)
+
+            if self.index == "ivf" and self._centroids is not None and len(candidates):
+                probes = np.argsort(-(queries @ self._centroids.T), axis=1)[:, :self.ivf_probes]
+                candidate_lists = self._row_list[candidates]
+                hits = []
+                for i in range(len(queries)):
+                    mask = np.isin(candidate_lists, probes[i]) | (candidate_lists == UNASSIGNED)
+                    hits.append(self._search(candidates[mask], queries[i:i + 1], n_results)[0])
+            else:
+                hits = self._search(candidates, queries, n_results)
+
+            needed = sorted({int(row) for rows, _ in hits for row in rows})
+            items = {}
+            if needed:
+                placeholders = ",".join("?" * len(needed))
+                for item_id, row, doc, meta in self._db.execute(
+                    f"SELECT id, row, document, metadata FROM items WHERE row IN ({placeholders})", needed
+                ):
+                    items[row] = (item_id, doc, json.loads(meta))
+
+        for rows, sims in hits:
+            result["ids"].append([items[int(r)][0] for r in rows])
+            result["documents"].append([items[int(r)][1] for r in rows])
+            result["metadatas"].append([items[int(r)][2] for r in rows])
+            result["distances"].append([float(1.0 - s) for s in sims])
+        return result
+
+    def _search(self, rows, queries, k):
+        """Blockwise top-k by cosine similarity. Returns [(rows, sims)] per query."""
+        best = [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in range(len(queries))]
+        for start in range(0, len(rows), BLOCK_ROWS):
+            block = rows[start:start + BLOCK_ROWS]
+            sims = (np.asarray(self._matrix[block], dtype=np.float32) @ queries.T) * self._scale
+            for i in range(len(queries)):
+                cand_rows = np.concatenate([best[i][0], block])
+                cand_sims = np.concatenate([best[i][1], sims[:, i]])
+                if len(cand_rows) > k:
+                    top = np.argpartition(-cand_sims, k - 1)[:k]
+                    cand_rows, cand_sims = cand_rows[top], cand_sims[top]
+                best[i] = (cand_rows, cand_sims)
+
+        ordered = []
+        for cand_rows, cand_sims in best:
+            order = np.argsort(-cand_sims)
+            ordered.append((cand_rows[order], cand_sims[order]))
+        return ordered
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            if ids:
+                placeholders = ",".join("?" * len(ids))
+                rows = [r[0] for r in self._db.execute(f"SELECT row FROM items WHERE id IN ({placeholders})", ids)]
+            elif where:
+                rows = self._rows_where(where).tolist()
+            else:
+                return
+            if not rows:
+                return
+            placeholders = ",".join("?" * len(rows))
+            self._db.execute(f"DELETE FROM items WHERE row IN ({placeholders})", rows)
+            self._db.commit()
+            self._row_list[np.array(rows, dtype=np.int64)] = EMPTY
+
+    def count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def list_sources(self) -> list:
+        with self._lock:
+            return self._db.execute("SELECT id, json_extract(metadata, '$.source') FROM items").fetchall()
+
+    # --- IVF training ----------------------------------------------------
+
+    def _maybe_train(self):
+        """(Re)trains IVF centroids when the store has doubled since last training."""
+        if self.index != "ivf":
+            return
+        rows = np.flatnonzero(self._row_list != EMPTY)
+        if len(rows) < self.ivf_lists * 8:
+            return
+        trained_size = int(self._meta("trained_size", 0))
+        if self._centroids is not None and len(rows) < 2 * trained_size:
+            return
+
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(rows, size=min(len(rows), self.ivf_lists * 64), replace=False))
+        data = np.asarray(self._matrix[sample], dtype=np.float32) * self._scale
+        centroids = data[rng.choice(len(data), size=self.ivf_lists, replace=False)]
+
+        # Spherical k-means: assign by dot product, re-normalize the means.
+        for _ in range(10):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            for c in range(self.ivf_lists):
+                members = data[assign == c]
+                if len(members):
+                    mean = members.mean(axis=0)
+                    norm = np.linalg.norm(mean)
+                    centroids[c] = mean / norm if norm else centroids[c]
+
+        list_ids = np.empty(len(rows), dtype=np.int32)
+        for start in range(0, len(rows), BLOCK_ROWS):
+            block = rows[start:start + BLOCK_ROWS]
+            vectors = np.asarray(self._matrix[block], dtype=np.float32) * self._scale
+            list_ids[start:start + BLOCK_ROWS] = np.argmax(vectors @ centroids.T, axis=1)
+
+        self._db.executemany(
+            "UPDATE items SET list_id = ? WHERE row = ?",
+            [(int(list_id), int(row)) for row, list_id in zip(rows, list_ids)]
+        )
+        self._db.commit()
+        self._row_list[rows] = list_ids
+        np.save(self.centroids_path, centroids)
+        self._centroids = centroids
+        self._set_meta("trained_size", len(rows))
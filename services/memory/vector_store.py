@@ -0,0 +1,119 @@
+import importlib.util
+
+CHROMA_AVAILABLE = importlib.util.find_spec("chromadb") is not None
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+
+class VectorStore:
+    """
+    Minimal interface MemoryManager needs from a vector backend.
+    query() returns Chroma-shaped results: a dict with "ids", "documents",
+    "metadatas" and "distances", each holding one list per query. Queries are
+    given either as texts or as precomputed query_embeddings. Lower distance
+    means closer.
+    """
+
+    embedding_fn = None
+
+    def upsert(self, ids, documents, metadatas):
+        raise NotImplementedError
+
+    def query(self, query_texts=None, n_results=3, where=None, query_embeddings=None):
+        raise NotImplementedError
+
+    def delete(self, ids=None, where=None):
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def list_sources(self) -> list:
+        """[(id, metadata "source")] for every stored item."""
+        raise NotImplementedError
+
+    def embed(self, texts):
+        return self.embedding_fn(texts)
+
+
+_chroma_clients = {}
+
+
+class ChromaVectorStore(VectorStore):
+    def __init__(self, persist_path: str, name: str, embedding_fn=None):
+        import chromadb
+        from chromadb.utils import embedding_functions
+
+        if persist_path not in _chroma_clients:
+            _chroma_clients[persist_path] = chromadb.PersistentClient(path=persist_path)
+        self.client = _chroma_clients[persist_path]
+        self.embedding_fn = embedding_fn or embedding_functions.DefaultEmbeddingFunction()
+        self.collection = self.client.get_or_create_collection(
+            name=name,
+            embedding_function=self.embedding_fn
+        )
+
+    def upsert(self, ids, documents, metadatas):
+        self.collection.upsert(documents=documents, metadatas=metadatas, ids=ids)
+
+    def query(self, query_texts=None, n_results=3, where=None, query_embeddings=None):
+        return self.collection.query(
+            query_texts=query_texts if query_embeddings is None else None,
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+
+    def delete(self, ids=None, where=None):
+        self.collection.delete(ids=ids, where=where)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def list_sources(self) -> list:
+        result = self.collection.get(include=["metadatas"])
+        return [(item_id, (meta or {}).get("source")) for item_id, meta in zip(result["ids"], result["metadatas"])]
+
+
+def load_embedding_function():
+    """
+    Returns a callable mapping a list of texts to a list of vectors, or None.
+    Prefers Chroma's bundled ONNX MiniLM so both backends produce the same
+    embeddings, and falls back to the same model via sentence-transformers.
+    """
+    if CHROMA_AVAILABLE:
+        from chromadb.utils import embedding_functions
+        return embedding_functions.DefaultEmbeddingFunction()
+
+    if importlib.util.find_spec("sentence_transformers") is not None:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("all-MiniLM-L6-v2")
+        return lambda texts: model.encode(list(texts)).tolist()
+
+    return None
+
+
+def create_vector_store(backend: str, persist_path: str, name: str, embedding_fn=None, **options):
+    """
+    Builds the configured backend ("chroma" or "numpy"). Returns None, after
+    printing a warning, when its dependencies are missing. Pass the same
+    embedding_fn to every store so the model is loaded only once.
+    """
+    if backend == "chroma":
+        if not CHROMA_AVAILABLE:
+            print("Warning: ChromaDB not installed. Memory features disabled.")
+            return None
+        return ChromaVectorStore(persist_path, name, embedding_fn)
+
+    if backend == "numpy":
+        if not NUMPY_AVAILABLE:
+            print("Warning: NumPy not installed. Memory features disabled.")
+            return None
+        embedding_fn = embedding_fn or load_embedding_function()
+        if embedding_fn is None:
+            print("Warning: No embedding model available (install chromadb or sentence-transformers). Memory features disabled.")
+            return None
+        from .numpy_store import NumpyVectorStore
+        return NumpyVectorStore(persist_path, name, embedding_fn, **options)
+
+    raise ValueError(f"Unknown vector backend '{backend}'. Use 'chroma' or 'numpy'.")
@@ -1,28 +1,180 @@
 import os
 import asyncio
+import time
+from collections import Counter
+from datetime import timedelta
 from telegram import Bot
-from telegram.error import TelegramError
+from telegram.error import RetryAfter, TelegramError
+from backend.config import settings
 
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
+MAX_MESSAGE_CHARS = 4096
+MAX_BATCH = 50          # unique alerts in one digest
+BACKOFF_BASE = 1.0      # seconds, doubled per retry
+
+
+class TokenBucket:
+    """Allows `capacity` sends at once, refilled at `rate` per second."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
 
 class Notifier:
-    def __init__(self):
+    """
+    Alerts are queued and sent by a background dispatcher, so raising one
+    never waits on Telegram. The dispatcher collects a burst for
+    NOTIFY_BATCH_DELAY seconds and sends it as one digest; identical alerts
+    are merged, and ones already sent within NOTIFY_DEDUPE_WINDOW are only
+    counted. Sends go through a token bucket and are retried with backoff.
+
+    sender is an async callable taking the message text; by default it posts
+    to TELEGRAM_CHAT_ID (or prints when Telegram isn't configured). Pass a
+    stub to test without Telegram.
+    """
+
+    def __init__(self, sender=None):
         self.token = os.getenv("TELEGRAM_TOKEN")
         self.chat_id = os.getenv("TELEGRAM_CHAT_ID")
         self.bot = None
         if self.token:
             self.bot = Bot(token=self.token)
+        self.sender = sender or self._send_telegram
+        self.bucket = TokenBucket(settings.NOTIFY_RATE_PER_MINUTE / 60, settings.NOTIFY_BURST)
+        self._queue = None
+        self._loop = None
+        self._dispatcher = None
+        self._last_sent = {}            # message -> monotonic time it was last sent
+        self._suppressed = Counter()    # duplicates dropped inside the dedupe window
 
-    async def send_alert(self, message: str):
+    async def _send_telegram(self, text: str):
         if not self.bot or not self.chat_id:
-            print(f"Alert (Not Configured): {message}")
+            print(f"Alert (Not Configured): {text}")
             return
+        await self.bot.send_message(chat_id=self.chat_id, text=text)
+
+    # --- producers ---------------------------------------------------------
+
+    async def send_alert(self, message: str):
+        """Queues message and returns immediately."""
+        self.alert(message)
 
+    def alert(self, message: str):
+        """Queues message; safe to call from sync code and from other threads."""
         try:
-            await self.bot.send_message(chat_id=self.chat_id, text=f"🚨 Skynet Alert:\n{message}")
-        except TelegramError as e:
-            print(f"Failed to send Telegram alert: {e}")
-        except Exception as e:
-            print(f"Unexpected error in notifier: {e}")
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None and (self._loop is None or self._loop is loop or self._loop.is_closed()):
+            self._enqueue(message)
+        elif self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._enqueue, message)
+        else:
+            print(f"Alert (no event loop): {message}")
+
+    def _enqueue(self, message: str):
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            self._dispatcher = None
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        self._queue.put_nowait(message)
+
+    # --- dispatcher --------------------------------------------------------
+
+    async def _dispatch(self):
+        while True:
+            batch = Counter()
+            batch[await self._queue.get()] += 1
+            deadline = time.monotonic() + settings.NOTIFY_BATCH_DELAY
+            while len(batch) < MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch[await asyncio.wait_for(self._queue.get(), remaining)] += 1
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._send_batch(batch)
+            except Exception as e:
+                print(f"Unexpected error in notifier: {e}")
+            finally:
+                for _ in range(sum(batch.values())):
+                    self._queue.task_done()
+
+    async def _send_batch(self, batch: Counter):
+        now = time.monotonic()
+        fresh = {}
+        for message, count in batch.items():
+            if now - self._last_sent.get(message, float("-inf")) < settings.NOTIFY_DEDUPE_WINDOW:
+                self._suppressed[message] += count
+            else:
+                fresh[message] = count + self._suppressed.pop(message, 0)
+        if not fresh:
+            return
+        await self._deliver(self._render(fresh))
+        self._suppressed.clear()   # reported in this message
+        for message in fresh:
+            self._last_sent[message] = now
+        self._last_sent = {m: t for m, t in self._last_sent.items() if now - t < settings.NOTIFY_DEDUPE_WINDOW}
+
+    def _render(self, alerts: dict) -> str:
+        def line(message, count):
+            return f"{message} (x{count})" if count > 1 else message
+
+        if len(alerts) == 1:
+            text = "🚨 Skynet Alert:\n" + line(*next(iter(alerts.items())))
+        else:
+            text = f"🚨 Skynet Alerts ({len(alerts)}):\n" + "\n".join(f"• {line(m, c)}" for m, c in alerts.items())
+        suppressed = sum(self._suppressed.values())
+        if suppressed:
+            text += f"\n(+{suppressed} repeats of recent alerts suppressed)"
+        if len(text) > MAX_MESSAGE_CHARS:
+            text = text[:MAX_MESSAGE_CHARS - 1] + "…"
+        return text
+
+    async def _deliver(self, text: str):
+        for attempt in range(settings.NOTIFY_MAX_RETRIES + 1):
+            await self.bucket.acquire()
+            try:
+                await self.sender(text)
+                return
+            except RetryAfter as e:
+                delay = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else e.retry_after
+            except (TelegramError, OSError, asyncio.TimeoutError) as e:
+                delay = BACKOFF_BASE * 2 ** attempt
+                print(f"Failed to send Telegram alert (attempt {attempt + 1}): {e}")
+            if attempt < settings.NOTIFY_MAX_RETRIES:
+                await asyncio.sleep(delay)
+        print(f"Dropping alert after {settings.NOTIFY_MAX_RETRIES + 1} attempts: {text[:200]}")
+
+    async def flush(self, timeout: float = 10):
+        """Waits until everything queued so far has been sent (or dropped)."""
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        await self.flush()
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            self._dispatcher = None
 
 notifier = Notifier()
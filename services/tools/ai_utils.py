@@ -8,7 +8,7 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(os.path.dir
 
 HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
 
-async def consult_ai(model: str, system_prompt: str, user_input: str, json_mode: bool = False) -> str:
+async def consult_ai(model: str, system_prompt: str, user_input: str, json_mode: bool = False, temperature: float = None) -> str:
     """
     Centralized AI access point.
     
@@ -17,6 +17,7 @@ async def consult_ai(model: str, system_prompt: str, user_input: str, json_mode:
         system_prompt (str): The system instruction.
         user_input (str): The user's query or context.
         json_mode (bool): If True, enforces JSON output format.
+        temperature (float): Optional sampling temperature (model default if None).
         
     Returns:
         str: The model's response content.
@@ -29,6 +30,8 @@ async def consult_ai(model: str, system_prompt: str, user_input: str, json_mode:
     ]
     
     options = {}
+    if temperature is not None:
+        options["temperature"] = temperature
     format_param = "json" if json_mode else None
     
     # Retry logic for robustness
@@ -0,0 +1,192 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from backend.config import settings
+
+try:
+    from playwright.async_api import async_playwright
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    PLAYWRIGHT_AVAILABLE = False
+    async_playwright = None
+
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+
+class BrowserUnavailable(Exception):
+    pass
+
+
+class _Slot:
+    """A reusable browser context with one page, plus its resource-blocking flag."""
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.block_resources = True
+
+    async def _route(self, route):
+        if self.block_resources and route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def close(self):
+        try:
+            await self.context.close()
+        except Exception:
+            pass
+
+
+class BrowserManager:
+    """
+    Process-wide headless Chromium shared by all browser tools.
+
+    The browser is launched lazily on first use and kept warm. Pages are
+    handed out from a pool of reusable contexts, bounded by max_pages.
+    The browser is closed after idle_timeout seconds without use and
+    relaunched transparently if it crashes or disconnects.
+    """
+
+    def __init__(self, max_pages: int = 4, idle_timeout: float = 300, block_resources: bool = True):
+        self.max_pages = max_pages
+        self.idle_timeout = idle_timeout
+        self.block_resources = block_resources
+        self._playwright = None
+        self._browser = None
+        self._idle_slots = []
+        self._active = 0
+        self._last_used = time.monotonic()
+        self._lock = None
+        self._semaphore = None
+        self._watchdog = None
+
+    def _ensure_primitives(self):
+        # Created lazily so they bind to the running event loop.
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(self.max_pages)
+
+    async def _ensure_browser(self):
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+        if not PLAYWRIGHT_AVAILABLE:
+            raise BrowserUnavailable("Playwright not installed. Please run 'pip install playwright' and 'playwright install chromium' via execute_shell.")
+
+        async with self._lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            await self._shutdown()
+            try:
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch()
+            except Exception as e:
+                await self._shutdown()
+                raise BrowserUnavailable(f"Browser launch failed. Run 'playwright install chromium' via execute_shell. Error: {e}")
+            self._browser.on("disconnected", lambda _: self._on_disconnected())
+            if self._watchdog is None or self._watchdog.done():
+                self._watchdog = asyncio.create_task(self._idle_watchdog())
+            print("🌐 Browser pool: Chromium launched.")
+            return self._browser
+
+    def _on_disconnected(self):
+        if self._browser is None:
+            return  # closed on purpose by _shutdown
+        print("🌐 Browser pool: Chromium disconnected; it will be relaunched on next use.")
+        self._browser = None
+        self._idle_slots = []
+
+    async def _new_slot(self):
+        browser = await self._ensure_browser()
+        context = await browser.new_context()
+        page = await context.new_page()
+        slot = _Slot(context, page)
+        await context.route("**/*", slot._route)
+        return slot
+
+    async def _acquire_slot(self):
+        while self._idle_slots:
+            slot = self._idle_slots.pop()
+            if not slot.page.is_closed() and self._browser is not None and self._browser.is_connected():
+                return slot
+            await slot.close()
+        return await self._new_slot()
+
+    @asynccontextmanager
+    async def page(self, block_resources: bool = None):
+        """
+        Yields a ready page. Images, fonts and media are blocked unless
+        block_resources is False (e.g. for screenshots).
+        """
+        self._ensure_primitives()
+        async with self._semaphore:
+            # Counted as active before acquiring so the idle watchdog can't
+            # close the browser underneath us.
+            self._active += 1
+            try:
+                slot = await self._acquire_slot()
+            except Exception:
+                self._active -= 1
+                raise
+            slot.block_resources = self.block_resources if block_resources is None else block_resources
+            healthy = False
+            try:
+                yield slot.page
+                healthy = True
+            finally:
+                self._active -= 1
+                self._last_used = time.monotonic()
+                if healthy and not slot.page.is_closed() and self._browser is not None:
+                    try:
+                        await slot.page.goto("about:blank")
+                        self._idle_slots.append(slot)
+                    except Exception:
+                        await slot.close()
+                else:
+                    await slot.close()
+
+    async def _idle_watchdog(self):
+        interval = max(5.0, self.idle_timeout / 4)
+        while True:
+            await asyncio.sleep(interval)
+            if self._browser is None:
+                return
+            if self._active == 0 and time.monotonic() - self._last_used > self.idle_timeout:
+                async with self._lock:
+                    if self._active == 0:
+                        print("🌐 Browser pool: closing idle Chromium.")
+                        await self._shutdown()
+                        return
+
+    async def _shutdown(self):
+        slots, self._idle_slots = self._idle_slots, []
+        for slot in slots:
+            await slot.close()
+        if self._browser is not None:
+            browser, self._browser = self._browser, None
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    async def close(self):
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+        if self._lock is None:
+            return
+        async with self._lock:
+            await self._shutdown()
+
+
+browser_manager = BrowserManager(
+    max_pages=settings.BROWSER_MAX_PAGES,
+    idle_timeout=settings.BROWSER_IDLE_TIMEOUT,
+    block_resources=settings.BROWSER_BLOCK_RESOURCES
+)
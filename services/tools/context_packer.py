@@ -0,0 +1,228 @@
+import ast
+import math
+import os
+import re
+from dataclasses import dataclass, field
+
+from backend.config import settings
+from backend.logger import logger
+
+CHARS_PER_TOKEN = 4             # rough estimate, good enough for budgeting
+MAX_EMBEDDED_SYMBOLS = 200
+NAME_WEIGHT = 3.0
+BODY_WEIGHT = 1.0
+EMBEDDING_WEIGHT = 4.0
+STOPWORDS = {"the", "a", "an", "to", "of", "and", "or", "in", "on", "for", "with", "is", "it", "be", "that", "this", "self", "def", "return"}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _words(text: str) -> set:
+    """Identifier-aware words: snake_case and CamelCase are split, stopwords dropped."""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    return {w for w in re.findall(r"[a-z0-9]+", text.lower()) if len(w) > 1 and w not in STOPWORDS}
+
+
+@dataclass
+class Symbol:
+    path: str
+    name: str           # qualified, e.g. "Class.method"
+    start: int          # 0-based line range in the file, decorators included
+    end: int
+    full: str
+    signature: str      # def/class line(s) plus docstring summary
+    score: float = 0.0
+    mode: str = "dropped"   # "full", "signature" or "dropped"
+
+
+@dataclass
+class PackReport:
+    budget: int
+    used: int = 0
+    full: list = field(default_factory=list)
+    signatures: list = field(default_factory=list)
+    dropped: list = field(default_factory=list)
+    files: list = field(default_factory=list)
+
+    def summary(self) -> str:
+        lines = [f"Context packed: ~{self.used}/{self.budget} tokens."]
+        if self.full:
+            lines.append(f"  Full: {', '.join(self.full)}")
+        if self.signatures:
+            lines.append(f"  Signatures only: {', '.join(self.signatures)}")
+        if self.dropped:
+            lines.append(f"  Dropped: {', '.join(self.dropped)}")
+        return "\n".join(lines)
+
+
+def _signature(lines: list, node) -> str:
+    body_start = node.body[0].lineno - 1 if node.body else node.lineno
+    header = "\n".join(lines[node.lineno - 1:body_start]).rstrip()
+    if not header.rstrip().endswith(":"):
+        header = lines[node.lineno - 1]
+    indent = " " * (node.col_offset + 4)
+    doc = ast.get_docstring(node)
+    if doc:
+        return f'{header}\n{indent}"""{doc.strip().splitlines()[0]}"""\n{indent}...'
+    return f"{header}\n{indent}..."
+
+
+def _symbols_for_file(path: str, source: str):
+    """Splits a module into its header (imports, constants) and symbols: functions, classes and methods."""
+    lines = source.splitlines()
+    tree = ast.parse(source)
+    symbols = []
+    covered = set()
+
+    def add(node, qualname):
+        start = min([d.lineno for d in getattr(node, "decorator_list", [])] + [node.lineno]) - 1
+        end = node.end_lineno
+        symbols.append(Symbol(path, qualname, start, end, "\n".join(lines[start:end]), _signature(lines, node)))
+        covered.update(range(start, end))
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            add(node, node.name)
+        elif isinstance(node, ast.ClassDef):
+            methods = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            start = min([d.lineno for d in node.decorator_list] + [node.lineno]) - 1
+            first_method = min((min([d.lineno for d in m.decorator_list] + [m.lineno]) - 1 for m in methods), default=node.end_lineno)
+            # The class itself: header, docstring and attributes up to the first method.
+            class_sym = Symbol(path, node.name, start, first_method, "\n".join(lines[start:first_method]).rstrip(), _signature(lines, node))
+            symbols.append(class_sym)
+            covered.update(range(start, node.end_lineno))
+            for method in methods:
+                add(method, f"{node.name}.{method.name}")
+
+    header = "\n".join(line for i, line in enumerate(lines) if i not in covered and line.strip())
+    return header, symbols
+
+
+def _score_symbols(requirements: str, symbols: list):
+    req_words = _words(requirements)
+    for sym in symbols:
+        name_words = _words(sym.name)
+        body_words = _words(sym.full)
+        name_score = len(req_words & name_words) / (len(name_words) or 1)
+        body_score = len(req_words & body_words) / (len(req_words) or 1)
+        sym.score = NAME_WEIGHT * name_score + BODY_WEIGHT * body_score
+
+    embed = _embedding_fn()
+    if embed is None or not symbols:
+        return
+    ranked = sorted(symbols, key=lambda s: s.score, reverse=True)[:MAX_EMBEDDED_SYMBOLS]
+    try:
+        vectors = embed([requirements] + [f"{s.name}\n{s.signature}\n{s.full[:500]}" for s in ranked])
+    except Exception as e:
+        logger.warning(f"Context packer: embedding failed, using name overlap only: {e}")
+        return
+    query = list(vectors[0])
+    for sym, vector in zip(ranked, vectors[1:]):
+        sym.score += EMBEDDING_WEIGHT * max(_cosine(query, list(vector)), 0.0)
+
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _embedding_fn():
+    """The memory's embedding function, if memory has finished warming up (never blocks)."""
+    try:
+        from ..memory.memory_manager import memory
+        if memory.ready and memory.enabled:
+            return memory.embedding_fn
+    except Exception:
+        pass
+    return None
+
+
+def pack_context(requirements: str, paths: list, base_dir: str, budget: int = None):
+    """
+    Builds prompt context for requirements from the given files within a
+    token budget. Python files are split into symbols ranked by relevance
+    (name overlap plus embedding similarity from memory); the top ones are
+    included in full, the rest as signatures with docstring summaries, and
+    whatever still doesn't fit is dropped. Returns (context_text, PackReport).
+    """
+    budget = budget or settings.CONTEXT_TOKEN_BUDGET
+    report = PackReport(budget=budget)
+    headers = {}
+    symbols = []
+    plain = {}
+
+    for path in paths:
+        full_path = path if os.path.isabs(path) else os.path.join(base_dir, path)
+        try:
+            with open(full_path, 'r', encoding='utf-8') as f:
+                source = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            plain[path] = f"Error reading {path}: {e}"
+            continue
+        report.files.append(path)
+        if path.endswith(".py"):
+            try:
+                headers[path], file_symbols = _symbols_for_file(path, source)
+                symbols.extend(file_symbols)
+                continue
+            except SyntaxError:
+                pass
+        plain[path] = source
+
+    # Imports and module-level constants are useful but must not eat the budget.
+    header_chars = budget // 4 // max(len(headers), 1) * CHARS_PER_TOKEN
+    for path, header in headers.items():
+        if len(header) > header_chars:
+            headers[path] = header[:header_chars] + "\n# ... module header truncated"
+
+    _score_symbols(requirements, symbols)
+    used = sum(estimate_tokens(h) for h in headers.values())
+
+    # Signatures of the most relevant symbols first (up to half the budget), then
+    # upgrade the best to full bodies, then spend what's left on more signatures.
+    ranked = sorted(symbols, key=lambda s: s.score, reverse=True)
+    for limit in (max(budget // 2, used), budget):
+        for sym in ranked:
+            cost = estimate_tokens(sym.signature)
+            if sym.mode == "dropped" and used + cost <= limit:
+                sym.mode = "signature"
+                used += cost
+        if limit == budget:
+            break
+        for sym in ranked:
+            if sym.mode != "signature" or sym.score <= 0:
+                continue
+            extra = estimate_tokens(sym.full) - estimate_tokens(sym.signature)
+            if used + extra <= budget:
+                sym.mode = "full"
+                used += extra
+
+    for path, text in plain.items():
+        remaining = max(budget - used, 0) * CHARS_PER_TOKEN
+        if len(text) > remaining:
+            text = text[:remaining] + "\n# ... truncated to fit the context budget"
+            report.dropped.append(f"{path} (truncated)")
+        plain[path] = text
+        used += estimate_tokens(text)
+
+    sections = []
+    for path in report.files + [p for p in plain if p not in report.files]:
+        if path in headers:
+            parts = [headers[path]] if headers[path] else []
+            for sym in sorted((s for s in symbols if s.path == path), key=lambda s: s.start):
+                if sym.mode == "full":
+                    parts.append(sym.full)
+                elif sym.mode == "signature":
+                    parts.append(sym.signature)
+            sections.append(f"\n--- FILE: {path} ---\n" + "\n\n".join(parts) + "\n")
+        else:
+            sections.append(f"\n--- FILE: {path} ---\n{plain[path]}\n")
+
+    for sym in ranked:
+        label = f"{sym.path}:{sym.name}"
+        {"full": report.full, "signature": report.signatures, "dropped": report.dropped}[sym.mode].append(label)
+    report.used = used
+    return "".join(sections), report
@@ -0,0 +1,265 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import urllib.parse
+import urllib.robotparser
+
+from . import web_fetch, html_extract
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STATE_DIR = os.path.join(BASE_DIR, "agente_data", "crawls")
+
+SKIP_EXTENSIONS = (
+    ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp", ".pdf", ".zip", ".gz", ".tar",
+    ".whl", ".exe", ".dmg", ".mp4", ".mp3", ".woff", ".woff2", ".ttf", ".css", ".js", ".json", ".xml",
+)
+TRACKING_PARAMS = {"ref", "fbclid", "gclid"}
+
+
+def canonicalize(url: str) -> str:
+    """Normalizes a URL so trivially different spellings dedupe to one page."""
+    url, _ = urllib.parse.urldefrag(url)
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parts.path or "/"
+    if path.endswith("/index.html"):
+        path = path[:-len("index.html")]
+    query = urllib.parse.urlencode(sorted(
+        (k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if not (k.startswith("utm_") or k in TRACKING_PARAMS)
+    ))
+    return urllib.parse.urlunsplit((scheme, netloc, path, query, ""))
+
+
+class DocsCrawler:
+    """
+    Breadth-first crawler over one documentation site.
+
+    Follows same-origin links allowed by the site's robots.txt up to
+    max_depth and max_pages with a bounded
+    number of concurrent fetches and a per-host politeness delay. Pages are
+    deduplicated by canonical URL and by content hash, and handed to
+    on_batch(pages) in batches of (url, text, content_hash) for indexing.
+    A page whose content hash matches the last indexed one is skipped, unless
+    is_indexed(url) says its indexed copy is gone.
+    The frontier is saved after every batch so an interrupted or capped crawl
+    can be resumed.
+    """
+
+    def __init__(self, root_url: str, on_batch, is_indexed=None, max_depth: int = 2, max_pages: int = 50,
+                 concurrency: int = 4, delay: float = 0.5, batch_size: int = 10,
+                 max_bytes: int = 5_000_000, extract_workers: int = 2, state_dir: str = STATE_DIR):
+        self.root_url = canonicalize(root_url)
+        self.origin = urllib.parse.urlsplit(self.root_url)[:2]
+        self.on_batch = on_batch
+        self.is_indexed = is_indexed
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.delay = delay
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.extract_workers = extract_workers
+
+        os.makedirs(state_dir, exist_ok=True)
+        key = hashlib.sha256(self.root_url.encode("utf-8")).hexdigest()[:16]
+        self.state_path = os.path.join(state_dir, f"{key}.json")
+
+        self.seen = set()
+        self.content_hashes = set()
+        self.frontier = []
+        self.stats = {"fetched": 0, "batched": 0, "unchanged": 0, "duplicates": 0, "errors": 0, "blocked": 0}
+        self.robots = None      # RobotFileParser once loaded; None allows everything
+
+        self._batch = []
+        self._host_locks = {}
+        self._host_last = {}
+
+    # --- state -----------------------------------------------------------
+
+    def load_state(self) -> bool:
+        """Restores an unfinished crawl. Returns True if one was found."""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not state.get("frontier"):
+            return False
+        self.seen = set(state.get("seen", []))
+        self.content_hashes = set(state.get("content_hashes", []))
+        self.frontier = [tuple(item) for item in state["frontier"]]
+        self.stats.update(state.get("stats", {}))
+        return True
+
+    def save_state(self, frontier):
+        state = {
+            "root_url": self.root_url,
+            "seen": sorted(self.seen),
+            "content_hashes": sorted(self.content_hashes),
+            "frontier": frontier,
+            "stats": self.stats,
+            "saved_at": time.time(),
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    # --- crawling --------------------------------------------------------
+
+    async def _load_robots(self):
+        """Fetches the origin's robots.txt; a missing or unreadable one allows everything."""
+        robots_url = urllib.parse.urlunsplit((*self.origin, "/robots.txt", "", ""))
+        try:
+            result = await web_fetch.fetch(robots_url, max_bytes=512 * 1024)
+        except Exception as e:
+            print(f"Crawler: could not fetch {robots_url}: {e}")
+            return
+        if result.status != 200:
+            return
+        self.robots = urllib.robotparser.RobotFileParser(robots_url)
+        self.robots.parse(result.text.splitlines())
+
+    def _allowed(self, url: str) -> bool:
+        return self.robots is None or self.robots.can_fetch(web_fetch.USER_AGENT, url)
+
+    def _in_scope(self, url: str) -> bool:
+        parts = urllib.parse.urlsplit(url)
+        if (parts.scheme, parts.netloc) != self.origin:
+            return False
+        if parts.path.lower().endswith(SKIP_EXTENSIONS):
+            return False
+        if not self._allowed(url):
+            self.stats["blocked"] += 1
+            return False
+        return True
+
+    async def _polite_wait(self, host: str):
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            wait = self._host_last.get(host, 0) + self.delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._host_last[host] = time.monotonic()
+
+    async def _flush(self, queue_snapshot):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        self.stats["batched"] += len(batch)
+        await self.on_batch(batch)
+        await asyncio.to_thread(self.save_state, queue_snapshot())
+
+    async def run(self, resume: bool = True) -> dict:
+        await self._load_robots()
+        if not (resume and self.load_state()):
+            self.seen = {self.root_url}
+            self.frontier = [(self.root_url, 0)] if self._in_scope(self.root_url) else []
+
+        queue = asyncio.Queue()
+        for item in self.frontier:
+            queue.put_nowait(item)
+        pending = set()
+        capped = asyncio.Event()
+        started = time.monotonic()
+        fetched_at_start = self.stats["fetched"]
+        visits = 0
+        active = 0
+
+        def snapshot():
+            return [list(item) for item in list(queue._queue) + sorted(pending)]
+
+        async def worker():
+            nonlocal visits, active
+            while True:
+                item = await queue.get()
+                pending.add(item)
+                if visits >= self.max_pages:
+                    # Leave the item pending so it is saved with the frontier.
+                    capped.set()
+                    return
+                visits += 1
+                active += 1
+                try:
+                    await self._visit(item[0], item[1], queue)
+                except Exception as e:
+                    print(f"Crawler: error processing {item[0]}: {e}")
+                    self.stats["errors"] += 1
+                finally:
+                    active -= 1
+                pending.discard(item)
+                queue.task_done()
+                if len(self._batch) >= self.batch_size:
+                    await self._flush(snapshot)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        join_task = asyncio.create_task(queue.join())
+        capped_task = asyncio.create_task(capped.wait())
+        try:
+            await asyncio.wait({join_task, capped_task}, return_when=asyncio.FIRST_COMPLETED)
+            # Let visits already in flight finish before the final flush.
+            while active:
+                await asyncio.sleep(0.05)
+            await self._flush(snapshot)
+        finally:
+            for task in workers + [join_task, capped_task]:
+                task.cancel()
+            await asyncio.gather(*workers, join_task, capped_task, return_exceptions=True)
+            # Leftover queue and pending items are the frontier for a resumed run.
+            await asyncio.to_thread(self.save_state, snapshot())
+
+        elapsed = time.monotonic() - started
+        fetched = self.stats["fetched"] - fetched_at_start
+        remaining = queue.qsize() + len(pending)
+        return {
+            **self.stats,
+            "fetched_this_run": fetched,
+            "elapsed": round(elapsed, 2),
+            "pages_per_sec": round(fetched / elapsed, 2) if elapsed > 0 else 0.0,
+            "remaining": remaining,
+            "complete": remaining == 0,
+        }
+
+    async def _visit(self, url: str, depth: int, queue: asyncio.Queue):
+        host = urllib.parse.urlsplit(url).netloc
+        await self._polite_wait(host)
+        try:
+            result = await web_fetch.fetch(url, max_bytes=self.max_bytes)
+        except Exception as e:
+            print(f"Crawler: failed to fetch {url}: {e}")
+            self.stats["errors"] += 1
+            return
+        self.stats["fetched"] += 1
+        if result.status != 200:
+            self.stats["errors"] += 1
+            return
+        if "html" not in (result.content_type or "text/html"):
+            return
+
+        base_url = result.final_url or url
+        text, links = await html_extract.extract_text_and_links(result.text, base_url, self.extract_workers)
+
+        if depth < self.max_depth:
+            for link in links:
+                link = canonicalize(link)
+                if link not in self.seen and self._in_scope(link):
+                    self.seen.add(link)
+                    queue.put_nowait((link, depth + 1))
+
+        if result.content_hash in self.content_hashes:
+            self.stats["duplicates"] += 1
+            return
+        self.content_hashes.add(result.content_hash)
+
+        cache = web_fetch.get_cache()
+        if cache.get_meta(url).get("indexed_hash") == result.content_hash and (self.is_indexed is None or self.is_indexed(url)):
+            self.stats["unchanged"] += 1
+            return
+        if text:
+            self._batch.append((url, text, result.content_hash))
@@ -1,51 +1,33 @@
-import asyncio
 import os
+from ..browser_pool import browser_manager, BrowserUnavailable
+from .. import web_reader
+from backend.logger import logger
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 async def browser_use(action: str, url: str = None, selector: str = None) -> str:
-    try:
-        from playwright.async_api import async_playwright
-    except ImportError:
-        return "Playwright not installed. Please run 'pip install playwright' and 'playwright install' via execute_shell."
+    if action not in ("navigate", "screenshot"):
+        return "Invalid action."
+    if not url:
+        if action == "navigate":
+            return "Error: URL required for navigate action."
+        return "Error: URL required for screenshot (navigates first)."
 
-    async with async_playwright() as p:
-        try:
-            browser = await p.chromium.launch()
-        except Exception:
-            # Attempt auto-install
-            print("Browser launch failed. Attempting auto-install of chromium...")
-            try:
-                process = await asyncio.create_subprocess_shell(
-                    "playwright install chromium",
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                await process.communicate()
-                # Try launching again
-                browser = await p.chromium.launch()
-            except Exception as e:
-                return f"Browser launch failed. Did you run 'playwright install'? Error: {e}"
-            
-        page = await browser.new_page()
-        
+    try:
         if action == "navigate":
-            if not url:
-                return "Error: URL required for navigate action."
             try:
-                await page.goto(url, timeout=30000)
-                text = await page.evaluate("document.body.innerText")
-                title = await page.title()
-                await browser.close()
-                return f"Title: {title}\n\nContent Snippet:\n{text[:2000]}..."
+                # Static pages are fetched directly; Chromium is only used when JS is needed.
+                result = await web_reader.read_page(url)
+                logger.info(f"browser_use: read {url} via {result.tier} in {result.elapsed:.2f}s {result.reason}".rstrip())
+                return f"Title: {result.title}\n\nContent Snippet:\n{result.text[:2000]}..."
+            except BrowserUnavailable:
+                raise
             except Exception as e:
-                await browser.close()
                 return f"Navigation error: {str(e)}"
-                
-        elif action == "screenshot":
-            if not url:
-                return "Error: URL required for screenshot (navigates first)."
-            try:
+
+        try:
+            # Screenshots need images and fonts, so resource blocking is off.
+            async with browser_manager.page(block_resources=False) as page:
                 await page.goto(url)
                 filename = f"screenshot_{os.urandom(4).hex()}.png"
                 
@@ -54,11 +36,10 @@ async def browser_use(action: str, url: str = None, selector: str = None) -> str
                 
                 path = os.path.join(public_dir, filename)
                 await page.screenshot(path=path)
-                await browser.close()
-                return f"Screenshot saved to {path}. Access at http://localhost:4321/{filename}"
-            except Exception as e:
-                await browser.close()
-                return f"Screenshot error: {str(e)}"
-        
-        await browser.close()
-        return "Invalid action."
+            return f"Screenshot saved to {path}. Access at http://localhost:4321/{filename}"
+        except BrowserUnavailable:
+            raise
+        except Exception as e:
+            return f"Screenshot error: {str(e)}"
+    except BrowserUnavailable as e:
+        return str(e)
@@ -1,9 +1,88 @@
 import os
+import ast
+import asyncio
+import difflib
+import hashlib
+from collections import OrderedDict
 from ..ai_utils import consult_ai
-from .dev_tools import inspect_code
+from .dev_tools import BASE_DIR
 
 MODEL_REASONING = os.getenv("MODEL_REASONING", "qwen2.5-coder:1.5b")
 
+REVIEW_CONTEXT_LINES = 3        # unchanged lines kept around each hunk
+REVIEW_CHUNK_CHARS = 6000       # diff text sent to the model per request
+REVIEW_MAX_CONCURRENCY = 4
+REVIEW_CACHE_SIZE = 256
+
+SYSTEM_PROMPT = """You are a Senior Code Reviewer and Security Auditor.
+Review the proposed change, given as a unified diff of part of a file
+(lines starting with '-' are removed, '+' are added, ' ' are unchanged context).
+
+CRITERIA:
+1. SECURITY: No hardcoded credentials, no injection vulnerabilities, no unsafe shell execution without validation.
+2. LOGIC: The changed code must be syntactically correct and logically sound.
+3. LAWS: Must not violate the core system laws (Do no harm, etc.).
+
+Judge only the changed lines; code outside the diff is assumed correct.
+If the change is safe and good, return exactly: APPROVED
+If there are issues, return exactly: REJECTED: <brief explanation of the issue>
+"""
+
+_verdict_cache = OrderedDict()
+
+
+def _read_original(file_path: str) -> str:
+    path = file_path if os.path.isabs(file_path) else os.path.join(BASE_DIR, file_path)
+    if not os.path.exists(path):
+        return ""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _split_hunks(diff_lines: list) -> list:
+    """Groups unified diff lines into hunks, each starting at its '@@' header."""
+    hunks = []
+    for line in diff_lines:
+        if line.startswith("@@") or not hunks:
+            hunks.append([])
+        hunks[-1].append(line)
+    return hunks
+
+
+def _chunk_hunks(hunks: list, max_chars: int) -> list:
+    """Packs whole hunks into chunks of at most max_chars; oversized hunks are split by line."""
+    chunks, current, size = [], [], 0
+    for hunk in hunks:
+        text = "".join(hunk)
+        if len(text) > max_chars:
+            if current:
+                chunks.append("".join(current))
+                current, size = [], 0
+            piece = ""
+            for line in hunk:
+                if piece and len(piece) + len(line) > max_chars:
+                    chunks.append(piece)
+                    piece = ""
+                piece += line
+            if piece:
+                chunks.append(piece)
+            continue
+        if current and size + len(text) > max_chars:
+            chunks.append("".join(current))
+            current, size = [], 0
+        current.append(text)
+        size += len(text)
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+async def _review_chunk(file_path: str, chunk: str, label: str, semaphore: asyncio.Semaphore) -> str:
+    async with semaphore:
+        user_input = f"File: {file_path} ({label})\n\nDiff:\n{chunk}"
+        return await consult_ai(MODEL_REASONING, SYSTEM_PROMPT, user_input)
+
+
 async def review_code_changes(file_path: str, proposed_code: str) -> str:
     """
     Acts as a Senior Code Reviewer.
@@ -11,29 +90,59 @@ async def review_code_changes(file_path: str, proposed_code: str) -> str:
     Returns "APPROVED" or "REJECTED: <reason>".
     """
     try:
-        # Get original code for comparison
-        original_code = inspect_code(file_path)
-        
-        system_prompt = """You are a Senior Code Reviewer and Security Auditor.
-        Review the proposed code changes against the original code.
-        
-        CRITERIA:
-        1. SECURITY: No hardcoded credentials, no injection vulnerabilities, no unsafe shell execution without validation.
-        2. LOGIC: The code must be syntactically correct and logically sound.
-        3. LAWS: Must not violate the core system laws (Do no harm, etc.).
-        
-        If the code is safe and good, return exactly: APPROVED
-        If there are issues, return exactly: REJECTED: <brief explanation of the issue>
-        """
-        
-        user_input = f"File: {file_path}\n\nOriginal Code:\n{original_code}\n\nProposed Code:\n{proposed_code}"
-        
-        verdict = await consult_ai(MODEL_REASONING, system_prompt, user_input)
-        
-        if "APPROVED" in verdict.upper():
+        original_code = await asyncio.to_thread(_read_original, file_path)
+
+        # Syntax is checked locally: hunk-level review can't see the whole file.
+        if file_path.endswith(".py"):
+            try:
+                ast.parse(proposed_code)
+            except SyntaxError as e:
+                return f"REJECTED: SyntaxError at line {e.lineno}: {e.msg}"
+
+        diff_lines = list(difflib.unified_diff(
+            original_code.splitlines(keepends=True),
+            proposed_code.splitlines(keepends=True),
+            fromfile=f"a/{file_path}", tofile=f"b/{file_path}",
+            n=REVIEW_CONTEXT_LINES
+        ))
+        if not diff_lines:
             return "APPROVED"
+        # Headers first, then hunks; a missing trailing newline would glue lines together.
+        diff_lines = [line if line.endswith("\n") else line + "\n" for line in diff_lines[2:]]
+
+        diff_hash = hashlib.sha256(f"{file_path}\n{''.join(diff_lines)}".encode("utf-8")).hexdigest()
+        if diff_hash in _verdict_cache:
+            _verdict_cache.move_to_end(diff_hash)
+            return _verdict_cache[diff_hash]
+
+        chunks = _chunk_hunks(_split_hunks(diff_lines), REVIEW_CHUNK_CHARS)
+        semaphore = asyncio.Semaphore(REVIEW_MAX_CONCURRENCY)
+        verdicts = await asyncio.gather(*[
+            _review_chunk(file_path, chunk, f"part {i + 1}/{len(chunks)}", semaphore)
+            for i, chunk in enumerate(chunks)
+        ])
+
+        problems = []
+        for i, verdict in enumerate(verdicts):
+            if "APPROVED" in verdict.upper():
+                continue
+            reason = verdict.strip()
+            if reason.upper().startswith("REJECTED:"):
+                reason = reason[len("REJECTED:"):].strip()
+            problems.append(f"[part {i + 1}/{len(chunks)}] {reason}" if len(chunks) > 1 else reason)
+
+        if not problems:
+            result = "APPROVED"
+        elif any(v.startswith("Error") for v in verdicts):
+            # Model failures aren't verdicts; don't cache them.
+            return "REJECTED: " + "; ".join(problems)
         else:
-            return verdict
-            
+            result = "REJECTED: " + "; ".join(problems)
+
+        _verdict_cache[diff_hash] = result
+        while len(_verdict_cache) > REVIEW_CACHE_SIZE:
+            _verdict_cache.popitem(last=False)
+        return result
+
     except Exception as e:
         return f"Error during code review: {str(e)}"
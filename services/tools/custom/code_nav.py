@@ -0,0 +1,44 @@
+import asyncio
+from .. import symbol_index
+
+
+async def find_definition(symbol: str) -> str:
+    """
+    Finds where a class, function, method or module-level variable is defined.
+    Accepts a bare name ("fetch") or a qualified one ("HttpCache.get_meta").
+    """
+    try:
+        rows = await asyncio.to_thread(symbol_index.get_index().find_definitions, symbol)
+    except Exception as e:
+        return f"Error searching symbol index: {str(e)}"
+    if not rows:
+        return f"No definition of '{symbol}' found in the workspace."
+    return "\n".join(f"{path}:{line} [{kind}] {signature}" for path, line, kind, qualname, signature in rows)
+
+
+async def find_references(symbol: str, limit: int = 50) -> str:
+    """Lists the file:line locations where a name is used (calls, attribute access, imports)."""
+    try:
+        rows = await asyncio.to_thread(symbol_index.get_index().find_references, symbol, limit)
+    except Exception as e:
+        return f"Error searching symbol index: {str(e)}"
+    if not rows:
+        return f"No references to '{symbol}' found in the workspace."
+    output = [f"{path}:{line}" for path, line in rows]
+    if len(rows) >= limit:
+        output.append(f"(showing the first {limit}; raise 'limit' for more)")
+    return "\n".join(output)
+
+
+async def module_dependents(module: str, transitive: bool = False) -> str:
+    """
+    Lists the files that import a module (dotted name or path), i.e. what a change to it can break.
+    With transitive=True, also the files importing those, and so on.
+    """
+    try:
+        rows = await asyncio.to_thread(symbol_index.get_index().module_dependents, module, transitive)
+    except Exception as e:
+        return f"Error searching symbol index: {str(e)}"
+    if not rows:
+        return f"No modules import '{module}'."
+    return "\n".join(f"{path} (imports {via})" for path, via in rows)
@@ -1,18 +1,131 @@
 import os
+import time
+import asyncio
 from ..ai_utils import consult_ai
-from .dev_tools import run_safe_edit, inspect_code
+from .. import sandbox
+from .. import patching
+from .dev_tools import run_safe_edit, inspect_code, BASE_DIR
 
 MODEL_REASONING = os.getenv("MODEL_REASONING", "qwen2.5-coder:1.5b")
 MODEL_CODING = os.getenv("MODEL_CODING", "qwen2.5-coder:1.5b")
+MAX_CANDIDATES = 4
 
-async def attempt_fix(file_path: str, error_trace: str) -> str:
+CODING_PROMPT = """You are a Senior Software Engineer.
+        Based on the analysis, rewrite the FULL file code to fix the error.
+        - Return ONLY the code block. No markdown.
+        - Ensure all imports are present.
+        """
+PATCH_PROMPT = """You are a Senior Software Engineer.
+        Based on the analysis, fix the error with the smallest possible edits.
+        """ + patching.PATCH_FORMAT_PROMPT
+TEST_GEN_PROMPT = """Generate a standalone python test script (using assert or unittest) to verify the fix for the code above.
+        It should import the module (assume it's in the same directory or python path) and test the failing case.
+        Return ONLY the code block. No markdown.
+        """
+
+def _strip_fences(code: str) -> str:
+    return code.replace("```python", "").replace("```", "").strip()
+
+async def _generate_candidate(number: int, total: int, code_info: str, analysis: str, mode: str = "patch"):
+    """
+    Generates one fix and its test. In patch mode the model only emits edits,
+    applied locally to the original; if they don't apply, the full file is
+    regenerated. Candidates are sampled hotter and nudged apart.
+    """
+    coding_input = f"Original Code:\n{code_info}\n\nAnalysis:\n{analysis}\n\nGenerate fixed code."
+    if total > 1:
+        coding_input += f"\n\nThis is candidate {number} of {total}; if several fixes are plausible, prefer a different one than the obvious first choice."
+    temperature = None if total == 1 else 0.2 + 0.6 * (number - 1) / max(total - 1, 1)
+    fixed_code = None
+    if mode == "patch":
+        original = code_info.split("\nCONTENT:\n", 1)[-1]
+        patch = await consult_ai(MODEL_CODING, PATCH_PROMPT, coding_input, temperature=temperature)
+        try:
+            fixed_code = patching.apply_patch(original, patch)
+        except patching.PatchError as e:
+            print(f"attempt_fix: candidate {number} patch did not apply ({e}); regenerating the full file.")
+    if fixed_code is None:
+        fixed_code = _strip_fences(await consult_ai(MODEL_CODING, CODING_PROMPT, coding_input, temperature=temperature))
+    test_code = _strip_fences(await consult_ai(MODEL_CODING, TEST_GEN_PROMPT, f"Fixed Code:\n{fixed_code}"))
+    return fixed_code, test_code
+
+async def _run_candidate(number: int, total: int, target_file: str, code_info: str, analysis: str, mode: str, timings: dict):
+    """Generates and verifies one candidate in its own sandbox. Returns (number, fixed_code, TestResult)."""
+    started = time.monotonic()
+    timings[number] = {"status": "generating"}
+    fixed_code, test_code = await _generate_candidate(number, total, code_info, analysis, mode)
+    timings[number].update(status="verifying", generate=time.monotonic() - started)
+    result = await sandbox.verify_in_sandbox(target_file, fixed_code, test_code)
+    timings[number].update(status="passed" if result.passed else "failed", verify=result.elapsed)
+    return number, fixed_code, result
+
+async def _attempt_fix_candidates(file_path: str, code_info: str, analysis: str, candidates: int, mode: str) -> str:
+    """
+    Best-of-N: all candidates are generated and verified concurrently in
+    isolated project copies. The first one whose test passes is promoted into
+    the live tree and the rest are cancelled.
+    """
+    target_file = file_path if os.path.isabs(file_path) else os.path.join(BASE_DIR, file_path)
+    original_hash = await asyncio.to_thread(sandbox.file_hash, target_file)
+    timings = {}
+    started = time.monotonic()
+    tasks = [
+        asyncio.create_task(_run_candidate(i, candidates, target_file, code_info, analysis, mode, timings))
+        for i in range(1, candidates + 1)
+    ]
+    winner = None
+    failures = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                number, fixed_code, result = await next_done
+            except Exception as e:
+                failures.append(f"error: {e}")
+                continue
+            if result.passed:
+                winner = (number, fixed_code, result)
+                break
+            failures.append(f"#{number}: {(result.stderr or result.stdout)[-300:]}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    report = []
+    for number in sorted(timings):
+        t = timings[number]
+        status = t["status"] if t["status"] in ("passed", "failed") else f"cancelled while {t['status']}"
+        line = f"  Candidate {number}: {status}"
+        if "generate" in t:
+            line += f", generate {t['generate']:.1f}s"
+        if "verify" in t:
+            line += f", verify {t['verify']:.1f}s"
+        report.append(line)
+    report = "\n".join(report) + f"\n  Total: {time.monotonic() - started:.1f}s"
+
+    if winner is None:
+        return f"FAILED: None of {candidates} candidates passed verification. Live code unchanged.\nTimings:\n{report}\nFailures:\n" + "\n".join(failures)
+
+    number, fixed_code, result = winner
+    if not await asyncio.to_thread(sandbox.promote, target_file, fixed_code, original_hash):
+        return f"FAILED: Candidate {number} passed, but {target_file} changed during verification. Not applied.\nTimings:\n{report}"
+    return f"SUCCESS: Candidate {number} of {candidates} passed and was applied.\nTimings:\n{report}\nTest Output:\n{result.stdout}"
+
+async def attempt_fix(file_path: str, error_trace: str, candidates: int = 1, mode: str = "patch") -> str:
     """
     Autonomous Debugger.
     1. Analyzes the error with DeepSeek (Reasoning).
-    2. Generates a fix with Qwen (Coding).
+    2. Generates a fix with Qwen (Coding); candidates > 1 tries several fixes in parallel.
+       mode "patch" (default) asks only for the edits; "full" rewrites the whole file.
     3. Applies and verifies the fix safely.
     """
     try:
+        # Fixes are verified in a copy of the project, so only project files qualify.
+        try:
+            sandbox.project_path(file_path if os.path.isabs(file_path) else os.path.join(BASE_DIR, file_path))
+        except ValueError as e:
+            return f"Error: {e}"
+
         # 1. Read Code
         code_info = inspect_code(file_path)
         if "Error" in code_info and not code_info.startswith("FILE:"):
@@ -27,26 +140,16 @@ async def attempt_fix(file_path: str, error_trace: str) -> str:
         analysis_input = f"Code:\n{code_info}\n\nError Trace:\n{error_trace}"
         analysis = await consult_ai(MODEL_REASONING, analysis_prompt, analysis_input)
 
-        # 3. Generate Fix with Coding Model
-        coding_prompt = """You are a Senior Software Engineer.
-        Based on the analysis, rewrite the FULL file code to fix the error.
-        - Return ONLY the code block. No markdown.
-        - Ensure all imports are present.
-        """
-        coding_input = f"Original Code:\n{code_info}\n\nAnalysis:\n{analysis}\n\nGenerate fixed code."
-        fixed_code = await consult_ai(MODEL_CODING, coding_prompt, coding_input)
-        fixed_code = fixed_code.replace("```python", "").replace("```", "").strip()
+        candidates = max(1, min(int(candidates), MAX_CANDIDATES))
+        if candidates > 1:
+            result = await _attempt_fix_candidates(file_path, code_info, analysis, candidates, mode)
+            return f"Debug Attempt Result:\nAnalysis: {analysis[:200]}...\n{result}"
 
-        # 4. Generate Verification Test
-        test_gen_prompt = """Generate a standalone python test script (using assert or unittest) to verify the fix for the code above.
-        It should import the module (assume it's in the same directory or python path) and test the failing case.
-        Return ONLY the code block. No markdown.
-        """
-        test_code = await consult_ai(MODEL_CODING, test_gen_prompt, f"Fixed Code:\n{fixed_code}")
-        test_code = test_code.replace("```python", "").replace("```", "").strip()
+        # 3-4. Generate Fix and Verification Test with Coding Model
+        fixed_code, test_code = await _generate_candidate(1, 1, code_info, analysis, mode)
 
         # 5. Apply Fix
-        result = run_safe_edit(file_path, fixed_code, test_code)
+        result = await run_safe_edit(file_path, fixed_code, test_code)
         return f"Debug Attempt Result:\nAnalysis: {analysis[:200]}...\n{result}"
         
     except Exception as e:
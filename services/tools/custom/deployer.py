@@ -1,5 +1,5 @@
-import asyncio
 import os
+from .. import impacted_tests, sandbox
 try:
     import aiofiles
     AIOFILES_AVAILABLE = True
@@ -11,7 +11,8 @@ async def run_test_and_apply(test_path: str, target_path: str, source_code: str)
     Safely applies code changes by first running a test script.
     1. Writes source_code to a temp file.
     2. Runs the test script at test_path.
-    3. If test passes (exit code 0), overwrites target_path with source_code.
+    3. If test passes (exit code 0), runs the existing tests that import target_path, in parallel.
+    4. If all pass, keeps source_code in target_path; otherwise reverts.
     """
     try:
         # 1. Write to temp file (or just keep in memory if we overwrite target directly after test? 
@@ -52,26 +53,27 @@ async def run_test_and_apply(test_path: str, target_path: str, source_code: str)
             
         # Run test
         # We use a subprocess to ensure clean import state
-        proc = await asyncio.create_subprocess_shell(
-            f"python {test_path}",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await proc.communicate()
+        result = await sandbox.run_python(test_path, cwd=sandbox.BASE_DIR)
+        report = None
+        if result.passed:
+            # Then whatever else the change could break, selected from the import graph.
+            report = await impacted_tests.run_impacted([target_path])
         
-        if proc.returncode == 0:
+        if result.passed and report.passed:
             # Success
             if has_backup:
                 os.remove(backup_path)
-            return f"Success: Tests passed. Code applied to {target_path}.\nOutput: {stdout.decode()}"
+            return f"Success: Tests passed. Code applied to {target_path}.\nOutput: {result.stdout}\n{report.summary()}"
         else:
             # Failure - Revert
             if has_backup:
                 os.replace(backup_path, target_path)
             else:
                 os.remove(target_path) # It was new, so delete it
-                
-            return f"Failure: Tests failed (Exit code {proc.returncode}). Changes reverted.\nStderr: {stderr.decode()}\nStdout: {stdout.decode()}"
+            
+            if not result.passed:
+                return f"Failure: Tests failed (Exit code {result.returncode}). Changes reverted.\nStderr: {result.stderr}\nStdout: {result.stdout}"
+            return f"Failure: Impacted tests failed. Changes reverted.\n{report.summary()}"
 
     except Exception as e:
         # Emergency revert if python error
@@ -1,10 +1,12 @@
 import os
 import ast
-import shutil
-import subprocess
-import sys
 import asyncio
 from ..ai_utils import consult_ai
+from .. import sandbox
+from .. import patching
+from .. import context_packer
+from .. import symbol_index
+from backend.logger import logger
 
 # Determine project root dynamically
 # Current file: services/tools/custom/dev_tools.py
@@ -12,25 +14,46 @@ from ..ai_utils import consult_ai
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 MODEL_CODING = os.getenv("MODEL_CODING", "qwen2.5-coder:1.5b")
 
-async def generate_code(requirements: str, context_files: list[str] = None) -> str:
+async def _generate_patched(requirements: str, target_path: str, context_content: str):
+    """Patch mode: the model emits SEARCH/REPLACE edits for target_path, applied locally. None if they don't apply."""
+    with open(target_path, 'r', encoding='utf-8') as f:
+        original = f.read()
+    system_prompt = "You are a Senior Software Engineer.\n    Edit the given file to satisfy the user's requirements.\n" + patching.PATCH_FORMAT_PROMPT
+    user_input = f"Requirements:\n{requirements}\n\nFile to edit:\n{original}\n\nContext:\n{context_content}"
+    patch = await consult_ai(MODEL_CODING, system_prompt, user_input)
+    try:
+        return patching.apply_patch(original, patch)
+    except patching.PatchError as e:
+        print(f"generate_code: patch did not apply ({e}); falling back to full-file generation.")
+        return None
+
+async def generate_code(requirements: str, context_files: list[str] = None, target_file: str = None) -> str:
     """
     Generates production-ready code using the specialized Coding Model.
     Args:
         requirements: Description of the feature or fix.
         context_files: List of file paths to read for context.
+        target_file: Existing file to modify. The model then emits only the edits (much faster),
+            which are applied locally; falls back to full-file generation if they don't apply.
     Returns:
-        Generated code string.
+        Generated code string (the complete file).
     """
     context_content = ""
     if context_files:
-        for path in context_files:
-            try:
-                full_path = path if os.path.isabs(path) else os.path.join(BASE_DIR, path)
-                if os.path.exists(full_path):
-                    with open(full_path, 'r', encoding='utf-8') as f:
-                        context_content += f"\n--- FILE: {path} ---\n{f.read()}\n"
-            except Exception as e:
-                context_content += f"\nError reading {path}: {e}\n"
+        # Only the symbols most relevant to the requirements go in full; see context_packer.
+        context_content, report = await asyncio.to_thread(
+            context_packer.pack_context, requirements, context_files, BASE_DIR
+        )
+        logger.info(report.summary())
+
+    if target_file:
+        target_path = target_file if os.path.isabs(target_file) else os.path.join(BASE_DIR, target_file)
+        if os.path.exists(target_path):
+            patched = await _generate_patched(requirements, target_path, context_content)
+            if patched is not None:
+                return patched
+            with open(target_path, 'r', encoding='utf-8') as f:
+                context_content += f"\n--- FILE TO REWRITE: {target_file} ---\n{f.read()}\n"
 
     system_prompt = """You are a Senior Software Engineer.
     Write clean, efficient, and error-free Python code based on the user's requirements.
@@ -46,6 +69,45 @@ async def generate_code(requirements: str, context_files: list[str] = None) -> s
     code = code.replace("```python", "").replace("```", "").strip()
     return code
 
+def _outline_structure(rows) -> list:
+    """Formats symbol index rows (kind, qualname, line, signature, parent) like the classic summary."""
+    summary = []
+    methods = {}
+    for kind, qualname, line, signature, parent in rows:
+        if parent and kind.endswith("method"):
+            methods.setdefault(parent, []).append(qualname.rsplit(".", 1)[-1])
+    for kind, qualname, line, signature, parent in rows:
+        if parent:
+            continue
+        if kind == "class":
+            summary.append(f"Class: {qualname} (line {line})")
+            if methods.get(qualname):
+                summary.append(f"  Methods: {', '.join(methods[qualname])}")
+        elif kind == "function":
+            summary.append(f"Function: {signature} (line {line})")
+        elif kind == "async function":
+            summary.append(f"Async Function: {signature} (line {line})")
+    return summary
+
+def _ast_structure(content: str) -> list:
+    summary = []
+    try:
+        tree = ast.parse(content)
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                summary.append(f"Class: {node.name}")
+                methods = [n.name for n in node.body if isinstance(n, ast.FunctionDef)]
+                if methods:
+                    summary.append(f"  Methods: {', '.join(methods)}")
+            elif isinstance(node, ast.FunctionDef):
+                summary.append(f"Function: {node.name}")
+            elif isinstance(node, ast.AsyncFunctionDef):
+                summary.append(f"Async Function: {node.name}")
+                
+    except SyntaxError:
+        summary.append("Error parsing Python syntax for summary.")
+    return summary
+
 def inspect_code(path: str) -> str:
     """
     Reads a file and returns its content along with a structural summary (classes/functions).
@@ -61,37 +123,30 @@ def inspect_code(path: str) -> str:
         with open(path, 'r', encoding='utf-8') as f:
             content = f.read()
             
-        summary = []
-        try:
-            tree = ast.parse(content)
-            for node in tree.body:
-                if isinstance(node, ast.ClassDef):
-                    summary.append(f"Class: {node.name}")
-                    methods = [n.name for n in node.body if isinstance(n, ast.FunctionDef)]
-                    if methods:
-                        summary.append(f"  Methods: {', '.join(methods)}")
-                elif isinstance(node, ast.FunctionDef):
-                    summary.append(f"Function: {node.name}")
-                elif isinstance(node, ast.AsyncFunctionDef):
-                    summary.append(f"Async Function: {node.name}")
-                    
-        except SyntaxError:
-            summary.append("Error parsing Python syntax for summary.")
+        rel_path = os.path.relpath(path, BASE_DIR)
+        if path.endswith(".py") and not rel_path.startswith(".."):
+            # Served from the persistent symbol index (re-parsed only if the file changed).
+            summary = _outline_structure(symbol_index.get_index().outline(rel_path))
+            if not summary and content.strip():
+                summary = _ast_structure(content)
+        else:
+            summary = _ast_structure(content)
             
         structure = "\n".join(summary)
         return f"FILE: {path}\nSTRUCTURE:\n{structure}\n\nCONTENT:\n{content}"
     except Exception as e:
         return f"Error inspecting code: {str(e)}"
 
-def run_safe_edit(target_file: str, new_content: str, test_content: str) -> str:
+async def run_safe_edit(target_file: str, new_content: str = None, test_content: str = None, patch: str = None) -> str:
     """
-    Safely updates a file by:
-    1. Backing up the original.
-    2. Applying changes (Optimistic Application).
-    3. Running a verification test.
-    4. Rolling back if the test fails.
+    Safely updates a file by verifying it in a sandbox before touching the live tree.
+    Give either new_content (full file) or patch (SEARCH/REPLACE blocks or a unified diff).
+    1. Copies the project into a throwaway overlay directory.
+    2. Applies the changes and writes the verification test there.
+    3. Runs the test as an async subprocess with a timeout, then the existing tests that import the file.
+    4. On success, atomically replaces the live file, unless it changed meanwhile.
     
-    This ensures tests can import the module normally without complex dynamic loading.
+    The live file is never in a half-edited state, so several edits can be verified in parallel.
     """
     # Resolve path
     if not os.path.isabs(target_file):
@@ -99,50 +154,35 @@ def run_safe_edit(target_file: str, new_content: str, test_content: str) -> str:
         
     if not os.path.exists(target_file):
         return f"Error: Target file {target_file} does not exist. Use file_manager to create new files."
+    try:
+        sandbox.project_path(target_file)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    if not test_content:
+        return "Error: 'test_content' is required to verify the edit."
+    if new_content is None and not patch:
+        return "Error: Provide 'new_content' (full file) or 'patch'."
 
-    backup_path = target_file + ".bak"
-    test_path = os.path.join(os.path.dirname(target_file), "test_verification_temp.py")
-    
     try:
-        # 1. Backup
-        shutil.copy2(target_file, backup_path)
+        original_hash = await asyncio.to_thread(sandbox.file_hash, target_file)
+        if patch:
+            with open(target_file, 'r', encoding='utf-8') as f:
+                original = f.read()
+            try:
+                new_content = patching.apply_patch(original, patch)
+            except patching.PatchError as e:
+                return f"FAILED: Patch could not be applied: {e}\nLive code unchanged. Re-read the file or send the full new_content."
+                
+        result = await sandbox.verify_in_sandbox(target_file, new_content, test_content)
         
-        # 2. Apply New Content
-        with open(target_file, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+        if not result.passed:
+            return f"FAILED: Tests didn't pass. Live code unchanged.\nError Output:\n{result.stderr}\nStandard Output:\n{result.stdout}"
             
-        # 3. Write Test
-        with open(test_path, 'w', encoding='utf-8') as f:
-            f.write(test_content)
+        if not await asyncio.to_thread(sandbox.promote, target_file, new_content, original_hash):
+            return f"FAILED: {target_file} was modified while the edit was being verified. Live code unchanged; re-read the file and retry."
             
-        # 4. Run Test
-        # We run it as a subprocess to isolate it
-        # We use the current python executable
-        result = subprocess.run(
-            [sys.executable, test_path],
-            capture_output=True,
-            text=True,
-            cwd=BASE_DIR # Run from root to ensure imports like 'services.tools' work
-        )
-        
-        # 5. Decision
-        if result.returncode == 0:
-            # Success
-            os.remove(backup_path)
-            if os.path.exists(test_path):
-                os.remove(test_path)
-            return f"SUCCESS: Code updated and verified.\nTest Output:\n{result.stdout}"
-        else:
-            # Failure - Rollback
-            shutil.move(backup_path, target_file) # Restore original
-            if os.path.exists(test_path):
-                os.remove(test_path)
-            return f"FAILED: Tests didn't pass. Rolled back changes.\nError Output:\n{result.stderr}\nStandard Output:\n{result.stdout}"
+        return f"SUCCESS: Code updated and verified ({result.elapsed:.1f}s).\nTest Output:\n{result.stdout}"
             
     except Exception as e:
-        # Emergency Rollback
-        if os.path.exists(backup_path):
-            shutil.move(backup_path, target_file)
-        if os.path.exists(test_path):
-            os.remove(test_path)
-        return f"CRITICAL ERROR in run_safe_edit: {str(e)}. Changes rolled back."
+        return f"CRITICAL ERROR in run_safe_edit: {str(e)}. Live code unchanged."
@@ -1,36 +1,18 @@
-import os
-from typing import List, Dict, Optional
-
-try:
-    import git
-    GIT_AVAILABLE = True
-except ImportError:
-    GIT_AVAILABLE = False
-    git = None
-
-REPO_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+from typing import List, Dict
+from .. import git_repo
 
 def get_repo():
-    if not GIT_AVAILABLE:
-        raise ImportError("GitPython module is not installed. Please run 'pip install GitPython'.")
-    try:
-        return git.Repo(REPO_PATH)
-    except git.exc.InvalidGitRepositoryError:
-        # Initialize if not exists (optional, but good for safety)
-        return git.Repo.init(REPO_PATH)
+    return git_repo.get_repo()
 
 def git_commit(message: str) -> str:
     """
     Stages all changes and commits them with the provided message.
     """
     try:
-        repo = get_repo()
-        if not repo.is_dirty(untracked_files=True):
+        committed = git_repo.commit_all(message)
+        if committed is None:
             return "No changes to commit."
-        
-        repo.git.add(A=True)
-        commit = repo.index.commit(message)
-        return f"Committed successfully: [{commit.hexsha[:7]}] {message}"
+        return f"Committed successfully: [{committed[0][:7]}] {message}"
     except Exception as e:
         return f"Git commit failed: {str(e)}"
 
@@ -58,16 +40,17 @@ def git_branch(name: str, action: str = "create") -> str:
     Manages branches. action can be 'create' or 'switch'.
     """
     try:
-        repo = get_repo()
-        if action == "create":
-            new_branch = repo.create_head(name)
-            return f"Branch '{name}' created."
-        elif action == "switch":
-            if name not in repo.heads:
-                return f"Branch '{name}' does not exist."
-            repo.heads[name].checkout()
-            return f"Switched to branch '{name}'."
-        else:
-            return "Invalid action. Use 'create' or 'switch'."
+        with git_repo.write_lock:
+            repo = get_repo()
+            if action == "create":
+                new_branch = repo.create_head(name)
+                return f"Branch '{name}' created."
+            elif action == "switch":
+                if name not in repo.heads:
+                    return f"Branch '{name}' does not exist."
+                repo.heads[name].checkout()
+                return f"Switched to branch '{name}'."
+            else:
+                return "Invalid action. Use 'create' or 'switch'."
     except Exception as e:
         return f"Git branch operation failed: {str(e)}"
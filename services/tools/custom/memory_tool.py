@@ -1,23 +1,32 @@
+import asyncio
 from services.memory.memory_manager import memory
+from services.memory.index_jobs import index_jobs
+from backend.config import settings
 
-async def query_memory(query: str) -> str:
+WARMING_UP_MSG = "Memory is still warming up (loading embedding model). Try again in a few seconds."
+
+async def _memory_ready() -> bool:
+    return await asyncio.to_thread(memory.wait_ready, settings.MEMORY_WARMUP_WAIT)
+
+async def query_memory(query: str, namespace: str = None, path_prefix: str = None, n_results: int = 3) -> str:
     """
     Searches the codebase memory for relevant code snippets or documentation.
     Useful for understanding how existing features are implemented before modifying them.
+    namespace can be 'code', 'docs' or 'conversation' (default: all); path_prefix limits results to sources under a path.
     """
     try:
-        # Auto-index on first query if empty? Or just assume it's indexed.
-        # Let's trigger a quick index refresh if it's a "how to" query to ensure freshness, 
-        # but that might be slow. Let's assume it's indexed or index explicitly.
-        # For this implementation, we'll just query.
-        
-        results = memory.query(query, n_results=3)
+        if not await _memory_ready():
+            return WARMING_UP_MSG
+
+        # Run the embedding + search off the event loop so chats keep flowing
+        # while an indexing job holds the worker thread.
+        results = await asyncio.to_thread(
+            memory.query_many, [query], n_results, namespace, None, path_prefix, 1000
+        )
         
         output = []
-        if results['documents']:
-            for i, doc in enumerate(results['documents'][0]):
-                source = results['metadatas'][0][i]['source']
-                output.append(f"--- Source: {source} ---\n{doc[:1000]}...\n(truncated)\n")
+        for hit in results[0]:
+            output.append(f"--- Source: {hit['source']} ---\n{hit['document']}...\n(truncated)\n")
         
         return "\n".join(output) if output else "No relevant information found in memory."
     except Exception as e:
@@ -25,10 +34,47 @@ async def query_memory(query: str) -> str:
 
 async def index_memory() -> str:
     """
-    Forces a re-indexing of the codebase. Use this after making significant changes.
+    Starts a background re-indexing of the codebase and returns its job id. Use this after making significant changes.
     """
     try:
-        res = memory.index_codebase()
-        return f"Memory re-indexed: {res}"
+        # The lambda defers attribute access so the worker thread, not the
+        # event loop, waits for memory warmup.
+        job = index_jobs.submit("codebase", "backend + services", lambda job: memory.index_codebase(job=job))
+        return f"Indexing job {job.id} started in background. Check progress with index_status."
     except Exception as e:
         return f"Indexing error: {str(e)}"
+
+async def remember_fact(fact: str) -> str:
+    """
+    Stores a short fact or decision in long-term conversation memory so it can be recalled later with query_memory.
+    """
+    try:
+        if not await _memory_ready():
+            return WARMING_UP_MSG
+        await asyncio.to_thread(memory.remember, fact)
+        return "Fact stored in conversation memory."
+    except Exception as e:
+        return f"Memory store error: {str(e)}"
+
+async def index_status(job_id: str = None) -> str:
+    """
+    Reports progress of a background indexing job (or of all recent jobs if no job_id is given).
+    """
+    if job_id:
+        job = index_jobs.get(job_id)
+        if not job:
+            return f"Indexing job '{job_id}' not found."
+        return job.summary()
+
+    jobs = index_jobs.list()
+    if not jobs:
+        return "No indexing jobs."
+    return "\n".join(job.summary() for job in jobs[:10])
+
+async def cancel_index(job_id: str) -> str:
+    """
+    Cancels a queued or running background indexing job.
+    """
+    if index_jobs.cancel(job_id):
+        return f"Cancellation requested for indexing job {job_id}."
+    return f"Indexing job '{job_id}' not found or already finished."
@@ -2,19 +2,23 @@ import json
 import os
 import asyncio
 from ..ai_utils import consult_ai
+from .. import plan_store
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-PLAN_FILE = os.path.join(BASE_DIR, "plan.json")
 MODEL_REASONING = os.getenv("MODEL_REASONING", "qwen2.5-coder:1.5b")
 
-async def manage_plan(action: str, tasks: list[str] = None, step_index: int = None, goal: str = None) -> str:
+async def manage_plan(action: str, tasks: list = None, step_index: int = None, goal: str = None) -> str:
     """
-    Manages the execution plan.
+    Manages the execution plan (create, read, mark_done, update, execute).
     - create: Uses DeepSeek to generate a detailed plan from a goal.
+      Manual tasks are strings (run in order) or {"description", "depends_on": [step numbers]}.
     - read: Returns current status.
-    - mark_done: Advances step.
-    - update: Modifies future steps.
+    - mark_done: Completes step_index (1-based) or the first ready step.
+    - update: Replaces the pending steps; started and finished ones are kept
+      (renumbered first, so new steps' depends_on refer to the updated plan).
+    - execute: Runs the remaining steps, independent ones in parallel via sub-agents.
     """
+    key = plan_store.current_plan_key.get()
+    plans = plan_store.plans
     try:
         if action == "create":
             if not goal and not tasks:
@@ -23,10 +27,15 @@ async def manage_plan(action: str, tasks: list[str] = None, step_index: int = No
             if goal and not tasks:
                 # AI Plan Generation
                 system_prompt = """You are a Strategic Planner. 
-                Break down the user's goal into a sequential, logical list of actionable steps.
+                Break down the user's goal into a logical list of actionable steps.
                 Each step must be clear and use available tools.
-                Return a JSON object with a key "tasks" containing a list of strings.
-                Example: {"tasks": ["Install nginx", "Configure firewall", "Start service"]}
+                For each step list the earlier steps (1-based numbers) it really depends on,
+                so that independent steps can run in parallel.
+                Return a JSON object with a key "tasks" containing a list of
+                {"description": "...", "depends_on": [numbers]} objects.
+                Example: {"tasks": [{"description": "Install nginx", "depends_on": []},
+                                    {"description": "Read the nginx docs on TLS", "depends_on": []},
+                                    {"description": "Configure TLS", "depends_on": [1, 2]}]}
                 """
                 response = await consult_ai(MODEL_REASONING, system_prompt, f"Goal: {goal}", json_mode=True)
                 try:
@@ -36,89 +45,78 @@ async def manage_plan(action: str, tasks: list[str] = None, step_index: int = No
                     return f"Error parsing AI plan: {response}"
 
             plan = {
-                "tasks": [{"description": t, "status": "pending"} for t in tasks],
+                "tasks": plan_store.normalize_tasks(tasks),
                 "current_step_index": 0
             }
             
-            with open(PLAN_FILE, 'w') as f:
-                json.dump(plan, f, indent=2)
+            async with plans.lock(key):
+                await plans.save(key, plan)
                 
             return f"Plan created with {len(tasks)} steps."
             
         elif action == "read":
-            if not os.path.exists(PLAN_FILE):
-                return "No active plan."
-                
-            with open(PLAN_FILE, 'r') as f:
-                plan = json.load(f)
-                
-            tasks = plan.get("tasks", [])
-            idx = plan.get("current_step_index", 0)
-            
-            output = []
-            for i, task in enumerate(tasks):
-                status = "[ ]"
-                if task["status"] == "completed":
-                    status = "[X]"
-                elif i == idx:
-                    status = "[ ] (ACTIVE)"
-                
-                output.append(f"{status} Step {i+1}: {task['description']}")
-                
-            if idx >= len(tasks):
-                output.append("ALL STEPS COMPLETED.")
-                
-            return "\n".join(output)
+            return plan_store.render_status(await plans.get(key))
             
         elif action == "mark_done":
-            if not os.path.exists(PLAN_FILE):
-                return "Error: No active plan to mark done."
-                
-            with open(PLAN_FILE, 'r') as f:
-                plan = json.load(f)
-                
-            idx = plan.get("current_step_index", 0)
-            tasks = plan.get("tasks", [])
-            
-            if idx < len(tasks):
+            async with plans.lock(key):
+                plan = await plans.get(key)
+                if not plan:
+                    return "Error: No active plan to mark done."
+                    
+                tasks = [dict(t) for t in plan.get("tasks", [])]
+                if step_index is not None:
+                    idx = step_index - 1
+                    if not 0 <= idx < len(tasks):
+                        return f"Error: Step {step_index} does not exist."
+                else:
+                    ready = plan_store.ready_steps(plan)
+                    if not ready:
+                        return "Plan already completed." if plan_store.first_open_step(tasks) >= len(tasks) else "Error: No step is ready to be marked done."
+                    idx = ready[0]
+                    
                 tasks[idx]["status"] = "completed"
-                plan["current_step_index"] = idx + 1
+                plan = {"tasks": tasks, "current_step_index": plan_store.first_open_step(tasks)}
+                await plans.save(key, plan)
                 
-                with open(PLAN_FILE, 'w') as f:
-                    json.dump(plan, f, indent=2)
+            ready = plan_store.ready_steps(plan)
+            next_step = "None (Plan Completed)"
+            if ready:
+                next_step = "; ".join(f"Step {i+1}: {tasks[i]['description']}" for i in ready)
                 
-                next_step = "None (Plan Completed)"
-                if idx + 1 < len(tasks):
-                    next_step = tasks[idx+1]["description"]
-                    
-                return f"Step {idx+1} marked as done. Next step: {next_step}"
-            else:
-                return "Plan already completed."
+            return f"Step {idx+1} marked as done. Next step: {next_step}"
 
         elif action == "update":
             if not tasks:
                 return "Error: 'tasks' list is required for 'update'."
             
-            if not os.path.exists(PLAN_FILE):
-                return "Error: No active plan to update. Use 'create'."
-                
-            with open(PLAN_FILE, 'r') as f:
-                plan = json.load(f)
+            async with plans.lock(key):
+                plan = await plans.get(key)
+                if not plan:
+                    return "Error: No active plan to update. Use 'create'."
+                    
+                # Keep finished and in-flight steps (in a DAG plan they need not be a prefix)
+                # and replace only the pending ones.
+                kept, renumber = [], {}
+                for i, task in enumerate(plan.get("tasks", [])):
+                    if task["status"] != "pending":
+                        renumber[i + 1] = len(kept) + 1
+                        kept.append(dict(task))
+                for task in kept:
+                    if "depends_on" in task:
+                        task["depends_on"] = [renumber[dep] for dep in task["depends_on"] if dep in renumber]
+                new_tasks = plan_store.normalize_tasks(tasks, offset=len(kept))
+                all_tasks = kept + new_tasks
                 
-            idx = plan.get("current_step_index", 0)
-            # Keep completed tasks
-            current_tasks = plan.get("tasks", [])[:idx]
-            # Add new tasks
-            new_tasks = [{"description": t, "status": "pending"} for t in tasks]
-            
-            plan["tasks"] = current_tasks + new_tasks
-            
-            with open(PLAN_FILE, 'w') as f:
-                json.dump(plan, f, indent=2)
+                await plans.save(key, {"tasks": all_tasks, "current_step_index": plan_store.first_open_step(all_tasks)})
                 
-            return f"Plan updated. Steps from {idx+1} onwards replaced."
+            return f"Plan updated. Kept {len(kept)} started or finished steps; pending steps replaced by steps {len(kept)+1}-{len(all_tasks)}."
+
+        elif action == "execute":
+            # Imported lazily: the orchestrator imports the tool registry, which imports this module.
+            from ...agent import orchestrator
+            return await orchestrator.execute_plan()
             
-        return "Invalid action. Use create, read, mark_done, or update."
+        return "Invalid action. Use create, read, mark_done, update, or execute."
         
     except Exception as e:
         return f"Error managing plan: {str(e)}"
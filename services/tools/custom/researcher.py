@@ -1,15 +1,26 @@
 try:
     import aiohttp
-    from bs4 import BeautifulSoup
+    import bs4
     DEPS_AVAILABLE = True
 except ImportError:
     DEPS_AVAILABLE = False
     aiohttp = None
-    BeautifulSoup = None
 
 from ...memory.memory_manager import memory
+from ...memory.index_jobs import index_jobs
+from .. import web_fetch, html_extract
+from ..crawler import DocsCrawler
+from backend.config import settings
 import urllib.parse
 
+def _doc_source(topic: str, url: str) -> str:
+    return f"doc_{topic}_{urllib.parse.quote(url, safe='')}"
+
+def _still_indexed(source_id: str) -> bool:
+    # The docs namespace evicts by TTL/LRU, so a matching indexed_hash alone
+    # doesn't mean the page is still in memory.
+    return memory.ready and memory.has_source(source_id)
+
 async def learn_tech(topic: str, url: str = None) -> str:
     """
     Learns about a new technology or library by reading documentation.
@@ -23,37 +34,82 @@ async def learn_tech(topic: str, url: str = None) -> str:
         return f"Please provide a specific URL to the documentation for '{topic}'. I need a source to learn from."
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=30) as response:
-                if response.status != 200:
-                    return f"Error fetching URL {url}: Status {response.status}"
-                html = await response.text()
-        
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "iframe", "noscript"]):
-            script.decompose()
-            
-        # Get text
-        text = soup.get_text(separator='\n')
-        
-        # Clean up whitespace
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        clean_text = '\n'.join(chunk for chunk in chunks if chunk)
+        result = await web_fetch.fetch(url, max_bytes=settings.WEB_MAX_BYTES)
+        if result.status != 200:
+            return f"Error fetching URL {url}: Status {result.status}"
+
+        source_id = _doc_source(topic, url)
+        cache = web_fetch.get_cache()
+        if result.content_hash and cache.get_meta(url).get("indexed_hash") == result.content_hash and _still_indexed(source_id):
+            return f"'{topic}' documentation at {url} is unchanged since it was last learned. Skipped re-indexing."
+
+        if "html" in result.content_type or not result.content_type:
+            clean_text = await html_extract.extract_text(result.text, max_workers=settings.HTML_EXTRACT_WORKERS)
+        else:
+            clean_text = result.text.strip()
         
         if not clean_text:
             return "Error: No text content found at URL."
 
         # Index into memory
-        # We use the topic as part of the source to make it easily searchable
-        source_id = f"doc_{topic}_{urllib.parse.quote(url, safe='')}"
-        result = memory.index_text(source=source_id, text=clean_text)
+        def _index(job):
+            indexed = memory.index_text(source_id, clean_text, job=job)
+            if not result.truncated:
+                cache.update_meta(url, indexed_hash=result.content_hash)
+            return indexed
+
+        job = index_jobs.submit("document", source_id, _index)
         
+        notes = " (truncated at size limit)" if result.truncated else ""
         summary = clean_text[:500] + "..." if len(clean_text) > 500 else clean_text
-        return f"Successfully learned about '{topic}' from {url}.\n{result}\n\nContent Preview:\n{summary}"
+        return f"Successfully fetched '{topic}' from {url}{notes}. Indexing job {job.id} started in background.\n\nContent Preview:\n{summary}"
         
     except Exception as e:
         return f"Error learning technology: {str(e)}"
 
+async def learn_docs_site(topic: str, root_url: str, max_depth: int = 2, max_pages: int = 50, concurrency: int = 4, resume: bool = True) -> str:
+    """
+    Crawls a whole documentation site (same-origin links from root_url) and indexes every page into memory in one call.
+    Resumes an unfinished crawl of the same root_url by default.
+    """
+    if not DEPS_AVAILABLE:
+        return "Error: 'aiohttp' or 'beautifulsoup4' libraries are missing. Please install them to use this tool."
+
+    job_ids = []
+    cache = web_fetch.get_cache()
+
+    async def _index_batch(pages):
+        def _index(job):
+            for n, (url, text, content_hash) in enumerate(pages, 1):
+                memory.index_text(_doc_source(topic, url), text)
+                cache.update_meta(url, indexed_hash=content_hash)
+                job.report(files_done=n, files_total=len(pages))
+            return f"Indexed {len(pages)} pages."
+
+        job = index_jobs.submit("crawl", f"{topic} ({len(pages)} pages)", _index)
+        job_ids.append(job.id)
+
+    try:
+        crawler = DocsCrawler(
+            root_url,
+            on_batch=_index_batch,
+            is_indexed=lambda url: _still_indexed(_doc_source(topic, url)),
+            max_depth=max_depth,
+            max_pages=max_pages,
+            concurrency=concurrency,
+            delay=settings.CRAWL_DELAY,
+            max_bytes=settings.WEB_MAX_BYTES,
+            extract_workers=settings.HTML_EXTRACT_WORKERS
+        )
+        report = await crawler.run(resume=resume)
+    except Exception as e:
+        return f"Error crawling documentation: {str(e)}"
+
+    status = "Crawl complete." if report["complete"] else f"Crawl paused at page limit; {report['remaining']} URLs left. Call again to resume."
+    return (
+        f"{status}\n"
+        f"Fetched {report['fetched_this_run']} pages in {report['elapsed']}s ({report['pages_per_sec']} pages/sec). "
+        f"Queued for indexing: {report['batched']}, unchanged: {report['unchanged']}, "
+        f"duplicates: {report['duplicates']}, errors: {report['errors']}, blocked by robots.txt: {report['blocked']}.\n"
+        f"Indexing jobs: {', '.join(job_ids) if job_ids else 'none'}"
+    )
@@ -1,20 +1,11 @@
+from backend import scheduler as scheduler_service
 from backend.scheduler import scheduler
 try:
     from apscheduler.triggers.cron import CronTrigger
 except ImportError:
     CronTrigger = None
 
-from services.agent import orchestrator
-from services.database import database
-import asyncio
-
-async def run_scheduled_agent(goal: str):
-    db = database.SessionLocal()
-    try:
-        # We pass None for websocket to run in headless mode
-        await orchestrator.run_agent_loop(goal, db_session=db, websocket=None)
-    finally:
-        db.close()
+import uuid
 
 def schedule_task(prompt: str, cron: str) -> str:
     """
@@ -38,12 +29,7 @@ def schedule_task(prompt: str, cron: str) -> str:
             day_of_week=parts[4]
         )
         
-        job = scheduler.add_job(
-            run_scheduled_agent,
-            trigger=trigger,
-            args=[prompt],
-            name=prompt[:50]
-        )
+        job = scheduler_service.add_agent_job(prompt, trigger, job_id=uuid.uuid4().hex)
         
         return f"Task scheduled successfully: '{prompt}' (ID: {job.id})"
     except Exception as e:
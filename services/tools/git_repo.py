@@ -0,0 +1,189 @@
+import asyncio
+import os
+import threading
+from dataclasses import dataclass, field
+
+from backend.config import settings
+from backend.logger import logger
+
+try:
+    import git
+    GIT_AVAILABLE = True
+except ImportError:
+    GIT_AVAILABLE = False
+    git = None
+
+# Same location git_ops has always used (relative to services/tools/custom).
+REPO_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
+# Passed per command rather than written to the repo's config. The untracked
+# cache lets status skip directories whose mtime hasn't changed; an fsmonitor
+# configured for the repository is picked up by git on its own.
+GIT_OPTIONS = {"c": "core.untrackedCache=true"}
+
+_repo = None
+_repo_lock = threading.Lock()
+# Serializes everything that writes to the repository (index, HEAD, branches).
+write_lock = threading.RLock()
+
+
+def get_repo():
+    """The cached repository handle, created (or the repo initialized) on first use."""
+    global _repo
+    if not GIT_AVAILABLE:
+        raise ImportError("GitPython module is not installed. Please run 'pip install GitPython'.")
+    with _repo_lock:
+        if _repo is None or not os.path.isdir(_repo.git_dir):
+            try:
+                repo = git.Repo(REPO_PATH)
+            except git.exc.InvalidGitRepositoryError:
+                # Initialize if not exists (optional, but good for safety)
+                repo = git.Repo.init(REPO_PATH)
+            repo.git.set_persistent_git_options(**GIT_OPTIONS)
+            _repo = repo
+        return _repo
+
+
+@dataclass
+class RepoStatus:
+    branch: str = ""
+    changed: list = field(default_factory=list)     # [(xy, path)] for tracked files
+    untracked: list = field(default_factory=list)
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.changed or self.untracked)
+
+    @property
+    def paths(self) -> list:
+        return [path for _, path in self.changed] + self.untracked
+
+
+def parse_porcelain_v2(output: str) -> RepoStatus:
+    """Parses `git status --porcelain=v2 --branch -z` output."""
+    status = RepoStatus()
+    tokens = iter(output.split("\0"))
+    for token in tokens:
+        if token.startswith("# branch.head "):
+            status.branch = token[len("# branch.head "):]
+        elif token.startswith("1 "):
+            parts = token.split(" ", 8)
+            status.changed.append((parts[1], parts[8]))
+        elif token.startswith("2 "):
+            parts = token.split(" ", 9)
+            status.changed.append((parts[1], parts[9]))
+            next(tokens, None)  # the rename's original path
+        elif token.startswith("u "):
+            parts = token.split(" ", 10)
+            status.changed.append((parts[1], parts[10]))
+        elif token.startswith("? "):
+            status.untracked.append(token[2:])
+    return status
+
+
+def get_status(repo=None) -> RepoStatus:
+    """
+    Working tree status in one `git status` call. Untracked directories are
+    reported as a whole instead of being walked (--untracked-files=normal).
+    """
+    repo = repo or get_repo()
+    output = repo.git.status("--porcelain=v2", "--branch", "-z", "--untracked-files=normal")
+    return parse_porcelain_v2(output)
+
+
+def diff_stat_message(status: RepoStatus, shortstat: str = "") -> str:
+    """A commit message from the changed paths alone, e.g. 'Update orchestrator.py, config.py (+3 more)'."""
+    names = [os.path.basename(p.rstrip("/")) or p for p in status.paths]
+    verb = "Add" if not status.changed else "Update"
+    subject = f"{verb} {', '.join(names[:3])}"
+    if len(names) > 3:
+        subject += f" (+{len(names) - 3} more)"
+    return f"{subject}\n\n{shortstat.strip()}" if shortstat.strip() else subject
+
+
+def commit_all(message: str = None):
+    """
+    Stages everything and commits. The message defaults to a diff-stat
+    summary. Returns (hexsha, message), or None if there was nothing to commit.
+    """
+    with write_lock:
+        repo = get_repo()
+        status = get_status(repo)
+        if not status.dirty:
+            return None
+        repo.git.add(A=True)
+        if message is None:
+            message = diff_stat_message(status, repo.git.diff("--cached", "--shortstat"))
+        commit = repo.index.commit(message)
+        return commit.hexsha, message
+
+
+def amend_message(expected_sha: str, message: str):
+    """Rewords HEAD if it is still expected_sha. Returns the new hexsha, or None if HEAD moved."""
+    with write_lock:
+        repo = get_repo()
+        if repo.head.commit.hexsha != expected_sha:
+            return None
+        repo.git.commit("--amend", "--no-verify", "--only", "-m", message)
+        return repo.head.commit.hexsha
+
+
+class AutoCommitter:
+    """
+    Commits the agent's work in the background so finishing a task never
+    waits on git or on a model. Jobs run one at a time, in order: commit with
+    a diff-stat message first, then (optionally) ask the fast model for a
+    better subject and amend it in if nothing was committed on top meanwhile.
+    on_commit(short_hash, message) is awaited after each step that changed HEAD.
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._tasks = set()
+
+    def schedule(self, goal: str, on_commit=None) -> asyncio.Task:
+        task = asyncio.create_task(self._run(goal, on_commit))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, goal: str, on_commit):
+        async with self._lock:
+            try:
+                committed = await asyncio.to_thread(commit_all)
+                if committed is None:
+                    return
+                sha, message = committed
+                if on_commit:
+                    await on_commit(sha[:7], message)
+                if not settings.AUTO_COMMIT_LLM_MESSAGE:
+                    return
+                better = await self._llm_message(goal, message)
+                if not better:
+                    return
+                amended = await asyncio.to_thread(amend_message, sha, f"{better}\n\n{message}")
+                if amended and on_commit:
+                    await on_commit(amended[:7], better)
+            except Exception as e:
+                logger.error(f"Auto-commit failed: {e}")
+
+    async def _llm_message(self, goal: str, stat_message: str) -> str:
+        import ollama
+        prompt = (
+            f"Generate a concise git commit message (max 50 chars) for the following task: {goal}.\n"
+            f"Changed files: {stat_message}\nOutput ONLY the message."
+        )
+        try:
+            client = ollama.AsyncClient(host=settings.OLLAMA_HOST)
+            resp = await client.chat(model=settings.MODEL_FAST, messages=[{"role": "user", "content": prompt}])
+            return resp['message']['content'].strip().replace('"', '').splitlines()[0][:72]
+        except Exception as e:
+            logger.warning(f"Auto-commit: keeping the diff-stat message ({e})")
+            return ""
+
+    async def drain(self, timeout: float = 30):
+        """Waits for pending jobs (at shutdown)."""
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=timeout)
+
+
+auto_committer = AutoCommitter()
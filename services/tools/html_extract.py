@@ -0,0 +1,184 @@
+import asyncio
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Fastest available parser wins: selectolax (C, lexbor) > BeautifulSoup+lxml > BeautifulSoup+html.parser.
+SELECTOLAX_AVAILABLE = importlib.util.find_spec("selectolax") is not None
+LXML_AVAILABLE = importlib.util.find_spec("lxml") is not None
+BS4_AVAILABLE = importlib.util.find_spec("bs4") is not None
+
+STRIP_TAGS = ["script", "style", "nav", "footer", "iframe", "noscript"]
+
+
+def parser_name() -> str:
+    if SELECTOLAX_AVAILABLE:
+        return "selectolax"
+    if BS4_AVAILABLE:
+        return "bs4+lxml" if LXML_AVAILABLE else "bs4+html.parser"
+    return "none"
+
+
+def _clean_whitespace(text: str) -> str:
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+
+def html_to_text(html: str) -> str:
+    """Strips boilerplate tags and returns whitespace-normalized visible text."""
+    if SELECTOLAX_AVAILABLE:
+        from selectolax.parser import HTMLParser
+        tree = HTMLParser(html)
+        tree.strip_tags(STRIP_TAGS)
+        root = tree.body or tree.root
+        text = root.text(separator='\n') if root else ""
+    else:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, "lxml" if LXML_AVAILABLE else "html.parser")
+        for tag in soup(STRIP_TAGS):
+            tag.decompose()
+        text = soup.get_text(separator='\n')
+    return _clean_whitespace(text)
+
+
+def html_to_text_and_links(html: str, base_url: str):
+    """Returns (text, links) where links are absolute hrefs found in the page."""
+    from urllib.parse import urljoin
+    if SELECTOLAX_AVAILABLE:
+        from selectolax.parser import HTMLParser
+        hrefs = [node.attributes.get("href") for node in HTMLParser(html).css("a[href]")]
+    else:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, "lxml" if LXML_AVAILABLE else "html.parser")
+        hrefs = [a.get("href") for a in soup.find_all("a", href=True)]
+    links = [urljoin(base_url, href) for href in hrefs if href and not href.startswith(("mailto:", "javascript:", "tel:"))]
+    return html_to_text(html), links
+
+
+_pool = None
+
+
+def get_pool(max_workers: int = 2) -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn keeps workers independent of the server's threads and loop.
+        _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def run_in_pool(func, *args, max_workers: int = 2):
+    """
+    Runs a picklable parsing function in the extraction process pool so
+    CPU-bound parsing never stalls the event loop. Falls back to a thread
+    if the pool cannot be used.
+    """
+    global _pool
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_pool(max_workers), func, *args)
+    except (BrokenProcessPool, OSError) as e:
+        print(f"HTML extraction pool unavailable ({e}); parsing in a thread.")
+        _pool = None
+        return await asyncio.to_thread(func, *args)
+
+
+async def extract_text(html: str, max_workers: int = 2) -> str:
+    return await run_in_pool(html_to_text, html, max_workers=max_workers)
+
+
+async def extract_text_and_links(html: str, base_url: str, max_workers: int = 2):
+    return await run_in_pool(html_to_text_and_links, html, base_url, max_workers=max_workers)
+
+
+# --- readability-style reading ---------------------------------------------
+
+READING_STRIP_TAGS = STRIP_TAGS + ["header", "aside", "form", "svg", "button"]
+MAIN_SELECTORS = ["article", "main", "[role=main]"]
+CONTENT_TAGS = ["p", "pre", "li", "td", "blockquote"]
+MIN_STATIC_TEXT = 200
+SPA_MARKERS = (
+    'id="root"', "id='root'", 'id="app"', "id='app'", 'id="__next"', "__NEXT_DATA__",
+    "window.__NUXT__", "ng-version", "data-reactroot", "data-server-rendered",
+)
+NOSCRIPT_HINTS = ("enable javascript", "javascript is required", "requires javascript", "javascript is disabled")
+
+
+def _link_density(node) -> float:
+    text_len = len(node.get_text(strip=True)) or 1
+    link_len = sum(len(a.get_text(strip=True)) for a in node.find_all("a"))
+    return min(link_len / text_len, 1.0)
+
+
+def _best_container(body):
+    """Scores parents of paragraph-like nodes (readability heuristic) and returns the winner."""
+    scores = {}
+    nodes = {}
+    for el in body.find_all(CONTENT_TAGS):
+        text = el.get_text(" ", strip=True)
+        if len(text) < 25:
+            continue
+        score = 1 + text.count(",") + min(len(text) // 100, 3)
+        parent = el.parent
+        for weight in (1.0, 0.5):
+            if parent is None or parent.name in (None, "[document]", "html"):
+                break
+            nodes[id(parent)] = parent
+            scores[id(parent)] = scores.get(id(parent), 0) + score * weight
+            parent = parent.parent
+    if not scores:
+        return None
+    best = max(scores, key=lambda key: scores[key] * (1 - _link_density(nodes[key])))
+    return nodes[best]
+
+
+def html_to_reading(html: str) -> dict:
+    """
+    Extracts the main readable content of a page and judges whether it needs
+    JavaScript to render. Returns {"title", "text", "needs_js", "reason"}.
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "lxml" if LXML_AVAILABLE else "html.parser")
+    title = soup.title.get_text(strip=True) if soup.title else ""
+
+    noscript = " ".join(tag.get_text(" ", strip=True) for tag in soup.find_all("noscript")).lower()
+    has_scripts = soup.find("script") is not None
+    for tag in soup(READING_STRIP_TAGS):
+        tag.decompose()
+
+    body = soup.body or soup
+    page_text = _clean_whitespace(body.get_text(separator='\n'))
+
+    main = None
+    for selector in MAIN_SELECTORS:
+        candidates = [node for node in body.select(selector) if len(node.get_text(strip=True)) >= MIN_STATIC_TEXT]
+        if candidates:
+            main = max(candidates, key=lambda node: len(node.get_text(strip=True)))
+            break
+    if main is None:
+        main = _best_container(body)
+    text = _clean_whitespace(main.get_text(separator='\n')) if main is not None else ""
+    if len(text) < MIN_STATIC_TEXT:
+        text = page_text
+
+    reason = ""
+    if len(page_text) < MIN_STATIC_TEXT:
+        if any(hint in noscript for hint in NOSCRIPT_HINTS):
+            reason = "noscript notice"
+        elif has_scripts and any(marker in html for marker in SPA_MARKERS):
+            reason = "SPA shell"
+        elif not page_text:
+            reason = "empty body"
+    return {"title": title, "text": text, "needs_js": bool(reason), "reason": reason}
+
+
+async def extract_reading(html: str, max_workers: int = 2) -> dict:
+    return await run_in_pool(html_to_reading, html, max_workers=max_workers)
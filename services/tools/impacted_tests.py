@@ -0,0 +1,143 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+
+from backend.config import settings
+from . import sandbox, symbol_index
+
+BASE_DIR = sandbox.BASE_DIR
+OUTPUT_TAIL_CHARS = 2000    # per failing test, in the combined report
+
+
+def is_test_file(rel_path: str) -> bool:
+    name = os.path.basename(rel_path)
+    if not name.endswith(".py") or name == sandbox.TEST_FILENAME:
+        return False
+    return name.startswith("test_") or name.endswith("_test.py")
+
+
+def _relative(path: str, root: str) -> str:
+    return os.path.relpath(path, root) if os.path.isabs(path) else os.path.normpath(path)
+
+
+def select_tests(changed_files: list, root: str = BASE_DIR) -> list:
+    """
+    Test modules a change to changed_files could break: changed tests
+    themselves plus every test that imports a changed module, directly
+    or through other modules (from the symbol index's import graph).
+    """
+    index = symbol_index.get_index()
+    selected = set()
+    for path in changed_files:
+        rel_path = _relative(path, root)
+        if not rel_path.endswith(".py"):
+            continue
+        if is_test_file(rel_path) and os.path.exists(os.path.join(root, rel_path)):
+            selected.add(rel_path)
+        for dependent, _via in index.module_dependents(rel_path, transitive=True):
+            if is_test_file(dependent):
+                selected.add(dependent)
+    return sorted(selected)
+
+
+@dataclass
+class TestOutcome:
+    path: str
+    status: str             # "passed", "failed", "timeout" or "cancelled" (by fail-fast)
+    elapsed: float = 0.0
+    output: str = ""
+
+
+@dataclass
+class TestReport:
+    outcomes: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def passed(self) -> bool:
+        return all(o.status == "passed" for o in self.outcomes)
+
+    def count(self, status: str) -> int:
+        return sum(1 for o in self.outcomes if o.status == status)
+
+    def summary(self) -> str:
+        if not self.outcomes:
+            return "Impacted tests: none."
+        lines = [
+            f"Impacted tests: {len(self.outcomes)} selected, {self.count('passed')} passed, "
+            f"{self.count('failed')} failed, {self.count('timeout')} timed out, "
+            f"{self.count('cancelled')} cancelled ({self.elapsed:.1f}s)."
+        ]
+        for o in self.outcomes:
+            lines.append(f"  [{o.status.upper()}] {o.path} ({o.elapsed:.1f}s)")
+        for o in self.outcomes:
+            if o.status in ("failed", "timeout") and o.output:
+                lines.append(f"\n--- {o.path} ---\n{o.output[-OUTPUT_TAIL_CHARS:]}")
+        return "\n".join(lines)
+
+
+PYTEST_NO_TESTS = 5     # pytest's exit code when a module collects no tests
+
+
+def _pytest_available() -> bool:
+    return importlib.util.find_spec("pytest") is not None
+
+
+async def _run_module(test_path: str, cwd: str, timeout: float) -> sandbox.TestResult:
+    # pytest understands plain unittest modules too; script-style checks
+    # (no test functions) and trees without pytest run the module directly.
+    if _pytest_available():
+        result = await sandbox.run_command(
+            [sys.executable, "-m", "pytest", "-q", "-x", "-p", "no:cacheprovider", test_path], cwd=cwd, timeout=timeout
+        )
+        if result.returncode != PYTEST_NO_TESTS:
+            return result
+    return await sandbox.run_python(test_path, cwd=cwd, timeout=timeout)
+
+
+async def run_tests(tests: list, cwd: str = BASE_DIR, workers: int = None, timeout: float = None, fail_fast: bool = True) -> TestReport:
+    """
+    Runs test modules (paths relative to cwd) as separate processes, at most
+    `workers` at a time, each with its own timeout. With fail_fast the first
+    failure cancels whatever is still running or queued.
+    """
+    workers = workers or settings.TEST_WORKERS
+    timeout = timeout or settings.TEST_TIMEOUT
+    report = TestReport()
+    if not tests:
+        return report
+
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(workers)
+    outcomes = {path: TestOutcome(path, "cancelled") for path in tests}
+
+    async def run_one(path: str):
+        async with semaphore:
+            result = await _run_module(path, cwd, timeout)
+        status = "passed" if result.passed else "timeout" if result.timed_out else "failed"
+        outcomes[path] = TestOutcome(path, status, result.elapsed, (result.stdout + result.stderr).strip())
+        return path
+
+    tasks = [asyncio.create_task(run_one(path)) for path in tests]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            path = await finished
+            if fail_fast and outcomes[path].status != "passed":
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    report.outcomes = [outcomes[path] for path in tests]
+    report.elapsed = time.monotonic() - started
+    return report
+
+
+async def run_impacted(changed_files: list, cwd: str = BASE_DIR, root: str = BASE_DIR, fail_fast: bool = True) -> TestReport:
+    """Selects the tests impacted by changed_files (resolved against root) and runs them in cwd."""
+    tests = await asyncio.to_thread(select_tests, changed_files, root)
+    return await run_tests(tests, cwd=cwd, fail_fast=fail_fast)
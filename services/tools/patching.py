@@ -0,0 +1,191 @@
+import difflib
+import re
+
+SEARCH_MARKER = re.compile(r"^<{5,}\s*SEARCH\s*$")
+DIVIDER_MARKER = re.compile(r"^={5,}\s*$")
+REPLACE_MARKER = re.compile(r"^>{5,}\s*REPLACE\s*$")
+HUNK_HEADER = re.compile(r"^@@.*@@")
+HUNK_COUNTS = re.compile(r"^@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+FUZZY_THRESHOLD = 0.85
+
+PATCH_FORMAT_PROMPT = """Return ONLY the edits, as one or more SEARCH/REPLACE blocks:
+<<<<<<< SEARCH
+exact lines copied from the current file
+=======
+the lines that replace them
+>>>>>>> REPLACE
+- SEARCH must reproduce the original lines exactly, with enough lines to be unique.
+- Keep blocks small: only the lines that change plus a line or two of context.
+- No markdown, no explanations, no full file."""
+
+
+class PatchError(Exception):
+    pass
+
+
+def _strip_fences(text: str) -> str:
+    lines = text.strip("\n").splitlines()
+    if lines and lines[0].startswith("```"):
+        lines = lines[1:]
+    if lines and lines[-1].startswith("```"):
+        lines = lines[:-1]
+    return "\n".join(lines)
+
+
+def parse_search_replace(text: str) -> list:
+    """Returns [(search_lines, replace_lines)] for every SEARCH/REPLACE block in text."""
+    blocks = []
+    state, search, replace = None, [], []
+    for line in text.splitlines():
+        if state is None and SEARCH_MARKER.match(line):
+            state, search, replace = "search", [], []
+        elif state == "search" and DIVIDER_MARKER.match(line):
+            state = "replace"
+        elif state == "replace" and REPLACE_MARKER.match(line):
+            blocks.append((search, replace))
+            state = None
+        elif state == "search":
+            search.append(line)
+        elif state == "replace":
+            replace.append(line)
+    if state is not None:
+        raise PatchError("Unterminated SEARCH/REPLACE block.")
+    return blocks
+
+
+def _is_file_header(lines: list, i: int, remaining) -> bool:
+    """
+    Whether lines[i] is a "--- a/file" / "+++ b/file" header rather than a
+    removed "-- ..." or added "++ ..." line. Inside a hunk with line counts
+    left it never is; without counts in the hunk header, only a ---/+++ pair is.
+    """
+    line = lines[i]
+    if not line.startswith(("--- ", "+++ ")):
+        return False
+    if remaining is not None:
+        return remaining[0] <= 0 and remaining[1] <= 0
+    if line.startswith("--- "):
+        return i + 1 < len(lines) and lines[i + 1].startswith("+++ ")
+    return i > 0 and lines[i - 1].startswith("--- ")
+
+
+def parse_unified_diff(text: str) -> list:
+    """
+    Returns [(old_lines, new_lines)] per hunk. Line numbers in the headers are
+    ignored; hunks are located by their content like SEARCH blocks. The line
+    counts, when present, only tell file headers apart from hunk lines.
+    """
+    blocks = []
+    old, new = None, None
+    remaining = None    # [old, new] lines the hunk header says are left
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if HUNK_HEADER.match(line):
+            if old is not None:
+                blocks.append((old, new))
+            old, new = [], []
+            counts = HUNK_COUNTS.match(line)
+            remaining = [int(n) if n is not None else 1 for n in counts.groups()] if counts else None
+        elif old is None:
+            continue
+        elif _is_file_header(lines, i, remaining):
+            blocks.append((old, new))
+            old, new = None, None
+        elif line.startswith("-"):
+            old.append(line[1:])
+            if remaining:
+                remaining[0] -= 1
+        elif line.startswith("+"):
+            new.append(line[1:])
+            if remaining:
+                remaining[1] -= 1
+        elif line.startswith("\\"):
+            continue  # "\ No newline at end of file"
+        else:
+            context = line[1:] if line.startswith(" ") else line
+            old.append(context)
+            new.append(context)
+            if remaining:
+                remaining[0] -= 1
+                remaining[1] -= 1
+    if old is not None:
+        blocks.append((old, new))
+    return blocks
+
+
+def parse_patch(text: str) -> list:
+    text = _strip_fences(text)
+    if any(SEARCH_MARKER.match(line) for line in text.splitlines()):
+        return parse_search_replace(text)
+    if any(HUNK_HEADER.match(line) for line in text.splitlines()):
+        return parse_unified_diff(text)
+    raise PatchError("No SEARCH/REPLACE blocks or unified diff hunks found.")
+
+
+def _indent(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _find(lines: list, search: list):
+    """
+    Locates search in lines. Tries an exact match, then one ignoring trailing
+    whitespace, then one ignoring indentation, then the most similar window
+    above FUZZY_THRESHOLD. Returns (start, indent_fix) or raises PatchError.
+    indent_fix is (found_indent, search_indent) when indentation differed.
+    """
+    n = len(search)
+    candidates = range(len(lines) - n + 1)
+    for normalize in (lambda s: s, str.rstrip, str.strip):
+        target = [normalize(s) for s in search]
+        matches = [i for i in candidates if [normalize(s) for s in lines[i:i + n]] == target]
+        if len(matches) > 1:
+            raise PatchError(f"SEARCH block matches {len(matches)} places; include more context:\n" + "\n".join(search[:3]))
+        if matches:
+            start = matches[0]
+            return start, (_indent(lines[start]), _indent(search[0]))
+
+    joined = "\n".join(s.strip() for s in search)
+    best, best_ratio = None, 0.0
+    for i in candidates:
+        ratio = difflib.SequenceMatcher(None, joined, "\n".join(s.strip() for s in lines[i:i + n])).ratio()
+        if ratio > best_ratio:
+            best, best_ratio = i, ratio
+    if best is not None and best_ratio >= FUZZY_THRESHOLD:
+        return best, (_indent(lines[best]), _indent(search[0]))
+    raise PatchError("SEARCH block not found in file:\n" + "\n".join(search[:3]))
+
+
+def _reindent(replace: list, indent_fix) -> list:
+    found, expected = indent_fix
+    if found == expected:
+        return replace
+    out = []
+    for line in replace:
+        if line.startswith(expected):
+            line = found + line[len(expected):]
+        out.append(line)
+    return out
+
+
+def apply_blocks(original: str, blocks: list) -> str:
+    """Applies (search_lines, replace_lines) blocks in order. Raises PatchError if one doesn't apply."""
+    if not blocks:
+        raise PatchError("Patch contains no edits.")
+    trailing_newline = original.endswith("\n") or not original
+    lines = original.splitlines()
+    for search, replace in blocks:
+        while search and not search[-1].strip() and replace and not replace[-1].strip():
+            search, replace = search[:-1], replace[:-1]
+        if not any(s.strip() for s in search):
+            if lines and any(line.strip() for line in lines):
+                raise PatchError("Empty SEARCH block is only allowed for an empty file.")
+            lines = list(replace)
+            continue
+        start, indent_fix = _find(lines, search)
+        lines[start:start + len(search)] = _reindent(replace, indent_fix)
+    return "\n".join(lines) + ("\n" if trailing_newline else "")
+
+
+def apply_patch(original: str, patch: str) -> str:
+    """Parses patch (SEARCH/REPLACE blocks or a unified diff) and applies it to original."""
+    return apply_blocks(original, parse_patch(patch))
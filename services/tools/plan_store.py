@@ -0,0 +1,204 @@
+import asyncio
+import contextvars
+import json
+import uuid
+from collections import OrderedDict
+
+from sqlalchemy import select
+
+from ..database import database
+from ..database.models import Plan
+
+# Plan key of the agent run executing in the current task. Integer keys are
+# conversation ids and persisted; string keys are ephemeral runs (scheduled
+# tasks, bot messages without a conversation) kept in memory only.
+current_plan_key = contextvars.ContextVar("current_plan_key", default=None)
+
+
+def ephemeral_key() -> str:
+    return f"run-{uuid.uuid4().hex[:12]}"
+
+
+def normalize_tasks(tasks, offset: int = 0) -> list:
+    """
+    Turns a task list into plan steps. Items are either plain strings, which
+    depend on the step before them (a linear plan), or dicts with
+    "description" and "depends_on" (1-based step numbers). offset is the
+    number of steps already in the plan. Dependencies on the step itself or
+    later steps are dropped so the plan stays acyclic.
+    """
+    steps = []
+    for i, task in enumerate(tasks, start=offset):
+        if isinstance(task, dict):
+            description = str(task.get("description", "")).strip()
+            depends_on = task.get("depends_on") or []
+            if not isinstance(depends_on, list):
+                depends_on = [depends_on]
+        else:
+            description = str(task).strip()
+            depends_on = [i] if i > 0 else []
+        deps = []
+        for dep in depends_on:
+            try:
+                dep = int(dep)
+            except (TypeError, ValueError):
+                continue
+            if 1 <= dep <= i and dep not in deps:
+                deps.append(dep)
+        steps.append({"description": description, "status": "pending", "depends_on": deps})
+    return steps
+
+
+def ready_steps(plan) -> list:
+    """Indices of pending steps whose dependencies have all completed."""
+    if not plan:
+        return []
+    tasks = plan.get("tasks", [])
+    return [
+        i for i, task in enumerate(tasks)
+        if task["status"] == "pending"
+        # Steps without "depends_on" come from linear plans and follow the previous step.
+        and all(tasks[dep - 1]["status"] == "completed" for dep in task.get("depends_on", [i] if i else []))
+    ]
+
+
+def first_open_step(tasks) -> int:
+    """current_step_index: the first step not yet completed."""
+    for i, task in enumerate(tasks):
+        if task["status"] != "completed":
+            return i
+    return len(tasks)
+
+
+def render_status(plan) -> str:
+    """Text shown to the agent: every step with its checkbox, state and dependencies."""
+    if not plan:
+        return "No active plan."
+    tasks = plan.get("tasks", [])
+    ready = set(ready_steps(plan))
+
+    output = []
+    for i, task in enumerate(tasks):
+        status = "[ ]"
+        if task["status"] == "completed":
+            status = "[X]"
+        elif task["status"] == "running":
+            status = "[~] (RUNNING)"
+        elif task["status"] == "failed":
+            status = "[!] (FAILED)"
+        elif i in ready:
+            status = "[ ] (ACTIVE)"
+        line = f"{status} Step {i+1}: {task['description']}"
+        if task.get("depends_on"):
+            line += f" (after {', '.join(str(d) for d in task['depends_on'])})"
+        output.append(line)
+
+    if first_open_step(tasks) >= len(tasks):
+        output.append("ALL STEPS COMPLETED.")
+    return "\n".join(output)
+
+
+def render_markdown(plan) -> str:
+    """Markdown checklist sent to the frontend in plan_update messages."""
+    if not plan:
+        return ""
+    plan_md = ""
+    for task in plan.get("tasks", []):
+        status = "[x]" if task["status"] == "completed" else "[ ]"
+        plan_md += f"- {status} {task['description']}\n"
+    return plan_md
+
+
+class PlanStore:
+    """
+    Per-conversation plans backed by the plans table, with a write-through
+    in-process cache so reading the plan on every agent step costs no I/O.
+    Writes for one key are serialized and notify the key's subscribers
+    (e.g. the websocket that broadcasts plan_update).
+    """
+
+    def __init__(self, cache_size: int = 512):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._ephemeral = {}
+        self._locks = {}
+        self._subscribers = {}
+
+    # --- persistence -----------------------------------------------------
+
+    async def _load_row(self, conversation_id: int):
+        async with database.AsyncSessionLocal() as db:
+            row = (await db.execute(select(Plan).where(Plan.conversation_id == conversation_id))).scalars().first()
+            return json.loads(row.data) if row and row.data else None
+
+    async def _save_row(self, conversation_id: int, plan: dict):
+        async with database.AsyncSessionLocal() as db:
+            row = (await db.execute(select(Plan).where(Plan.conversation_id == conversation_id))).scalars().first()
+            if row is None:
+                row = Plan(conversation_id=conversation_id)
+                db.add(row)
+            row.data = json.dumps(plan)
+            await db.commit()
+
+    def _remember(self, key, plan):
+        if isinstance(key, str):
+            self._ephemeral[key] = plan
+            return
+        self._cache[key] = plan
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # --- API -------------------------------------------------------------
+
+    def lock(self, key) -> asyncio.Lock:
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    async def get(self, key):
+        """Returns the plan dict for key, or None if it has none."""
+        if key is None:
+            return None
+        if isinstance(key, str):
+            return self._ephemeral.get(key)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        plan = await self._load_row(key)
+        self._remember(key, plan)
+        return plan
+
+    async def save(self, key, plan: dict):
+        if key is None:
+            raise ValueError("No conversation is active; plans need a conversation or run key.")
+        if not isinstance(key, str):
+            await self._save_row(key, plan)
+        self._remember(key, plan)
+        await self._notify(key, plan)
+
+    def subscribe(self, key, callback):
+        """callback(plan) is awaited after every write to key's plan."""
+        self._subscribers.setdefault(key, []).append(callback)
+
+    def unsubscribe(self, key, callback):
+        callbacks = self._subscribers.get(key, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self._subscribers.pop(key, None)
+
+    def discard(self, key):
+        """Drops an ephemeral run's plan once the run is over."""
+        self._ephemeral.pop(key, None)
+        self._locks.pop(key, None)
+
+    async def _notify(self, key, plan):
+        for callback in list(self._subscribers.get(key, [])):
+            try:
+                await callback(plan)
+            except Exception as e:
+                print(f"Plan subscriber for {key} failed: {e}")
+
+
+plans = PlanStore()
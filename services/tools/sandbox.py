@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+from backend.config import settings
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Never needed to run the project's Python tests, and expensive to copy.
+# Databases and .env are also left out so no copy of data or secrets lands in /tmp.
+IGNORE_PATTERNS = (
+    ".git", "node_modules", "agente_data", "__pycache__", "*.pyc", ".venv", "venv", "dist", "*.bak",
+    "*.db", "*.db-wal", "*.db-shm", ".env",
+)
+TEST_FILENAME = "test_verification_temp.py"
+_promote_lock = threading.Lock()
+
+
+@dataclass
+class TestResult:
+    passed: bool
+    returncode: int
+    stdout: str
+    stderr: str
+    elapsed: float
+    timed_out: bool = False
+    report: object = None   # impacted_tests.TestReport, when impacted tests ran
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's bytes, or "" if it doesn't exist."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return ""
+
+
+def project_path(target_file: str, root: str = BASE_DIR) -> str:
+    """
+    target_file relative to the project root, resolving symlinks. Raises
+    ValueError for files outside the project: their relative path would
+    climb out of the overlay and onto the live file.
+    """
+    root = os.path.realpath(root)
+    real = os.path.realpath(target_file)
+    if os.path.commonpath([root, real]) != root or real == root:
+        raise ValueError(f"{target_file} is outside the project ({root}); only project files can be verified in the sandbox.")
+    return os.path.relpath(real, root)
+
+
+def create_overlay(root: str = BASE_DIR) -> str:
+    """Copies the project into a fresh temp directory and returns its path."""
+    workdir = tempfile.mkdtemp(prefix="skynet_sandbox_")
+    project = os.path.join(workdir, "project")
+    shutil.copytree(root, project, ignore=shutil.ignore_patterns(*IGNORE_PATTERNS), symlinks=True)
+    return project
+
+
+def remove_overlay(project: str):
+    shutil.rmtree(os.path.dirname(project), ignore_errors=True)
+
+
+async def run_command(args: list, cwd: str, timeout: float = None) -> TestResult:
+    """
+    Runs a command as an async subprocess with cwd on PYTHONPATH.
+    The process is killed on timeout or if the caller is cancelled.
+    """
+    timeout = timeout or settings.SANDBOX_TEST_TIMEOUT
+    env = dict(os.environ, PYTHONPATH=cwd + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    started = time.monotonic()
+    proc = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        env=env
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return TestResult(False, -1, "", f"Test timed out after {timeout}s.", time.monotonic() - started, timed_out=True)
+    except asyncio.CancelledError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return TestResult(
+        proc.returncode == 0, proc.returncode,
+        stdout.decode(errors="replace"), stderr.decode(errors="replace"),
+        time.monotonic() - started
+    )
+
+
+async def run_python(script_path: str, cwd: str, timeout: float = None) -> TestResult:
+    return await run_command([sys.executable, script_path], cwd, timeout)
+
+
+async def verify_in_sandbox(target_file: str, new_content: str, test_content: str, timeout: float = None, impacted: bool = True) -> TestResult:
+    """
+    Verifies new_content for target_file (absolute, inside the project) in a
+    throwaway copy of the project: the file is replaced there, the test is
+    written next to it and run. If it passes and impacted is set, the
+    existing tests that import target_file run there too. The live tree is
+    never touched.
+    """
+    from . import impacted_tests
+    relative = project_path(target_file)
+    project = await asyncio.to_thread(create_overlay)
+    try:
+        sandbox_target = os.path.join(project, relative)
+        os.makedirs(os.path.dirname(sandbox_target), exist_ok=True)
+        with open(sandbox_target, "w", encoding="utf-8") as f:
+            f.write(new_content)
+        test_path = os.path.join(os.path.dirname(sandbox_target), TEST_FILENAME)
+        with open(test_path, "w", encoding="utf-8") as f:
+            f.write(test_content)
+        result = await run_python(test_path, cwd=project, timeout=timeout)
+        if result.passed and impacted:
+            result.report = await impacted_tests.run_impacted([relative], cwd=project)
+            result.passed = result.report.passed
+            result.elapsed += result.report.elapsed
+            if result.passed:
+                result.stdout = f"{result.stdout.rstrip()}\n\n{result.report.summary()}".lstrip()
+            else:
+                result.stderr = f"{result.report.summary()}\n\n{result.stderr}".rstrip()
+        return result
+    finally:
+        await asyncio.to_thread(remove_overlay, project)
+
+
+def promote(target_file: str, new_content: str, expected_hash: str) -> bool:
+    """
+    Atomically replaces target_file with new_content, but only if the file
+    still has expected_hash (i.e. nobody changed it while it was being
+    verified). Returns False on a conflict.
+    """
+    with _promote_lock:
+        if file_hash(target_file) != expected_hash:
+            return False
+        os.makedirs(os.path.dirname(target_file), exist_ok=True)
+        tmp_path = f"{target_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(new_content)
+        if os.path.exists(target_file):
+            shutil.copymode(target_file, tmp_path)
+        os.replace(tmp_path, target_file)
+        return True
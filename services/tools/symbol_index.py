@@ -0,0 +1,249 @@
+import ast
+import os
+import sqlite3
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+INDEX_PATH = os.path.join(BASE_DIR, "agente_data", "symbols.sqlite")
+SKIP_DIRS = {".git", "node_modules", "agente_data", "__pycache__", ".venv", "venv", "dist", "frontend"}
+REFRESH_INTERVAL = 5.0   # seconds between workspace mtime scans
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, module TEXT, mtime REAL NOT NULL, error TEXT)",
+    "CREATE TABLE IF NOT EXISTS definitions (path TEXT NOT NULL, name TEXT NOT NULL, qualname TEXT NOT NULL, "
+    "kind TEXT NOT NULL, line INTEGER, end_line INTEGER, signature TEXT, parent TEXT)",
+    "CREATE TABLE IF NOT EXISTS refs (path TEXT NOT NULL, name TEXT NOT NULL, line INTEGER)",
+    "CREATE TABLE IF NOT EXISTS imports (path TEXT NOT NULL, module TEXT NOT NULL, name TEXT, line INTEGER)",
+    "CREATE INDEX IF NOT EXISTS ix_definitions_name ON definitions (name)",
+    "CREATE INDEX IF NOT EXISTS ix_definitions_qualname ON definitions (qualname)",
+    "CREATE INDEX IF NOT EXISTS ix_definitions_path ON definitions (path)",
+    "CREATE INDEX IF NOT EXISTS ix_refs_name ON refs (name)",
+    "CREATE INDEX IF NOT EXISTS ix_refs_path ON refs (path)",
+    "CREATE INDEX IF NOT EXISTS ix_imports_module ON imports (module)",
+    "CREATE INDEX IF NOT EXISTS ix_imports_path ON imports (path)",
+]
+
+
+def module_name(rel_path: str) -> str:
+    """services/tools/web_fetch.py -> services.tools.web_fetch (packages drop __init__)."""
+    parts = rel_path[:-3].replace(os.sep, "/").split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def _resolve_relative(module: str, level: int, current: str, is_package: bool) -> str:
+    if not level:
+        return module or ""
+    package = current.split(".") if is_package else current.split(".")[:-1]
+    base = package[:len(package) - (level - 1)] if level > 1 else package
+    return ".".join(base + ([module] if module else []))
+
+
+def _signature(node) -> str:
+    if isinstance(node, ast.ClassDef):
+        bases = ", ".join(ast.unparse(b) for b in node.bases)
+        return f"class {node.name}({bases})" if bases else f"class {node.name}"
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+def parse_file(rel_path: str, source: str):
+    """Returns (definitions, refs, imports) rows for one module, without the path column."""
+    tree = ast.parse(source)
+    current = module_name(rel_path)
+    is_package = rel_path.endswith("__init__.py")
+    definitions, refs, imports = [], set(), []
+
+    def visit_defs(body, parent):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                qualname = f"{parent}.{node.name}" if parent else node.name
+                if isinstance(node, ast.ClassDef):
+                    kind = "class"
+                else:
+                    kind = "method" if parent and parent in class_names else "function"
+                    if isinstance(node, ast.AsyncFunctionDef):
+                        kind = "async " + kind
+                definitions.append((node.name, qualname, kind, node.lineno, node.end_lineno, _signature(node), parent))
+                if isinstance(node, ast.ClassDef):
+                    class_names.add(qualname)
+                visit_defs(node.body, qualname)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)) and not parent:
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        definitions.append((target.id, target.id, "variable", node.lineno, node.end_lineno, target.id, None))
+
+    class_names = set()
+    visit_defs(tree.body, None)
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            refs.add((node.id, node.lineno))
+        elif isinstance(node, ast.Attribute):
+            refs.add((node.attr, node.lineno))
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.append((alias.name, None, node.lineno))
+        elif isinstance(node, ast.ImportFrom):
+            module = _resolve_relative(node.module, node.level, current, is_package)
+            for alias in node.names:
+                imports.append((module, alias.name, node.lineno))
+                refs.add((alias.name, node.lineno))
+    return definitions, sorted(refs), imports
+
+
+class SymbolIndex:
+    """
+    Persistent index of the workspace's Python symbols: definitions,
+    references, imports and the module dependency graph, in SQLite.
+    refresh() re-parses only files whose mtime changed, and lookups
+    refresh at most every REFRESH_INTERVAL seconds, so they are plain
+    indexed queries almost always.
+    """
+
+    def __init__(self, root: str = BASE_DIR, path: str = INDEX_PATH):
+        self.root = root
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        self._last_refresh = 0.0
+
+    # --- indexing --------------------------------------------------------
+
+    def _workspace_files(self) -> dict:
+        found = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith(".")]
+            for filename in filenames:
+                if filename.endswith(".py"):
+                    full = os.path.join(dirpath, filename)
+                    try:
+                        found[os.path.relpath(full, self.root)] = os.path.getmtime(full)
+                    except OSError:
+                        pass
+        return found
+
+    def _delete_file(self, rel_path: str):
+        for table in ("files", "definitions", "refs", "imports"):
+            self._db.execute(f"DELETE FROM {table} WHERE path = ?", (rel_path,))
+
+    def _index_file(self, rel_path: str, mtime: float):
+        self._delete_file(rel_path)
+        error = None
+        try:
+            with open(os.path.join(self.root, rel_path), "r", encoding="utf-8") as f:
+                definitions, refs, imports = parse_file(rel_path, f.read())
+        except (SyntaxError, UnicodeDecodeError, OSError) as e:
+            definitions, refs, imports, error = [], [], [], str(e)
+        self._db.execute("INSERT INTO files (path, module, mtime, error) VALUES (?, ?, ?, ?)",
+                         (rel_path, module_name(rel_path), mtime, error))
+        self._db.executemany("INSERT INTO definitions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             [(rel_path, *row) for row in definitions])
+        self._db.executemany("INSERT INTO refs VALUES (?, ?, ?)", [(rel_path, *row) for row in refs])
+        self._db.executemany("INSERT INTO imports VALUES (?, ?, ?, ?)", [(rel_path, *row) for row in imports])
+
+    def refresh(self, force: bool = False) -> int:
+        """Re-indexes changed, new and deleted files. Returns how many files changed."""
+        if not force and time.monotonic() - self._last_refresh < REFRESH_INTERVAL:
+            return 0
+        with self._lock:
+            current = self._workspace_files()
+            known = dict(self._db.execute("SELECT path, mtime FROM files"))
+            changed = [p for p, m in current.items() if known.get(p) != m]
+            removed = [p for p in known if p not in current]
+            for rel_path in removed:
+                self._delete_file(rel_path)
+            for rel_path in changed:
+                self._index_file(rel_path, current[rel_path])
+            if changed or removed:
+                self._db.commit()
+            self._last_refresh = time.monotonic()
+        return len(changed) + len(removed)
+
+    def refresh_file(self, rel_path: str):
+        """Brings one file up to date regardless of the refresh interval."""
+        full = os.path.join(self.root, rel_path)
+        with self._lock:
+            row = self._db.execute("SELECT mtime FROM files WHERE path = ?", (rel_path,)).fetchone()
+            if not os.path.exists(full):
+                if row:
+                    self._delete_file(rel_path)
+                    self._db.commit()
+                return
+            mtime = os.path.getmtime(full)
+            if not row or row[0] != mtime:
+                self._index_file(rel_path, mtime)
+                self._db.commit()
+
+    # --- lookups ---------------------------------------------------------
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def find_definitions(self, symbol: str) -> list:
+        """Matches a bare name ("fetch") or a qualified one ("HttpCache.get_meta")."""
+        self.refresh()
+        column = "qualname" if "." in symbol else "name"
+        return self._query(
+            f"SELECT path, line, kind, qualname, signature FROM definitions WHERE {column} = ? ORDER BY path, line",
+            (symbol,)
+        )
+
+    def find_references(self, symbol: str, limit: int = 50) -> list:
+        self.refresh()
+        name = symbol.rsplit(".", 1)[-1]
+        return self._query(
+            "SELECT r.path, r.line FROM refs r WHERE r.name = ? AND NOT EXISTS ("
+            "SELECT 1 FROM definitions d WHERE d.path = r.path AND d.name = r.name AND d.line = r.line"
+            ") ORDER BY r.path, r.line LIMIT ?",
+            (name, limit)
+        )
+
+    def module_dependents(self, module: str, transitive: bool = False) -> list:
+        """Files importing module (or anything inside it); transitively if asked."""
+        self.refresh()
+        if module.endswith(".py"):
+            module = module_name(os.path.relpath(module, self.root) if os.path.isabs(module) else module)
+        found, frontier = {}, [module]
+        while frontier:
+            target = frontier.pop()
+            rows = self._query(
+                "SELECT DISTINCT i.path, f.module FROM imports i JOIN files f ON f.path = i.path "
+                "WHERE i.module = ? OR i.module LIKE ? OR (i.name IS NOT NULL AND i.module || '.' || i.name = ?)",
+                (target, target + ".%", target)
+            )
+            for path, dependent in rows:
+                if path not in found and dependent != module:
+                    found[path] = target
+                    if transitive:
+                        frontier.append(dependent)
+        return sorted(found.items())
+
+    def outline(self, rel_path: str) -> list:
+        """Definitions of one file in source order, kept current by its mtime."""
+        self.refresh_file(rel_path)
+        return self._query(
+            "SELECT kind, qualname, line, signature, parent FROM definitions WHERE path = ? ORDER BY line",
+            (rel_path,)
+        )
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> SymbolIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SymbolIndex()
+        return _index
@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+    aiohttp = None
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_DIR = os.path.join(BASE_DIR, "agente_data", "http_cache")
+USER_AGENT = "Skynet/1.0 (+docs ingestion)"
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    body: bytes
+    text: str
+    content_type: str
+    content_hash: str
+    final_url: str = ""        # URL after redirects
+    from_cache: bool = False   # served from disk after a 304 revalidation
+    truncated: bool = False    # body was cut at max_bytes
+
+
+class HttpCache:
+    """
+    On-disk HTTP cache keyed by URL. Stores the body plus the validators
+    (ETag / Last-Modified) needed for conditional requests, and free-form
+    metadata such as the hash of the last indexed version of the page.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".json"), os.path.join(self.cache_dir, key + ".body")
+
+    def get_meta(self, url: str) -> dict:
+        meta_path, _ = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get_body(self, url: str):
+        _, body_path = self._paths(url)
+        try:
+            with open(body_path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def update_meta(self, url: str, **fields):
+        meta = self.get_meta(url)
+        meta.update(fields)
+        meta_path, _ = self._paths(url)
+        self._atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def store(self, url: str, body: bytes, etag=None, last_modified=None, content_type=None, charset=None, final_url=None):
+        _, body_path = self._paths(url)
+        self._atomic_write(body_path, body)
+        self.update_meta(
+            url,
+            etag=etag,
+            last_modified=last_modified,
+            content_type=content_type,
+            charset=charset,
+            final_url=final_url or url,
+            content_hash=hashlib.sha256(body).hexdigest(),
+            fetched_at=time.time()
+        )
+
+    def _atomic_write(self, path: str, data: bytes):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+_session = None
+_session_loop = None
+_cache = None
+
+
+def get_cache() -> HttpCache:
+    global _cache
+    if _cache is None:
+        _cache = HttpCache()
+    return _cache
+
+
+def get_session():
+    """Returns the process-wide aiohttp session, creating it on first use."""
+    global _session, _session_loop
+    if not AIOHTTP_AVAILABLE:
+        raise ImportError("aiohttp is not installed.")
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session_loop = loop
+        _session = aiohttp.ClientSession(
+            headers={"User-Agent": USER_AGENT},
+            connector=aiohttp.TCPConnector(limit=20, limit_per_host=4, ttl_dns_cache=300)
+        )
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _decode(body: bytes, charset) -> str:
+    return body.decode(charset or "utf-8", errors="replace")
+
+
+async def fetch(url: str, max_bytes: int = 5_000_000, timeout: float = 30, session=None, cache: HttpCache = None,
+                revalidate: bool = True) -> FetchResult:
+    """
+    GETs url through the shared session, revalidating against the on-disk
+    cache with If-None-Match / If-Modified-Since. The body is streamed and
+    cut at max_bytes. A 304 answer is returned as a 200 served from cache.
+    """
+    session = session or get_session()
+    cache = cache or get_cache()
+
+    meta = await asyncio.to_thread(cache.get_meta, url) if revalidate else {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with session.get(url, headers=headers, timeout=client_timeout) as response:
+        if response.status == 304:
+            body = await asyncio.to_thread(cache.get_body, url)
+            if body is not None:
+                truncated = len(body) > max_bytes
+                body = body[:max_bytes]
+                content_type = meta.get("content_type") or ""
+                return FetchResult(
+                    url=url, status=200, body=body, text=_decode(body, meta.get("charset")),
+                    content_type=content_type, content_hash=meta.get("content_hash", ""),
+                    final_url=meta.get("final_url") or url, from_cache=True, truncated=truncated
+                )
+            # Cache body vanished; fall back to an unconditional request.
+            return await fetch(url, max_bytes, timeout, session, cache, revalidate=False)
+
+        content_type = response.headers.get("Content-Type", "")
+        if response.status != 200:
+            return FetchResult(url=url, status=response.status, body=b"", text="", content_type=content_type, content_hash="")
+
+        parts = []
+        size = 0
+        truncated = False
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            if size + len(chunk) > max_bytes:
+                parts.append(chunk[:max_bytes - size])
+                truncated = True
+                break
+            parts.append(chunk)
+            size += len(chunk)
+        body = b"".join(parts)
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        charset = response.charset
+        final_url = str(response.url)
+
+    if not truncated:
+        await asyncio.to_thread(cache.store, url, body, etag, last_modified, content_type, charset, final_url)
+
+    return FetchResult(
+        url=url, status=200, body=body, text=_decode(body, charset),
+        content_type=content_type, content_hash=hashlib.sha256(body).hexdigest(),
+        final_url=final_url, truncated=truncated
+    )
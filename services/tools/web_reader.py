@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+
+from backend.config import settings
+from . import web_fetch, html_extract
+from .browser_pool import browser_manager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TIERS_PATH = os.path.join(BASE_DIR, "agente_data", "reader_tiers.json")
+TIER_FETCH = "fetch"
+TIER_BROWSER = "browser"
+TEXT_TYPES = ("text/plain", "text/markdown", "application/json", "text/x-rst")
+
+
+@dataclass
+class ReadResult:
+    url: str
+    title: str
+    text: str
+    tier: str            # "fetch" or "browser"
+    elapsed: float
+    reason: str = ""     # why the browser was needed, if it was
+
+
+class TierMemory:
+    """
+    Remembers per domain which reading tier last worked. Domains that needed
+    the browser go straight to it, but the plain fetch is retried once the
+    entry is older than retry_after seconds in case the site changed.
+    """
+
+    def __init__(self, path: str = TIERS_PATH, retry_after: float = 7 * 86400):
+        self.path = path
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._tiers = None
+
+    def _load(self) -> dict:
+        if self._tiers is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._tiers = json.load(f)
+            except (OSError, ValueError):
+                self._tiers = {}
+        return self._tiers
+
+    def get(self, domain: str) -> str:
+        with self._lock:
+            entry = self._load().get(domain)
+        if not entry:
+            return TIER_FETCH
+        if entry["tier"] == TIER_BROWSER and time.time() - entry["updated_at"] > self.retry_after:
+            return TIER_FETCH
+        return entry["tier"]
+
+    def record(self, domain: str, tier: str, reason: str = ""):
+        with self._lock:
+            tiers = self._load()
+            previous = tiers.get(domain)
+            if previous and previous["tier"] == tier and time.time() - previous["updated_at"] < 3600:
+                return  # avoid rewriting the file on every read
+            tiers[domain] = {"tier": tier, "reason": reason, "updated_at": time.time()}
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(tiers, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+tier_memory = TierMemory()
+
+
+async def _read_with_fetch(url: str):
+    """
+    Returns (reading, reason, needs_js). reading is None when the browser is
+    needed; needs_js tells whether that is because of the page content (as
+    opposed to a failed fetch, which says nothing lasting about the domain).
+    """
+    try:
+        result = await web_fetch.fetch(url, max_bytes=settings.WEB_MAX_BYTES, timeout=15)
+    except Exception as e:
+        return None, f"fetch failed: {e}", False
+    if result.status != 200:
+        return None, f"HTTP {result.status}", False
+
+    content_type = (result.content_type or "text/html").lower()
+    if content_type.startswith(TEXT_TYPES):
+        return {"title": "", "text": result.text}, "", False
+    if "html" not in content_type:
+        return None, f"unsupported content type {content_type}", False
+
+    reading = await html_extract.extract_reading(result.text, settings.HTML_EXTRACT_WORKERS)
+    if reading["needs_js"]:
+        return None, reading["reason"], True
+    return reading, "", False
+
+
+async def _read_with_browser(url: str) -> dict:
+    async with browser_manager.page() as page:
+        await page.goto(url, timeout=30000)
+        title = await page.title()
+        html = await page.content()
+        inner_text = await page.evaluate("document.body ? document.body.innerText : ''")
+    reading = await html_extract.extract_reading(html, settings.HTML_EXTRACT_WORKERS)
+    return {"title": title or reading["title"], "text": reading["text"] or inner_text}
+
+
+async def read_page(url: str) -> ReadResult:
+    """
+    Reads a page as cheaply as possible: a plain HTTP fetch with main-content
+    extraction first, and headless Chromium only for pages that need
+    JavaScript (or for domains remembered as needing it).
+    """
+    started = time.monotonic()
+    domain = urllib.parse.urlsplit(url).netloc.lower()
+    reason = "remembered for domain"
+    needs_js = False
+
+    if tier_memory.get(domain) == TIER_FETCH:
+        reading, reason, needs_js = await _read_with_fetch(url)
+        if reading is not None:
+            await asyncio.to_thread(tier_memory.record, domain, TIER_FETCH)
+            return ReadResult(url, reading["title"], reading["text"], TIER_FETCH, time.monotonic() - started)
+
+    reading = await _read_with_browser(url)
+    # Only content that needs JavaScript pins the domain to the browser;
+    # timeouts, 429s and 5xx are transient and shouldn't.
+    if needs_js:
+        await asyncio.to_thread(tier_memory.record, domain, TIER_BROWSER, reason)
+    return ReadResult(url, reading["title"], reading["text"], TIER_BROWSER, time.monotonic() - started, reason)
@@ -0,0 +1,32 @@
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@asynccontextmanager
+async def local_server(routes, middlewares=()):
+    """Serves an aiohttp.web app with the given routes on a free local port; yields its base URL."""
+    from aiohttp import web
+
+    app = web.Application(middlewares=list(middlewares))
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        await runner.cleanup()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _shutdown_extract_pool():
+    yield
+    from services.tools import html_extract
+    html_extract.shutdown_pool()
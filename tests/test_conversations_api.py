@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from backend.dependencies import get_async_db
+from backend.routers import conversations
+from services.database import models, pagination
+
+CONVERSATIONS = 5
+MESSAGES = pagination.MAX_PAGE_SIZE + 30   # more than one page
+START = datetime(2026, 1, 1)
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    path = tmp_path_factory.mktemp("db") / "api.db"
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        for n in range(CONVERSATIONS):
+            db.add(models.Conversation(id=n + 1, title=f"chat {n + 1}", created_at=START + timedelta(minutes=n)))
+        for n in range(MESSAGES):
+            db.add(models.ChatLog(role="user" if n % 2 == 0 else "agent-thought", content=f"message {n}",
+                                  conversation_id=1, timestamp=START + timedelta(seconds=n)))
+        db.commit()
+    engine.dispose()
+
+    sessions = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool), expire_on_commit=False)
+
+    async def override_db():
+        async with sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(conversations.router)
+    app.dependency_overrides[get_async_db] = override_db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_conversation_list_without_paging_is_a_bare_list(client):
+    body = client.get("/api/conversations").json()
+    assert isinstance(body, list)
+    assert [c["id"] for c in body] == [5, 4, 3, 2, 1]   # newest first, as before
+    assert {"id", "title", "created_at"} <= set(body[0])
+
+
+def test_messages_without_paging_are_a_bare_list_of_everything(client):
+    body = client.get("/api/conversations/1").json()
+    assert isinstance(body, list)
+    assert [m["content"] for m in body] == [f"message {n}" for n in range(MESSAGES)]
+    assert {"role", "content"} <= set(body[0])
+
+
+def test_paged_conversation_list(client):
+    first = client.get("/api/conversations", params={"limit": 2}).json()
+    assert set(first) == {"items", "before", "after"}
+    assert [c["id"] for c in first["items"]] == [5, 4]
+    assert first["after"] is None
+
+    second = client.get("/api/conversations", params={"limit": 2, "before": first["before"]}).json()
+    assert [c["id"] for c in second["items"]] == [3, 2]
+
+    back = client.get("/api/conversations", params={"limit": 2, "after": second["after"]}).json()
+    assert [c["id"] for c in back["items"]] == [5, 4]
+
+
+def test_paged_messages_walk_back_in_time(client):
+    latest = client.get("/api/conversations/1", params={"limit": 10}).json()
+    assert [m["content"] for m in latest["items"]] == [f"message {n}" for n in range(MESSAGES - 10, MESSAGES)]
+    assert latest["after"] is None
+
+    older = client.get("/api/conversations/1", params={"limit": 10, "before": latest["before"]}).json()
+    assert [m["content"] for m in older["items"]] == [f"message {n}" for n in range(MESSAGES - 20, MESSAGES - 10)]
+    assert older["after"] is not None
+
+
+def test_invalid_cursor_is_a_400(client):
+    assert client.get("/api/conversations", params={"before": "not-a-cursor"}).status_code == 400
+
+
+def test_limit_is_bounded(client):
+    assert client.get("/api/conversations", params={"limit": pagination.MAX_PAGE_SIZE + 1}).status_code == 422
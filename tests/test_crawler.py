@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from conftest import local_server
+from services.tools import web_fetch
+from services.tools.crawler import DocsCrawler
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(web_fetch, "_cache", web_fetch.HttpCache(str(tmp_path / "http_cache")))
+
+
+def _page(*links):
+    async def handler(request):
+        body = f"<html><body><p>Content of {request.path}</p>"
+        body += "".join(f'<a href="{href}">link</a>' for href in links)
+        return web.Response(text=body + "</body></html>", content_type="text/html")
+    return handler
+
+
+@pytest.fixture
+def crawl(tmp_path):
+    """Crawls a local site from "/"; returns (report, indexed paths, requested paths)."""
+    def run(routes, **options):
+        requested = []
+        indexed = []
+
+        @web.middleware
+        async def record(request, handler):
+            requested.append(request.path)
+            return await handler(request)
+
+        async def on_batch(pages):
+            indexed.extend(url for url, _, _ in pages)
+
+        async def main():
+            try:
+                async with local_server(routes, [record]) as base:
+                    crawler = DocsCrawler(
+                        base + "/", on_batch, delay=0, state_dir=str(tmp_path / "crawls"), extract_workers=1, **options
+                    )
+                    return await crawler.run(resume=False), base
+            finally:
+                await web_fetch.close_session()
+
+        report, base = asyncio.run(main())
+        return report, sorted(url[len(base):] for url in indexed), requested
+
+    return run
+
+
+def test_follows_only_same_origin_links(crawl):
+    routes = [
+        web.get("/", _page("/a", "http://example.invalid/elsewhere", "https://127.0.0.1/other-scheme", "/logo.png")),
+        web.get("/a", _page("/b", "/#section")),
+        web.get("/b", _page("/")),
+    ]
+    report, indexed, requested = crawl(routes)
+    assert indexed == ["/", "/a", "/b"]
+    assert "/logo.png" not in requested
+    assert report["complete"] and report["errors"] == 0
+
+
+def test_respects_robots_txt(crawl):
+    async def robots(request):
+        return web.Response(text="User-agent: *\nDisallow: /private\n", content_type="text/plain")
+
+    routes = [
+        web.get("/robots.txt", robots),
+        web.get("/", _page("/public", "/private/secret")),
+        web.get("/public", _page()),
+        web.get("/private/secret", _page()),
+    ]
+    report, indexed, requested = crawl(routes)
+    assert indexed == ["/", "/public"]
+    assert "/private/secret" not in requested
+    assert report["blocked"] == 1
+
+
+def test_missing_robots_txt_allows_everything(crawl):
+    routes = [web.get("/", _page("/a")), web.get("/a", _page())]
+    _, indexed, _ = crawl(routes)
+    assert indexed == ["/", "/a"]
+
+
+def test_page_limit_and_concurrency(crawl):
+    in_flight = 0
+    peak = 0
+
+    async def slow(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return web.Response(text=f"<p>{request.path}</p>", content_type="text/html")
+
+    routes = [web.get("/", _page(*[f"/p{n}" for n in range(20)])), web.get("/p{n}", slow)]
+    report, indexed, _ = crawl(routes, concurrency=3, max_pages=8)
+    assert len(indexed) == 8
+    assert not report["complete"] and report["remaining"] > 0
+    assert 1 < peak <= 3
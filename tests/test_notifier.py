@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.config import settings
+from services.notifications.notifier import Notifier, TokenBucket
+
+
+class StubSender:
+    def __init__(self):
+        self.sent = []
+
+    async def __call__(self, text):
+        self.sent.append((time.monotonic(), text))
+
+    @property
+    def texts(self):
+        return [text for _, text in self.sent]
+
+
+@pytest.fixture(autouse=True)
+def _fast_settings(monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFY_BATCH_DELAY", 0.05)
+    monkeypatch.setattr(settings, "NOTIFY_DEDUPE_WINDOW", 300)
+    monkeypatch.setattr(settings, "NOTIFY_RATE_PER_MINUTE", 60 * 20)   # 20 per second
+    monkeypatch.setattr(settings, "NOTIFY_BURST", 2)
+    monkeypatch.setattr(settings, "NOTIFY_MAX_RETRIES", 0)
+
+
+def test_burst_over_capacity_becomes_one_digest():
+    sender = StubSender()
+
+    async def main():
+        notifier = Notifier(sender=sender)
+        for n in range(10):   # far more than the bucket's 2 tokens
+            notifier.alert(f"disk error {n}")
+        notifier.alert("disk error 0")
+        await notifier.close()
+
+    asyncio.run(main())
+    assert len(sender.sent) == 1
+    digest = sender.texts[0]
+    assert digest.startswith("🚨 Skynet Alerts (10):")
+    assert all(f"disk error {n}" in digest for n in range(10))
+    assert "disk error 0 (x2)" in digest
+
+
+def test_alerts_within_capacity_go_out_unchanged():
+    sender = StubSender()
+
+    async def main():
+        notifier = Notifier(sender=sender)
+        notifier.alert("first")
+        await notifier.flush()
+        notifier.alert("second")
+        await notifier.flush()
+        await notifier.close()
+
+    asyncio.run(main())
+    assert sender.texts == ["🚨 Skynet Alert:\nfirst", "🚨 Skynet Alert:\nsecond"]
+
+
+def test_repeats_inside_dedupe_window_are_only_counted():
+    sender = StubSender()
+
+    async def main():
+        notifier = Notifier(sender=sender)
+        notifier.alert("db down")
+        await notifier.flush()
+        notifier.alert("db down")
+        await notifier.flush()
+        notifier.alert("cache down")
+        await notifier.close()
+
+    asyncio.run(main())
+    assert sender.texts == [
+        "🚨 Skynet Alert:\ndb down",
+        "🚨 Skynet Alert:\ncache down\n(+1 repeats of recent alerts suppressed)",
+    ]
+
+
+def test_token_bucket_refills_over_time():
+    async def main():
+        bucket = TokenBucket(rate=20, capacity=2)
+        started = time.monotonic()
+        await bucket.acquire()
+        await bucket.acquire()
+        burst = time.monotonic() - started
+        await bucket.acquire()   # empty: waits ~1/rate for a token
+        refill = time.monotonic() - started - burst
+        await asyncio.sleep(0.2)  # refills to capacity, not beyond
+        before = time.monotonic()
+        await bucket.acquire()
+        await bucket.acquire()
+        after_idle = time.monotonic() - before
+        return burst, refill, after_idle
+
+    burst, refill, after_idle = asyncio.run(main())
+    assert burst < 0.02
+    assert 0.03 <= refill < 0.2
+    assert after_idle < 0.02
+
+
+def test_sends_are_paced_by_the_bucket():
+    sender = StubSender()
+
+    async def main():
+        notifier = Notifier(sender=sender)
+        for n in range(5):
+            await notifier._deliver(f"message {n}")
+
+    asyncio.run(main())
+    times = [t for t, _ in sender.sent]
+    # Two go out at once (capacity), the rest one per 1/rate seconds.
+    assert times[1] - times[0] < 0.02
+    assert times[4] - times[1] >= 3 * 0.05 * 0.8
+    assert sender.texts == [f"message {n}" for n in range(5)]
@@ -0,0 +1,99 @@
+import asyncio
+
+from aiohttp import web
+
+from conftest import local_server
+from services.tools import web_fetch
+
+
+def test_304_reuses_cached_body(tmp_path):
+    seen = []
+
+    async def page(request):
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        return web.Response(text="<p>hello</p>", content_type="text/html", headers={"ETag": '"v1"'})
+
+    async def main():
+        cache = web_fetch.HttpCache(str(tmp_path))
+        try:
+            async with local_server([web.get("/doc", page)]) as base:
+                first = await web_fetch.fetch(base + "/doc", cache=cache)
+                second = await web_fetch.fetch(base + "/doc", cache=cache)
+        finally:
+            await web_fetch.close_session()
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert seen == [None, '"v1"']
+    assert not first.from_cache
+    assert second.from_cache and second.status == 200
+    assert second.body == first.body == b"<p>hello</p>"
+    assert second.content_hash == first.content_hash
+
+
+def test_changed_etag_refetches(tmp_path):
+    version = {"etag": '"v1"', "text": "one"}
+
+    async def page(request):
+        if request.headers.get("If-None-Match") == version["etag"]:
+            return web.Response(status=304)
+        return web.Response(text=version["text"], content_type="text/plain", headers={"ETag": version["etag"]})
+
+    async def main():
+        cache = web_fetch.HttpCache(str(tmp_path))
+        try:
+            async with local_server([web.get("/doc", page)]) as base:
+                first = await web_fetch.fetch(base + "/doc", cache=cache)
+                version.update(etag='"v2"', text="two")
+                second = await web_fetch.fetch(base + "/doc", cache=cache)
+        finally:
+            await web_fetch.close_session()
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert not second.from_cache
+    assert (first.text, second.text) == ("one", "two")
+    assert first.content_hash != second.content_hash
+
+
+def test_body_is_capped(tmp_path):
+    async def big(request):
+        return web.Response(body=b"x" * 100_000, content_type="text/plain")
+
+    async def main():
+        try:
+            async with local_server([web.get("/big", big)]) as base:
+                return await web_fetch.fetch(base + "/big", max_bytes=1000, cache=web_fetch.HttpCache(str(tmp_path)))
+        finally:
+            await web_fetch.close_session()
+
+    result = asyncio.run(main())
+    assert result.truncated and len(result.body) == 1000
+
+
+def test_shared_session_caps_connections_per_host(tmp_path):
+    in_flight = 0
+    peak = 0
+
+    async def slow(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.1)
+        in_flight -= 1
+        return web.Response(text="ok", content_type="text/plain")
+
+    async def main():
+        cache = web_fetch.HttpCache(str(tmp_path))
+        try:
+            async with local_server([web.get("/slow/{n}", slow)]) as base:
+                return await asyncio.gather(*[web_fetch.fetch(f"{base}/slow/{n}", cache=cache) for n in range(12)])
+        finally:
+            await web_fetch.close_session()
+
+    results = asyncio.run(main())
+    assert all(r.status == 200 for r in results)
+    limit = 4   # limit_per_host of the shared session's connector
+    assert 1 < peak <= limit